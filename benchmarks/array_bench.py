@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import numarray
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from output import Output, CaptureSink, writing
+
+# each workload as the scalar loop a script has to write today and the same thing with array builtins
+workloads: dict[str, tuple[str, str]] = {
+    'sum of squares': ('''var i = 0;
+var total = 0;
+while (i < {n}) {{
+    total = total + i * i;
+    i = i + 1;
+}}
+print total;
+''', '''var values = range(0, {n});
+print dot(values, values);
+'''),
+    'scale and shift': ('''var xs = range(0, {n});
+var ys = array({n}, 1);
+var i = 0;
+while (i < {n}) {{
+    set(ys, i, get(xs, i) * 2.5 + get(ys, i));
+    i = i + 1;
+}}
+print sum(ys);
+''', '''var xs = range(0, {n});
+var ys = array({n}, 1);
+ys = xs * 2.5 + ys;
+print sum(ys);
+'''),
+    'min and max': ('''var xs = range(0, {n}) % 977;
+var low = get(xs, 0);
+var high = low;
+var i = 1;
+while (i < {n}) {{
+    var x = get(xs, i);
+    if (x < low) low = x;
+    if (x > high) high = x;
+    i = i + 1;
+}}
+print high - low;
+''', '''var xs = range(0, {n}) % 977;
+print max(xs) - min(xs);
+'''),
+    'normalize': ('''var xs = range(1, {n} + 1);
+var total = 0;
+var i = 0;
+while (i < {n}) {{
+    total = total + get(xs, i);
+    i = i + 1;
+}}
+i = 0;
+while (i < {n}) {{
+    set(xs, i, get(xs, i) / total);
+    i = i + 1;
+}}
+print get(xs, {n} - 1);
+''', '''var xs = range(1, {n} + 1);
+xs = xs / sum(xs);
+print get(xs, {n} - 1);
+''')
+}
+
+def run(source: str, jit_threshold: int) -> tuple[float, str]:
+    stmts: list = Parser(FastScanner(source).scan_tokens()).parse()
+    Resolver().resolve(stmts)
+    interpreter: Interpreter = Interpreter()
+    interpreter.jit_threshold = jit_threshold
+    capture: CaptureSink = CaptureSink()
+    with writing(Output(capture)):
+        start: float = perf_counter()
+        interpreter.interpret(stmts)
+        elapsed: float = perf_counter() - start
+    return elapsed, capture.getvalue()
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Compare scalar Lox loops with the array builtins that replace them.')
+    arg_parser.add_argument('--size', type=int, default=200_000, help='elements per array')
+    arg_parser.add_argument('--jit-threshold', type=int, default=0, help='0 keeps the scalar loops in the tree walker')
+    options: Namespace = arg_parser.parse_args()
+
+    modes: list[bool] = [False, True] if numarray.numpy is not None else [False]
+    columns: str = ''.join(f' {"arrays" + (" numpy" if numpy else "") + " s":>15}' for numpy in modes)
+    print(f'{"workload":<16} {"scalar s":>9}{columns} {"speedup":>8}')
+    for name, (scalar, vectorized) in workloads.items():
+        scalar_time, expected = run(scalar.format(n=options.size), options.jit_threshold)
+        times: list[float] = []
+        for numpy in modes:
+            numarray.use_numpy = numpy
+            elapsed, output = run(vectorized.format(n=options.size), options.jit_threshold)
+            if output != expected:
+                sys.exit(f'{name}: arrays printed {output.strip()!r}, the scalar loop {expected.strip()!r}')
+            times.append(elapsed)
+        cells: str = ''.join(f' {elapsed:>15.4f}' for elapsed in times)
+        print(f'{name:<16} {scalar_time:>9.3f}{cells} {scalar_time / min(times):>7.1f}x')
+
+if __name__ == '__main__':
+    main()
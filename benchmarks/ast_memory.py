@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import sys
+import gc
+import random
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from optimizer import count_nodes
+from token_cls import Token
+from token_type import TokenType
+from expressions import Expr, Operator, operator_lexemes
+from statements import Stmt
+
+def generate_program(statements: int, seed: int=1) -> str:
+    rng: random.Random = random.Random(seed)
+    lines: list[str] = [f'var g{i} = {i};' for i in range(10)] + ['var flag = false;']
+    for i in range(statements):
+        a: str = f'g{rng.randrange(10)}'
+        b: str = f'g{rng.randrange(10)}'
+        choice: int = rng.randrange(4)
+        if choice == 0:
+            lines.append(f'{a} = ({a} + {b} * {i % 7 + 1}) - {b} / {i % 5 + 1};')
+        elif choice == 1:
+            lines.append(f'if ({a} < {b} and !({a} == {i})) {{ var t = {a} % 3; {b} = t + 1; }} else {b} = {b} - 1;')
+        elif choice == 2:
+            lines.append(f'{{ var k = 0; while (k < 2) {{ k = k + 1; {a} = {a} + k; }} }}')
+        else:
+            lines.append(f'flag = {a} >= -{b} or {a} != {b} and !flag == true;')
+    return '\n'.join(lines) + '\n'
+
+class DictNode:
+    pass
+
+class DictToken:
+    def __init__(self, type: TokenType, lexeme: str, literal: object, line: int) -> None:
+        self.type: TokenType = type
+        self.lexeme: str = lexeme
+        self.literal: object = literal
+        self.line: int = line
+
+# one dict-backed class per node class, as every node had before they were slotted
+dict_classes: dict[type, type] = {}
+
+def slot_names(cls: type) -> list[str]:
+    return [slot for klass in cls.__mro__ for slot in getattr(klass, '__slots__', ())]
+
+# copies the tree the way the nodes used to lay it out: an instance dict per node and per token, and operator nodes
+# holding their whole token instead of its type and line
+def dict_tree(value: object) -> object:
+    if type(value) is list:
+        return [dict_tree(item) for item in value]
+    if type(value) is Token:
+        return DictToken(value.type, value.lexeme, value.literal, value.line)
+    if not isinstance(value, (Expr, Stmt)):
+        return value
+    cls: type = type(value)
+    if cls not in dict_classes:
+        dict_classes[cls] = type(cls.__name__, (DictNode,), {})
+    node: DictNode = dict_classes[cls]()
+    for name in slot_names(cls):
+        if name not in ('op', 'line'):
+            setattr(node, name, dict_tree(getattr(value, name)))
+    if isinstance(value, Operator):
+        node.operator = DictToken(value.op, operator_lexemes[value.op], None, value.line)
+    return node
+
+def traced(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    result: object = build()
+    gc.collect()
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Compare resident AST size with dict-backed nodes and slotted nodes, and time a tree walk.')
+    arg_parser.add_argument('--statements', type=int, default=50_000)
+    options: Namespace = arg_parser.parse_args()
+
+    source: str = generate_program(options.statements)
+
+    # the token list is dropped once parsed, so what stays counted is what the tree keeps alive
+    def parse() -> list:
+        stmts: list = Parser(FastScanner(source).scan_tokens()).parse()
+        Resolver().resolve(stmts)
+        return stmts
+
+    size, stmts = traced(parse)
+    nodes: int = count_nodes(stmts)
+    dict_size, old_stmts = traced(lambda: dict_tree(parse()))
+    del old_stmts
+
+    start: float = perf_counter()
+    Interpreter().interpret(stmts)
+    elapsed: float = perf_counter() - start
+
+    print(f'{options.statements} statements, {nodes} nodes')
+    print(f'dict nodes    {dict_size / 1e6:8.1f} MB {dict_size / nodes:8.1f} bytes/node')
+    print(f'slotted nodes {size / 1e6:8.1f} MB {size / nodes:8.1f} bytes/node ({dict_size / size:.2f}x smaller)')
+    print(f'interpret     {elapsed:8.2f} s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from error import ErrorReporter, RuntimeErr, reporting
+from expressions import Call
+from statements import Return
+from environment import LocalEnvironment
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from functions import LoxFunction
+from natives import call_value
+from output import Output, CaptureSink, writing
+
+class ReturnValue(Exception):
+    def __init__(self, value: object) -> None:
+        self.value: object = value
+
+# calls the way a straightforward port of jlox makes them: an argument list, return unwinding as an exception, and
+# a Python frame for every call including tail calls, kept as the baseline
+class ExceptionInterpreter(Interpreter):
+    def visit_call_expr(self, expr: Call) -> object:
+        callee: object = expr.callee.accept(self)
+        arguments: list[object] = [argument.accept(self) for argument in expr.arguments]
+        if type(callee) is not LoxFunction:
+            return call_value(callee, arguments, expr.paren)
+        if len(arguments) != len(callee.declaration.params):
+            raise RuntimeErr(expr.paren, f'Expected {len(callee.declaration.params)} arguments but got {len(arguments)}.')
+        frame: LocalEnvironment = LocalEnvironment(callee.closure, callee.declaration.slot_count)
+        frame.slots[:len(arguments)] = arguments
+        try:
+            return self.run_frame(callee, frame)
+        except RecursionError:
+            raise RuntimeErr(expr.paren, 'Stack overflow.') from None
+
+    def run_frame(self, function: LoxFunction, frame: LocalEnvironment) -> object:
+        previous: object = self.environ
+        try:
+            self.environ = frame
+            for stmt in function.declaration.body:
+                stmt.accept(self)
+        except ReturnValue as returned:
+            return returned.value
+        finally:
+            self.environ = previous
+        return None
+
+    def visit_return_stmt(self, stmt: Return) -> object:
+        raise ReturnValue(stmt.value.accept(self) if stmt.value is not None else None)
+
+def fib_calls(n: int) -> int:
+    a, b = 1, 1
+    for _ in range(n):
+        a, b = b, a + b + 1
+    return a
+
+def ackermann_calls(m: int, n: int) -> int:
+    calls: int = 0
+    stack: list[int] = [m]
+    while stack:
+        m = stack.pop()
+        calls += 1
+        if m == 0:
+            n += 1
+        elif n == 0:
+            n = 1
+            stack.append(m - 1)
+        else:
+            n -= 1
+            stack += [m - 1, m]
+    return calls
+
+# each workload's source, and the number of Lox calls it makes for a given size
+workloads: dict[str, tuple[str, object]] = {
+    'fib': ('''fun fib(n) {{
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}}
+print fib({n});
+''', lambda n: fib_calls(n)),
+    'ackermann(2, n)': ('''fun ack(m, n) {{
+    if (m == 0) return n + 1;
+    if (n == 0) return ack(m - 1, 1);
+    return ack(m - 1, ack(m, n - 1));
+}}
+print ack(2, {n});
+''', lambda n: ackermann_calls(2, n)),
+    'tail count': ('''fun count(n, total) {{
+    if (n == 0) return total;
+    return count(n - 1, total + 1);
+}}
+print count({n}, 0);
+''', lambda n: n + 1)
+}
+
+while_count: str = '''var n = {n};
+var total = 0;
+while (n != 0) {{
+    total = total + 1;
+    n = n - 1;
+}}
+print total;
+'''
+
+def run(interpreter_cls: type, source: str) -> tuple[float, str]:
+    stmts: list = Parser(FastScanner(source).scan_tokens()).parse()
+    Resolver().resolve(stmts)
+    interpreter: Interpreter = interpreter_cls()
+    interpreter.jit_threshold = 0
+    capture: CaptureSink = CaptureSink()
+    reporter: ErrorReporter = ErrorReporter(capture=True)
+    with reporting(reporter), writing(Output(capture)):
+        start: float = perf_counter()
+        interpreter.interpret(stmts)
+        elapsed: float = perf_counter() - start
+    if reporter.had_err:
+        return elapsed, reporter.messages[0]
+    return elapsed, capture.getvalue().strip()
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Time Lox calls against a baseline that returns by exception and keeps every frame.')
+    arg_parser.add_argument('--fib', type=int, default=22)
+    arg_parser.add_argument('--ackermann', type=int, default=60, help='n in ackermann(2, n)')
+    arg_parser.add_argument('--count', type=int, default=200_000, help='depth of the tail-recursive count')
+    options: Namespace = arg_parser.parse_args()
+
+    sizes: dict[str, int] = {'fib': options.fib, 'ackermann(2, n)': options.ackermann, 'tail count': options.count}
+    print(f'{"workload":<16} {"calls":>9} {"baseline s":>11} {"frames s":>9} {"speedup":>8} {"calls/s":>10}')
+    for name, (template, count_calls) in workloads.items():
+        source: str = template.format(n=sizes[name])
+        calls: int = count_calls(sizes[name])
+        baseline, expected = run(ExceptionInterpreter, source)
+        elapsed, output = run(Interpreter, source)
+        if output.startswith('[line') or not expected.startswith('[line') and output != expected:
+            sys.exit(f'{name}: printed {output!r}, the baseline {expected!r}')
+        # the baseline keeps a Python frame per call, so deep tail recursion runs out of stack there
+        timing: str = f'{baseline:>11.3f} {elapsed:>9.3f} {baseline / elapsed:>7.2f}x'
+        if expected.startswith('[line'):
+            timing = f'{"overflow":>11} {elapsed:>9.3f} {"-":>8}'
+        print(f'{name:<16} {calls:>9,} {timing} {calls / elapsed:>10,.0f}')
+    loop_time, loop_output = run(Interpreter, while_count.format(n=options.count))
+    print(f'\nthe same count as a while loop: {loop_time:.3f} s, printed {loop_output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import sys
+import random
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fast_scanner import FastScanner
+from token_parser import Parser
+from incremental import IncrementalParser
+from ast_memory import generate_program
+from parser_bench import pieces, dump, parse
+
+def random_edit(rng: random.Random, source: str) -> tuple[int, int, str]:
+    start: int = rng.randrange(len(source) + 1)
+    end: int = min(len(source), start + rng.choice([0, 0, 1, 3, 12]))
+    text: str = rng.choice(['', ' ', '\n', rng.choice(pieces), ' '.join(rng.choice(pieces) for _ in range(4)), '"', '/*', '*/', '//'])
+    return start, end, text
+
+# every edit leaves the same tree and diagnostics a full scan and parse of the new source gives
+def check(documents: int, edits: int, seed: int) -> bool:
+    rng: random.Random = random.Random(seed)
+    for _ in range(documents):
+        source: str = generate_program(rng.randrange(5, 30), seed=rng.randrange(1000))
+        document: IncrementalParser = IncrementalParser(source)
+        for _ in range(edits):
+            start, end, text = random_edit(rng, document.source)
+            diagnostics: list[str] = document.edit(start, end, text)
+            if (dump(document.statements), diagnostics) != parse(Parser, document.source):
+                print(f'MISMATCH after replacing {start}:{end} with {text!r} in:\n{document.source}')
+                return False
+    print(f'ok  {documents * edits} random edits leave the same trees and errors as a full parse')
+    return True
+
+def summary(name: str, times: list[float]) -> None:
+    times = sorted(times)
+    median: float = times[len(times) // 2]
+    p99: float = times[min(len(times) - 1, len(times) * 99 // 100)]
+    print(f'{name:<28} {len(times):>6} {median * 1e6:>10.0f} {p99 * 1e6:>9.0f} {times[-1] * 1e6:>10.0f}')
+
+def timed(document: IncrementalParser, start: int, end: int, text: str) -> float:
+    began: float = perf_counter()
+    document.edit(start, end, text)
+    return perf_counter() - began
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Time single-line edits re-scanned and re-parsed incrementally against a full parse.')
+    arg_parser.add_argument('--statements', type=int, default=12_000, help='lines in the edited program')
+    arg_parser.add_argument('--edits', type=int, default=1_000, help='edits timed per kind')
+    arg_parser.add_argument('--samples', type=int, default=200, help='random documents checked against a full parse')
+    options: Namespace = arg_parser.parse_args()
+
+    if not check(options.samples, 25, seed=3):
+        sys.exit(1)
+    source: str = generate_program(options.statements)
+    start: float = perf_counter()
+    Parser(FastScanner(source).scan_tokens()).parse()
+    full: float = perf_counter() - start
+    document: IncrementalParser = IncrementalParser(source)
+    print(f'\n{source.count(chr(10)):,} lines, full scan and parse {full * 1e3:.0f} ms')
+
+    rng: random.Random = random.Random(1)
+    print(f'\n{"edit":<28} {"count":>6} {"median us":>10} {"p99 us":>9} {"max us":>10}')
+    times: list[float] = []
+    for _ in range(options.edits):
+        at: int = rng.randrange(len(document.source))
+        while not document.source[at].isdigit():
+            at += 1
+        times.append(timed(document, at, at + 1, str(rng.randrange(10))))
+    summary('retype a digit', times)
+
+    # a space in the middle of a keyword or name breaks the statement, which the next edit mends
+    times = []
+    for _ in range(options.edits // 2):
+        at = rng.randrange(len(document.source))
+        times.append(timed(document, at, at, ' '))
+        times.append(timed(document, at, at + 1, ''))
+    summary('insert and delete a space', times)
+
+    times = []
+    lines: int = 0
+    while len(times) < options.edits:
+        at = document.source.index('\n', rng.randrange(len(document.source) - 1))
+        times.append(timed(document, at, at, '\n'))
+        at += 1
+        for char in f'print g{lines % 10} + 2;':
+            times.append(timed(document, at, at, char))
+            at += 1
+        lines += 1
+    summary('type a new line', times)
+
+    times = []
+    settle: list[float] = []
+    for _ in range(options.edits // 10):
+        at = document.source.index('\n', rng.randrange(len(document.source) - 1))
+        times.append(timed(document, at, at + 1, ''))
+        times.append(timed(document, at, at, '\n'))
+        # every line after the edit moved, which the tree only catches up with once it is asked for
+        start = perf_counter()
+        document.statements
+        settle.append(perf_counter() - start)
+    summary('join and split lines', times)
+    summary('tree after lines moved', settle)
+
+    # error recovery skips to the next declaration keyword, not to the closing brace, so a broken statement
+    # inside a block takes the rest of the file into that block, and each declaration is taken over one by one
+    times = []
+    for _ in range(options.edits // 20):
+        at = document.source.index('{ var t = ', rng.randrange(len(document.source) // 2)) + 11
+        times.append(timed(document, at, at, ' '))
+        times.append(timed(document, at, at + 1, ''))
+    summary('break a block, mend it', times)
+    if dump(document.statements) != parse(Parser, document.source)[0]:
+        sys.exit('the edited program no longer parses to the same tree as a full parse')
+
+if __name__ == '__main__':
+    main()
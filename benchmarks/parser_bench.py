@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+import sys
+import random
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from error import ErrorReporter, ParseErr, reporting
+from expressions import *
+from token_cls import Token
+from token_type import TokenType
+from fast_scanner import FastScanner
+from token_parser import Parser
+from ast_memory import generate_program
+
+# the recursive descent cascade Parser used before it switched to precedence climbing, kept as the baseline
+class DescentParser(Parser):
+    def expression(self) -> Expr:
+        return self.assignment()
+
+    def assignment(self) -> Expr:
+        expr: Expr = self.or_op()
+        if self.match(TokenType.EQUAL):
+            equals: Token = self.previous()
+            value: Expr = self.assignment()
+            if isinstance(expr, Variable):
+                return Assign(expr.name, value)
+            raise ParseErr(equals, 'Invalid assignment target.')
+        return expr
+
+    def or_op(self) -> Expr:
+        expr: Expr = self.and_op()
+        while self.match(TokenType.OR):
+            operator: Token = self.previous()
+            expr = Logical(expr, operator, self.and_op())
+        return expr
+
+    def and_op(self) -> Expr:
+        expr: Expr = self.equality()
+        while self.match(TokenType.AND):
+            operator: Token = self.previous()
+            expr = Logical(expr, operator, self.equality())
+        return expr
+
+    def equality(self) -> Expr:
+        expr: Expr = self.comparison()
+        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
+            oper: Token = self.previous()
+            expr = Binary(expr, oper, self.factor())
+        return expr
+
+    def comparison(self) -> Expr:
+        expr: Expr = self.term()
+        while self.match(TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL):
+            oper: Token = self.previous()
+            expr = Binary(expr, oper, self.factor())
+        return expr
+
+    def term(self) -> Expr:
+        expr: Expr = self.factor()
+        while self.match(TokenType.PLUS, TokenType.MINUS):
+            oper: Token = self.previous()
+            expr = Binary(expr, oper, self.factor())
+        return expr
+
+    def factor(self) -> Expr:
+        expr: Expr = self.unary()
+        while self.match(TokenType.SLASH, TokenType.STAR, TokenType.MODULO):
+            oper: Token = self.previous()
+            expr = Binary(expr, oper, self.unary())
+        return expr
+
+    def unary(self) -> Expr:
+        if self.match(TokenType.BANG, TokenType.MINUS):
+            oper: Token = self.previous()
+            return Unary(oper, self.unary())
+        return self.call()
+
+    def call(self) -> Expr:
+        expr: Expr = self.primary()
+        while self.match(TokenType.LEFT_PAREN):
+            expr = self.finish_call(expr)
+        return expr
+
+    def primary(self) -> Expr:
+        if self.match(TokenType.FALSE):
+            return Literal(False)
+        if self.match(TokenType.TRUE):
+            return Literal(True)
+        if self.match(TokenType.NIL):
+            return Literal(None)
+        if self.match(TokenType.NUMBER, TokenType.STRING):
+            return Literal(self.previous().literal)
+        if self.match(TokenType.IDENTIFIER):
+            return Variable(self.previous())
+        if self.match(TokenType.LEFT_PAREN):
+            expr: Expr = self.expression()
+            self.consume(TokenType.RIGHT_PAREN, 'Expect \')\' after expression.')
+            return Grouping(expr)
+        raise ParseErr(self.peek(), 'Expect expression.')
+
+pieces: list[str] = ['a', 'b', '1', '2.5', '"s"', 'true', 'nil', '(', ')', '-', '!', '+', '*', '/', '%',
+                     '==', '!=', '<', '>=', 'and', 'or', '=', ';', 'print', 'var', '{', '}', ',']
+
+def random_source(rng: random.Random, length: int) -> str:
+    return ' '.join(rng.choice(pieces) for _ in range(length))
+
+def random_expression(rng: random.Random, depth: int) -> str:
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice(['x', 'y', '3', '"t"', 'true', 'nil'])
+    choice: int = rng.randrange(4)
+    if choice == 0:
+        return f'({random_expression(rng, depth - 1)})'
+    if choice == 3:
+        arguments: list[str] = [random_expression(rng, depth - 1) for _ in range(rng.randrange(3))]
+        return f'{rng.choice(["f", "len", "(g)"])}({", ".join(arguments)})'
+    if choice == 1:
+        return rng.choice(['-', '!']) + random_expression(rng, depth - 1)
+    operator: str = rng.choice(['+', '-', '*', '/', '%', '==', '!=', '<', '<=', '>', '>=', 'and', 'or'])
+    return f'{random_expression(rng, depth - 1)} {operator} {random_expression(rng, depth - 1)}'
+
+def dump(node: object) -> object:
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, Token):
+        return (node.type, node.lexeme, node.line)
+    if not hasattr(type(node), '__slots__') or node is None:
+        return node
+    fields: list = [type(node).__name__]
+    for cls in type(node).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(node, name):
+                fields.append((name, dump(getattr(node, name))))
+    return fields
+
+def parse(parser_cls: type, source: str) -> tuple[object, list[str]]:
+    reporter: ErrorReporter = ErrorReporter(capture=True)
+    with reporting(reporter):
+        stmts: list = parser_cls(FastScanner(source).scan_tokens()).parse()
+    return dump(stmts), reporter.messages
+
+def check(samples: int, seed: int) -> bool:
+    rng: random.Random = random.Random(seed)
+    sources: list[str] = [random_source(rng, rng.randrange(1, 30)) for _ in range(samples)]
+    sources += [f'print {random_expression(rng, 6)};' for _ in range(samples)]
+    sources += [f'x = {grammar_expression(rng, 5)};' for _ in range(samples)]
+    for source in sources:
+        if parse(DescentParser, source) != parse(Parser, source):
+            print(f'MISMATCH on: {source}')
+            return False
+    print(f'ok  {len(sources)} random inputs parse to the same trees and errors')
+    return True
+
+level_operators: list[list[str]] = [['or'], ['and'], ['==', '!='], ['<', '<=', '>', '>='], ['+', '-'], ['*', '/', '%']]
+
+# only produces what the grammar accepts: equality, comparison and term operators take a factor-level right operand
+def grammar_expression(rng: random.Random, depth: int, level: int=0) -> str:
+    if level == len(level_operators):
+        prefix: str = ''.join(rng.choice(['-', '!']) for _ in range(rng.randrange(3) // 2))
+        if depth > 0 and rng.random() < 0.3:
+            return f'{prefix}({grammar_expression(rng, depth - 1)})'
+        return prefix + rng.choice(['x', 'y', '3', '"t"', 'true', 'nil', '12.5'])
+    right_level: int = level + 1 if level < 2 else len(level_operators) - 1 if level < 5 else len(level_operators)
+    expr: str = grammar_expression(rng, depth, level + 1)
+    for _ in range(rng.randrange(3) // 2 if depth > 0 else 0):
+        expr += f' {rng.choice(level_operators[level])} {grammar_expression(rng, depth - 1, right_level)}'
+    return expr
+
+def expression_heavy(statements: int, seed: int=1) -> str:
+    rng: random.Random = random.Random(seed)
+    return '\n'.join(f'var e{i % 100} = {grammar_expression(rng, 6)};' for i in range(statements)) + '\n'
+
+def nested(depth: int) -> str:
+    return 'print ' + '(' * depth + '1' + ')' * depth + ';\n'
+
+def rate(parser_cls: type, tokens: list, repeat: int) -> float:
+    best: float = float('inf')
+    reporter: ErrorReporter = ErrorReporter(capture=True)
+    with reporting(reporter):
+        for _ in range(repeat):
+            start: float = perf_counter()
+            parser_cls(tokens).parse()
+            best = min(best, perf_counter() - start)
+    if reporter.had_err:
+        sys.exit(f'benchmark input does not parse: {reporter.messages[0]}')
+    return best
+
+def deepest(parser_cls: type) -> int:
+    depth: int = 8
+    while depth < 1 << 16:
+        try:
+            parser_cls(FastScanner(nested(depth * 2)).scan_tokens()).parse()
+        except RecursionError:
+            return depth
+        depth *= 2
+    return depth
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Check the precedence-climbing Parser against the old descent cascade and time both.')
+    arg_parser.add_argument('--statements', type=int, default=20_000)
+    arg_parser.add_argument('--samples', type=int, default=3_000, help='random inputs compared between the parsers')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    options: Namespace = arg_parser.parse_args()
+
+    if not check(options.samples, seed=7):
+        sys.exit(1)
+    inputs: dict[str, str] = {
+        'expression-heavy': expression_heavy(options.statements),
+        'mixed program': generate_program(options.statements)
+    }
+    print(f'\n{"input":<18} {"tokens":>9} {"descent s":>10} {"pratt s":>9} {"speedup":>8}')
+    for name, source in inputs.items():
+        tokens: list = FastScanner(source).scan_tokens()
+        old: float = rate(DescentParser, tokens, options.repeat)
+        new: float = rate(Parser, tokens, options.repeat)
+        print(f'{name:<18} {len(tokens):>9,} {old:>10.3f} {new:>9.3f} {old / new:>7.2f}x')
+    print(f'\nnesting depth reached before RecursionError: descent {deepest(DescentParser)}, pratt {deepest(Parser)} '
+          f'(recursion limit {sys.getrecursionlimit()})')
+
+if __name__ == '__main__':
+    main()
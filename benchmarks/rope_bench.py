@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import rope
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from output import Output, CaptureSink, writing
+
+# builds a report the way the fizzbuzz-style scripts do, one short piece at a time
+script: str = '''var report = "";
+var i = 1;
+while (i <= {n}) {{
+    var phrase = "";
+    if (i % 3 == 0) {{ phrase = phrase + "fizz"; }}
+    if (i % 5 == 0) {{ phrase = phrase + "buzz"; }}
+    if (phrase == "") {{ report = report + "line"; }} else {{ report = report + phrase; }}
+    report = report + "\\n";
+    i = i + 1;
+}}
+print report;
+'''
+
+def build_report(n: int, jit_threshold: int) -> tuple[float, int]:
+    stmts: list = Parser(FastScanner(script.format(n=n)).scan_tokens()).parse()
+    Resolver().resolve(stmts)
+    interpreter: Interpreter = Interpreter()
+    interpreter.jit_threshold = jit_threshold
+    capture: CaptureSink = CaptureSink()
+    with writing(Output(capture)):
+        start: float = perf_counter()
+        interpreter.interpret(stmts)
+        elapsed: float = perf_counter() - start
+    return elapsed, len(capture.getvalue())
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Show how string building scales with and without ropes.')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[25_000, 50_000, 100_000, 200_000],
+                            help='loop iterations, each appending one or two short pieces')
+    arg_parser.add_argument('--jit-threshold', type=int, default=0, help='0 keeps every iteration in the tree walker')
+    options: Namespace = arg_parser.parse_args()
+
+    threshold: int = rope.rope_threshold
+    print(f'{"iterations":>10} {"report KB":>10} {"plain str s":>12} {"ropes s":>10} {"ropes us/iter":>14}')
+    for n in options.sizes:
+        rope.rope_threshold = sys.maxsize
+        plain, size = build_report(n, options.jit_threshold)
+        rope.rope_threshold = threshold
+        roped, roped_size = build_report(n, options.jit_threshold)
+        if roped_size != size:
+            sys.exit(f'output differs at {n} iterations: {size} vs {roped_size} characters')
+        print(f'{n:>10} {size / 1024:>10.0f} {plain:>12.2f} {roped:>10.2f} {roped / n * 1e6:>14.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from runtime import LoxRuntime, Program, Session
+
+script: str = 'var total = 0; {{ var i = 0; while (i < {n}) {{ total = total + i * 2; i = i + 1; }} }} var ok = total > 0;'
+
+def fresh(source: str) -> None:
+    statements: list = Parser(FastScanner(source).scan_tokens()).parse()
+    Resolver().resolve(statements)
+    Interpreter().interpret(statements)
+
+def rate(label: str, count: int, run) -> None:
+    start: float = perf_counter()
+    for i in range(count):
+        run(i)
+    elapsed: float = perf_counter() - start
+    print(f'{label:<36} {count / elapsed:>10,.0f} scripts/s')
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Measure small-script throughput through LoxRuntime.')
+    arg_parser.add_argument('--count', type=int, default=20_000)
+    arg_parser.add_argument('--distinct', type=int, default=50, help='number of different scripts cycled through')
+    options: Namespace = arg_parser.parse_args()
+
+    # a session leaves globals used inside functions to later lines, and reports the ones never defined at the end
+    session: Session = LoxRuntime(capture=True).session()
+    session.execute('fun f() { return later + missing; }')
+    session.execute('var later = 1;')
+    if session.finish() or session.runtime.messages != ['[line 1] Error at missing: Undefined variable \'missing\'.']:
+        sys.exit(f'session reported {session.runtime.messages} at the end')
+
+    sources: list[str] = [script.format(n=n % 5 + 1) + f' // {n}' for n in range(options.distinct)]
+    runtime: LoxRuntime = LoxRuntime(capture=True)
+    programs: list[Program] = [runtime.compile(source) for source in sources]
+    uncached: LoxRuntime = LoxRuntime(capture=True, cache_size=0)
+
+    rate('fresh scanner/parser/interpreter', options.count, lambda i: fresh(sources[i % len(sources)]))
+    rate('LoxRuntime.execute (no cache)', options.count, lambda i: uncached.execute(sources[i % len(sources)]))
+    rate('LoxRuntime.execute (cached)', options.count, lambda i: runtime.execute(sources[i % len(sources)]))
+    rate('LoxRuntime.run (compiled programs)', options.count, lambda i: runtime.run(programs[i % len(programs)]))
+
+if __name__ == '__main__':
+    main()
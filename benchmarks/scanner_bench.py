@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import sys
+import random
+from io import StringIO
+from pathlib import Path
+from typing import Callable
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from error import ErrorReporter, reporting
+from scanner import Scanner
+from fast_scanner import FastScanner
+from token_buffer import TokenBuffer
+
+snippets: list[str] = [
+    'var a{n} = {n}.5 * (b - {n}) / 3 % 2;\n',
+    'print "line {n}" + "\\nnot an escape";\n',
+    '// comment {n} with symbols !=<>= "quotes"\n',
+    '/* block\n * comment {n}\n */\n',
+    'while (i{n} <= 100 and !done or x >= 2) {{ i{n} = i{n} + 1; }}\n',
+    'if (a != b) print a; else {{ print nil == false; }}\n',
+    '"multi\nline\nstring {n}";\n',
+    'var café{n} = naïve * 2;\n',
+    '\t\r  fun class super this return for {n}.{n}.{n}\n'
+]
+
+error_snippets: list[str] = [
+    'x_{n} = @{n};\n',
+    '# {n} ~ $\n'
+]
+
+def generate(size: int, seed: int=1, with_errors: bool=False) -> str:
+    rng: random.Random = random.Random(seed)
+    choices: list[str] = snippets + error_snippets if with_errors else snippets
+    parts: list[str] = []
+    length: int = 0
+    n: int = 0
+    while length < size:
+        part: str = rng.choice(choices).format(n=n)
+        parts.append(part)
+        length += len(part)
+        n += 1
+    return ''.join(parts)
+
+def buffer_tokens(source: str) -> list:
+    buffer: TokenBuffer = TokenBuffer.from_source(source)
+    return [buffer[i] for i in range(len(buffer))]
+
+# the scanners that have to produce what Scanner does
+scanners: dict[str, Callable[[str], list]] = {
+    'FastScanner': lambda source: FastScanner(source).scan_tokens(),
+    'TokenBuffer': buffer_tokens
+}
+
+def scan(build: Callable[[str], list], source: str) -> tuple[list[tuple], str]:
+    captured: StringIO = StringIO()
+    with reporting(ErrorReporter(captured)):
+        tokens: list = build(source)
+    return [(t.type, t.lexeme, t.literal, t.line) for t in tokens], captured.getvalue()
+
+def check(corpus: dict[str, str]) -> bool:
+    ok: bool = True
+    for name, source in corpus.items():
+        expected = scan(lambda text: Scanner(text).scan_tokens(), source)
+        matched: bool = True
+        for scanner_name, build in scanners.items():
+            actual = scan(build, source)
+            if expected != actual:
+                matched = ok = False
+                for i, (want, got) in enumerate(zip(expected[0], actual[0])):
+                    if want != got:
+                        print(f'MISMATCH {name} token {i}: Scanner={want} {scanner_name}={got}')
+                        break
+                else:
+                    print(f'MISMATCH {name}: {scanner_name} token counts or error reports differ')
+        if matched:
+            print(f'ok  {name}: {len(expected[0])} tokens')
+    return ok
+
+def throughput(scanner_cls: type, source: str, repeat: int) -> float:
+    best: float = float('inf')
+    count: int = 0
+    with reporting(ErrorReporter(capture=True)):
+        for _ in range(repeat):
+            start: float = perf_counter()
+            count = len(scanner_cls(source).scan_tokens())
+            best = min(best, perf_counter() - start)
+    return count / best
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Check FastScanner and TokenBuffer against Scanner and measure tokens/s.')
+    arg_parser.add_argument('--size', type=int, default=2_000_000, help='generated source size in characters')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    options: Namespace = arg_parser.parse_args()
+
+    examples: Path = Path(__file__).resolve().parent.parent / 'examples'
+    corpus: dict[str, str] = {path.name: path.read_text() for path in sorted(examples.glob('*.lox'))}
+    corpus['generated-small'] = generate(20_000, seed=2, with_errors=True)
+    corpus['unterminated-string'] = generate(2_000, seed=3) + '"never closed\n\n'
+    corpus['unterminated-comment'] = generate(2_000, seed=4) + '/* never closed\n'
+    corpus['non-ascii'] = 'var ñame = 1;\nvar größe2 = ñame + 1;\nprint größe2 €and ñ€ü;\nvar café = "naïve";\n'
+    if not check(corpus):
+        sys.exit(1)
+
+    source: str = generate(options.size)
+    print(f'\nthroughput on {len(source) / 1e6:.1f} MB of generated source')
+    for scanner_cls in (Scanner, FastScanner):
+        rate: float = throughput(scanner_cls, source, options.repeat)
+        print(f'{scanner_cls.__name__:<12} {rate:>12,.0f} tokens/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import sys
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from output import Output, CaptureSink, writing
+from suite import workloads
+
+loop_workloads: list[str] = ['numeric-loop', 'deep-blocks', 'fizzbuzz', 'string-concat', 'mixed']
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Count block entries against environments allocated on loop-heavy workloads.')
+    arg_parser.add_argument('--scale', type=float, default=1.0)
+    options: Namespace = arg_parser.parse_args()
+
+    # every block entry used to allocate an environment, so entries are the allocations before elision and reuse
+    print(f'{"workload":<16} {"block entries":>14} {"environments":>13} {"avoided":>8} {"seconds":>8}')
+    for name in loop_workloads:
+        stmts: list = Parser(FastScanner(workloads[name].generate(options.scale)).scan_tokens()).parse()
+        Resolver().resolve(stmts)
+        interpreter: Interpreter = Interpreter()
+        interpreter.jit_threshold = 0
+        with writing(Output(CaptureSink())):
+            start: float = perf_counter()
+            interpreter.interpret(stmts)
+            elapsed: float = perf_counter() - start
+        entries: int = interpreter.block_entries
+        avoided: float = (entries - interpreter.environments) / entries * 100 if entries else 0.0
+        print(f'{name:<16} {entries:>14,} {interpreter.environments:>13,} {avoided:>7.1f}% {elapsed:>8.2f}')
+
+if __name__ == '__main__':
+    main()
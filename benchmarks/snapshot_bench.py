@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from output import Output, CaptureSink, writing
+from snapshot import save_snapshot, load_snapshot
+
+# a setup that fills tables of globals with scalar loops, and functions that close over them
+setup: str = '''var size = {n};
+var sieve = array(size, 1);
+set(sieve, 0, 0);
+set(sieve, 1, 0);
+var i = 2;
+while (i * i < size) {{
+    if (get(sieve, i) == 1) {{
+        var j = i * i;
+        while (j < size) {{
+            set(sieve, j, 0);
+            j = j + i;
+        }}
+    }}
+    i = i + 1;
+}}
+var squares = array(size, 0);
+i = 0;
+while (i < size) {{
+    set(squares, i, i * i % 1000);
+    i = i + 1;
+}}
+var names = "";
+i = 0;
+while (i < size / 100) {{
+    names = names + "n,";
+    i = i + 1;
+}}
+fun lookup(table) {{
+    fun at(k) {{
+        return get(table, k % size);
+    }}
+    return at;
+}}
+var square = lookup(squares);
+var primes = sum(sieve);
+'''
+
+work: str = '''print primes;
+print square(12345);
+print len(names);
+print sum(squares) / size;
+'''
+
+def compile_source(source: str, known_globals: set[str]=None) -> list:
+    stmts: list = Parser(FastScanner(source).scan_tokens()).parse()
+    Resolver(known_globals).resolve(stmts)
+    return stmts
+
+def run(interpreter: Interpreter, stmts: list) -> str:
+    capture: CaptureSink = CaptureSink()
+    with writing(Output(capture)):
+        interpreter.interpret(stmts)
+    return capture.getvalue()
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Compare restoring globals from a snapshot with running their setup again.')
+    arg_parser.add_argument('--size', type=int, default=200_000, help='entries per table')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    options: Namespace = arg_parser.parse_args()
+
+    source: str = setup.format(n=options.size)
+    best_setup: float = float('inf')
+    for _ in range(options.repeat):
+        interpreter: Interpreter = Interpreter()
+        start: float = perf_counter()
+        run(interpreter, compile_source(source))
+        best_setup = min(best_setup, perf_counter() - start)
+    expected: str = run(interpreter, compile_source(work, set(interpreter.globals.values)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, 'setup.snap')
+        start = perf_counter()
+        size: int = save_snapshot(interpreter, path)
+        saving: float = perf_counter() - start
+        best_load: float = float('inf')
+        for _ in range(options.repeat):
+            restored: Interpreter = Interpreter()
+            start = perf_counter()
+            names: list[str] = load_snapshot(restored, path)
+            best_load = min(best_load, perf_counter() - start)
+        output: str = run(restored, compile_source(work, set(names)))
+    if not expected or output != expected:
+        sys.exit(f'restored globals printed {output!r}, the setup {expected!r}')
+
+    print(f'setup with {options.size:,} entries per table: {best_setup * 1e3:.1f} ms')
+    print(f'snapshot: {size / 1024:,.0f} KiB, written in {saving * 1e3:.1f} ms')
+    print(f'restore: {best_load * 1e3:.2f} ms, {best_setup / best_load:.0f}x faster than running the setup')
+
+if __name__ == '__main__':
+    main()
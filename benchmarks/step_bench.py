@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import sys
+import asyncio
+from pathlib import Path
+from time import perf_counter
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter, default_jit_threshold
+from output import Output, CaptureSink, writing
+from host import AsyncHost
+
+workloads: dict[str, str] = {
+    'tight loop': '''var i = 0;
+var total = 0;
+while (i < {n}) {{
+    total = total + i;
+    i = i + 1;
+}}
+print total;
+''',
+    'nested loops': '''var i = 0;
+var total = 0;
+while (i < {n} / 100) {{
+    var j = 0;
+    while (j < 100) {{
+        total = total + j;
+        j = j + 1;
+    }}
+    i = i + 1;
+}}
+print total;
+''',
+    'calls': '''fun add(a, b) {{
+    return a + b;
+}}
+var i = 0;
+var total = 0;
+while (i < {n} / 10) {{
+    total = add(total, i);
+    i = i + 1;
+}}
+print total;
+'''
+}
+
+def run(source: str, jit_threshold: int, slice_steps: int) -> tuple[float, str]:
+    stmts: list = Parser(FastScanner(source).scan_tokens()).parse()
+    Resolver().resolve(stmts)
+    interpreter: Interpreter = Interpreter()
+    interpreter.jit_threshold = jit_threshold
+    if slice_steps:
+        # a hook that always hands out another slice, so only the cost of counting is measured
+        interpreter.step_hook = lambda: slice_steps
+        interpreter.steps = slice_steps
+    capture: CaptureSink = CaptureSink()
+    with writing(Output(capture)):
+        start: float = perf_counter()
+        interpreter.interpret(stmts)
+        elapsed: float = perf_counter() - start
+    return elapsed, capture.getvalue()
+
+async def latency(programs: int, size: int, slice_steps: int) -> tuple[float, float]:
+    host: AsyncHost = AsyncHost(slice_steps=slice_steps)
+    source: str = workloads['tight loop'].format(n=size)
+    delays: list[float] = []
+    done: asyncio.Event = asyncio.Event()
+
+    async def probe() -> None:
+        while not done.is_set():
+            start: float = perf_counter()
+            await asyncio.sleep(0.001)
+            delays.append(perf_counter() - start - 0.001)
+
+    probing: asyncio.Task = asyncio.create_task(probe())
+    start: float = perf_counter()
+    await host.run_all([source] * programs)
+    elapsed: float = perf_counter() - start
+    done.set()
+    await probing
+    return elapsed, max(delays)
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Measure what step budgets cost on tight loops, and how the async host shares one loop.')
+    arg_parser.add_argument('--size', type=int, default=300_000, help='loop iterations per workload')
+    arg_parser.add_argument('--slice', type=int, default=10_000, help='steps per slice')
+    arg_parser.add_argument('--repeat', type=int, default=7)
+    arg_parser.add_argument('--programs', type=int, default=8, help='programs the host runs at once')
+    options: Namespace = arg_parser.parse_args()
+
+    print(f'{"workload":<14} {"jit":>4} {"plain s":>9} {"stepped s":>10} {"overhead":>9}')
+    for name, template in workloads.items():
+        source: str = template.format(n=options.size)
+        for jit_threshold in (0, default_jit_threshold):
+            # alternated so that both see the same machine load, best of each
+            plain: float = float('inf')
+            stepped: float = float('inf')
+            for _ in range(options.repeat):
+                elapsed, expected = run(source, jit_threshold, 0)
+                plain = min(plain, elapsed)
+                elapsed, output = run(source, jit_threshold, options.slice)
+                stepped = min(stepped, elapsed)
+                if output != expected:
+                    sys.exit(f'{name}: stepped run printed {output.strip()!r}, the plain run {expected.strip()!r}')
+            jit: str = 'on' if jit_threshold else 'off'
+            print(f'{name:<14} {jit:>4} {plain:>9.3f} {stepped:>10.3f} {(stepped / plain - 1) * 100:>8.1f}%')
+
+    elapsed, worst = asyncio.run(latency(options.programs, options.size, options.slice))
+    print(f'\n{options.programs} tight loops on one host: {elapsed:.3f} s, '
+          f'longest the event loop waited past a 1 ms sleep: {worst * 1e3:.1f} ms')
+
+if __name__ == '__main__':
+    main()
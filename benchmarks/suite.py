@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+
+import sys
+import gc
+import json
+import platform
+from pathlib import Path
+from time import perf_counter, strftime
+from typing import Callable
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from error import ErrorReporter, reporting
+from scanner import Scanner
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter, default_jit_threshold
+from compiler import Compiler
+from vm import VM
+from closure_compiler import ClosureCompiler
+from transpiler import Transpiler, code_cache
+from output import Output, CaptureSink, active_output, writing
+from optimizer import count_nodes
+from version import version
+from scanner_bench import generate
+from ast_memory import generate_program
+
+# workloads
+
+def numeric_loop(scale: float) -> str:
+    return (f'var i = 0; var total = 0;\n'
+            f'while (i < {int(200_000 * scale)}) {{ total = total + i * 2 % 7 - 1; i = i + 1; }}\n'
+            'print total;\n')
+
+def string_concat(scale: float) -> str:
+    return (f'var s = ""; var i = 0;\n'
+            f'while (i < {int(20_000 * scale)}) {{ s = s + "ab"; i = i + 1; }}\n'
+            'print s == "";\n')
+
+def nested_expressions(scale: float) -> str:
+    lines: list[str] = []
+    for n in range(int(2_000 * scale)):
+        expr: str = str(n % 10)
+        for depth in range(40):
+            expr = f'({expr} + {depth % 7}) * 1' if depth % 2 else f'-({expr} - {depth})'
+        lines.append(f'var e{n % 50} = {expr} == {n};')
+    return '\n'.join(lines) + '\n'
+
+def deep_blocks(scale: float) -> str:
+    depth: int = 24
+    opening: str = ''.join(f'{{ var b{level} = {level}; ' for level in range(depth))
+    body: str = ' + '.join(f'b{level}' for level in range(0, depth, 3))
+    return (f'var total = 0; var i = 0;\n'
+            f'while (i < {int(20_000 * scale)}) {{ {opening}total = total + {body}; {"}" * depth} i = i + 1; }}\n'
+            'print total;\n')
+
+def fizzbuzz(scale: float) -> str:
+    return (f'var i = 1;\n'
+            f'while (i <= {int(100_000 * scale)}) {{\n'
+            '    var phrase = "";\n'
+            '    if (i % 3 == 0) { phrase = phrase + "fizz"; }\n'
+            '    if (i % 5 == 0) { phrase = phrase + "buzz"; }\n'
+            '    if (phrase != "") { print phrase; } else { print i; }\n'
+            '    i = i + 1;\n'
+            '}\n')
+
+def non_finite(scale: float) -> str:
+    # literals too large for a double scan as inf, and backends that generate code have to spell them out
+    big: str = '9' * 400
+    # enough iterations at any scale for tree-jit to compile the loop with the literal in it
+    iterations: int = max(int(20_000 * scale), 2 * default_jit_threshold)
+    return (f'var i = 0; var hits = 0; var big = {big};\n'
+            f'while (i < {iterations}) {{ if (i < {big}) hits = hits + 1; i = i + 1; }}\n'
+            f'print hits; print {big}; print -{big}; print big - big;\n')
+
+def mixed(scale: float) -> str:
+    return generate_program(int(20_000 * scale))
+
+def scan_only(scale: float) -> str:
+    return generate(int(2_000_000 * scale))
+
+class Workload:
+    def __init__(self, name: str, generate: Callable[[float], str], executable: bool=True) -> None:
+        self.name: str = name
+        self.generate: Callable[[float], str] = generate
+        # generated scanner input is not a valid program, so it only goes through the scan phase
+        self.executable: bool = executable
+
+workloads: dict[str, Workload] = {workload.name: workload for workload in [
+    Workload('scan-large', scan_only, executable=False),
+    Workload('nested-expressions', nested_expressions),
+    Workload('numeric-loop', numeric_loop),
+    Workload('string-concat', string_concat),
+    Workload('deep-blocks', deep_blocks),
+    Workload('fizzbuzz', fizzbuzz),
+    Workload('non-finite', non_finite),
+    Workload('mixed', mixed)
+]}
+
+# backends
+
+class Backend:
+    def __init__(self, name: str, prepare: Callable[[list], object], execute: Callable[[object], None]) -> None:
+        self.name: str = name
+        self.prepare: Callable[[list], object] = prepare
+        self.execute: Callable[[object], None] = execute
+
+backends: dict[str, Backend] = {}
+
+# a backend splits into a compile step over resolved statements and an execute step over its result
+def register_backend(name: str, prepare: Callable[[list], object], execute: Callable[[object], None]) -> None:
+    backends[name] = Backend(name, prepare, execute)
+
+def tree_interpreter(jit_threshold: int) -> Callable[[list], None]:
+    def execute(stmts: list) -> None:
+        interpreter: Interpreter = Interpreter()
+        interpreter.jit_threshold = jit_threshold
+        interpreter.interpret(stmts)
+    return execute
+
+def transpile(stmts: list) -> Callable[[], None]:
+    # the transpiler memoizes code objects by source, which would hide the compile cost on repeats
+    code_cache.clear()
+    transpiler: Transpiler = Transpiler()
+    source: str = transpiler.transpile(stmts)
+    namespace: dict[str, object] = transpiler.namespace()
+    exec(transpiler.compile(source), namespace)
+    return namespace['__lox_main__']
+
+register_backend('tree', lambda stmts: stmts, tree_interpreter(0))
+register_backend('tree-jit', lambda stmts: stmts, tree_interpreter(Interpreter().jit_threshold))
+register_backend('vm', lambda stmts: Compiler().compile(stmts), lambda chunk: VM().interpret(chunk))
+register_backend('closure', lambda stmts: ClosureCompiler().compile(stmts), lambda program: program())
+register_backend('transpile', transpile, lambda program: program())
+
+# harness
+
+def timed(run: Callable[[], object], repeat: int) -> tuple[float, object]:
+    best: float = float('inf')
+    result: object = None
+    for _ in range(repeat):
+        gc.collect()
+        start: float = perf_counter()
+        result = run()
+        best = min(best, perf_counter() - start)
+    return best, result
+
+def check(reporter: ErrorReporter, workload: str, phase: str) -> None:
+    if reporter.had_err:
+        sys.exit(f'{workload}: {phase} reported errors: {reporter.messages[:3]}')
+
+def run_workload(workload: Workload, scale: float, names: list[str], repeat: int) -> dict[str, object]:
+    source: str = workload.generate(scale)
+    reporter: ErrorReporter = ErrorReporter(capture=True)
+    result: dict[str, object] = {'chars': len(source), 'phases': {}, 'backends': {}}
+    phases: dict[str, float] = result['phases']
+    capture: CaptureSink = CaptureSink()
+    output: Output = Output(capture)
+    expected: str = None
+    with reporting(reporter), writing(output):
+        phases['scan'], tokens = timed(lambda: FastScanner(source).scan_tokens(), repeat)
+        phases['scan-reference'], _ = timed(lambda: Scanner(source).scan_tokens(), repeat)
+        result['tokens'] = len(tokens)
+        check(reporter, workload.name, 'scan')
+        if not workload.executable:
+            return result
+        phases['parse'], stmts = timed(lambda: Parser(tokens).parse(), repeat)
+        result['nodes'] = count_nodes(stmts)
+        check(reporter, workload.name, 'parse')
+        # the resolver annotates nodes in place, so each repeat resolves a fresh parse
+        parses: list[list] = [Parser(tokens).parse() for _ in range(repeat)]
+        phases['resolve'], _ = timed(lambda: Resolver().resolve(parses.pop()), repeat)
+        Resolver().resolve(stmts)
+        check(reporter, workload.name, 'resolve')
+        for name in names:
+            backend: Backend = backends[name]
+            compile_time, program = timed(lambda: backend.prepare(stmts), 1)
+            # interpreters that cache per-node state are given a fresh tree for every run
+            execute_time: float = float('inf')
+            for _ in range(repeat):
+                fresh: list = Parser(tokens).parse()
+                Resolver().resolve(fresh)
+                program = backend.prepare(fresh)
+                capture.clear()
+                elapsed, _ = timed(lambda: backend.execute(program), 1)
+                execute_time = min(execute_time, elapsed)
+                output.flush()
+            check(reporter, workload.name, name)
+            # every backend has to print what the first one did
+            printed: str = capture.getvalue()
+            if expected is None:
+                expected = printed
+            elif printed != expected:
+                sys.exit(f'{workload.name}: {name} printed {printed[:200]!r}, {names[0]} {expected[:200]!r}')
+            result['backends'][name] = {'compile': compile_time, 'execute': execute_time}
+    return result
+
+def run_suite(options: Namespace) -> None:
+    names: list[str] = options.workloads or list(workloads)
+    chosen: list[str] = options.backends or list(backends)
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+    results: dict[str, object] = {
+        'meta': {
+            'lox_version': version,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'date': strftime('%Y-%m-%dT%H:%M:%S'),
+            'scale': options.scale,
+            'repeat': options.repeat
+        },
+        'workloads': {}
+    }
+    for name in names:
+        print(f'{name} ...', file=sys.stderr, flush=True)
+        results['workloads'][name] = run_workload(workloads[name], options.scale, chosen, options.repeat)
+    print(format_results(results))
+    if options.output is not None:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+def format_results(results: dict[str, object]) -> str:
+    rows: list[str] = [f'{"workload":<20} {"phase":<24} {"seconds":>10}']
+    for name, timings in flatten(results).items():
+        workload, phase = name.split('/', 1)
+        rows.append(f'{workload:<20} {phase:<24} {timings:>10.4f}')
+    return '\n'.join(rows)
+
+def flatten(results: dict[str, object]) -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for workload, result in results['workloads'].items():
+        for phase, seconds in result['phases'].items():
+            flat[f'{workload}/{phase}'] = seconds
+        for backend, timings in result['backends'].items():
+            for phase, seconds in timings.items():
+                flat[f'{workload}/{backend}.{phase}'] = seconds
+    return flat
+
+def compare(options: Namespace) -> None:
+    with open(options.baseline) as f:
+        old: dict[str, object] = json.load(f)
+    with open(options.current) as f:
+        new: dict[str, object] = json.load(f)
+    if old['meta']['scale'] != new['meta']['scale']:
+        print(f'warning: comparing runs at scale {old["meta"]["scale"]} and {new["meta"]["scale"]}', file=sys.stderr)
+    baseline: dict[str, float] = flatten(old)
+    current: dict[str, float] = flatten(new)
+    regressions: int = 0
+    rows: list[str] = [f'{"measurement":<44} {"baseline":>10} {"current":>10} {"change":>8}']
+    for name in baseline.keys() & current.keys():
+        before: float = baseline[name]
+        after: float = current[name]
+        # sub-millisecond phases are all noise on a shared machine
+        if max(before, after) < options.min_time:
+            continue
+        change: float = after / before - 1 if before > 0 else 0.0
+        flag: str = ''
+        if change > options.threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        elif change < -options.threshold:
+            flag = '  faster'
+        rows.append(f'{name:<44} {before:>10.4f} {after:>10.4f} {change * 100:>+7.1f}%{flag}')
+    rows[1:] = sorted(rows[1:])
+    print('\n'.join(rows))
+    unmatched: int = len(baseline.keys() ^ current.keys())
+    if unmatched:
+        print(f'\n{unmatched} measurement(s) present in only one of the runs')
+    print(f'\n{regressions} regression(s) above {options.threshold * 100:.0f}%')
+    if regressions:
+        sys.exit(1)
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Time scan, parse, resolve and execution phases of the Lox workloads.')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    run_parser: ArgumentParser = commands.add_parser('run', help='run the suite and optionally save the timings as JSON')
+    run_parser.add_argument('-w', '--workload', dest='workloads', action='append', choices=list(workloads),
+                            help='workload to run, repeatable (default: all)')
+    run_parser.add_argument('-b', '--backend', dest='backends', action='append', choices=list(backends),
+                            help='backend to execute with, repeatable (default: all)')
+    run_parser.add_argument('--scale', type=float, default=1.0, help='multiplies the size of every workload')
+    run_parser.add_argument('--repeat', type=int, default=3, help='best of this many runs is reported')
+    run_parser.add_argument('-o', '--output', help='write the results to this JSON file')
+
+    compare_parser: ArgumentParser = commands.add_parser('compare', help='compare two result files and flag regressions')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='relative slowdown that counts as a regression')
+    compare_parser.add_argument('--min-time', type=float, default=0.001, help='ignore measurements shorter than this in both runs')
+
+    commands.add_parser('list', help='list the workloads and backends')
+
+    options: Namespace = arg_parser.parse_args()
+    if options.command == 'run':
+        run_suite(options)
+    elif options.command == 'compare':
+        compare(options)
+    else:
+        print('workloads: ' + ', '.join(workloads))
+        print('backends:  ' + ', '.join(backends))
+
+if __name__ == '__main__':
+    main()
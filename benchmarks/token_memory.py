@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import sys
+import tracemalloc
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from argparse import ArgumentParser, Namespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from fast_scanner import FastScanner
+from token_buffer import TokenBuffer
+from scanner_bench import generate
+
+def measure(build) -> tuple[int, int]:
+    tracemalloc.start()
+    result = build()
+    size: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(result)
+
+def main() -> None:
+    arg_parser: ArgumentParser = ArgumentParser(description='Compare per-token memory of Token lists and TokenBuffer.')
+    arg_parser.add_argument('--size', type=int, default=4_000_000, help='generated source size in characters')
+    options: Namespace = arg_parser.parse_args()
+
+    source: str = generate(options.size).encode('ascii', 'ignore').decode('ascii')
+    with TemporaryDirectory() as tmp:
+        path: Path = Path(tmp) / 'generated.lox'
+        path.write_text(source)
+        rows: list[tuple[str, int, int]] = [
+            ('list[Token] (FastScanner)', *measure(lambda: FastScanner(path.read_text()).scan_tokens())),
+            ('TokenBuffer.from_source', *measure(lambda: TokenBuffer.from_source(path.read_text()))),
+            ('TokenBuffer.from_file (mmap)', *measure(lambda: TokenBuffer.from_file(str(path))))
+        ]
+    print(f'{len(source) / 1e6:.1f} MB of generated source')
+    for name, size, count in rows:
+        print(f'{name:<30} {size / 1e6:8.1f} MB {size / count:8.1f} bytes/token')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+from time import perf_counter
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from runtime import LoxRuntime, Program
+from output import Output, CaptureSink, writing
+from cache import ProgramCache
+
+class ScriptResult:
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.status: int = 0
+        self.stdout: str = ''
+        self.stderr: str = ''
+        self.compile_time: float = 0.0
+        self.run_time: float = 0.0
+        self.cached: bool = False
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            'path': self.path,
+            'status': self.status,
+            'compile_seconds': round(self.compile_time, 6),
+            'run_seconds': round(self.run_time, 6),
+            'cached': self.cached,
+            'stdout': self.stdout,
+            'stderr': self.stderr
+        }
+
+# one runtime per worker process, created once and reused for every script the worker is handed
+worker_runtime: LoxRuntime = None
+worker_use_cache: bool = True
+
+def init_worker(optimize: bool, use_cache: bool, jit_threshold: int) -> None:
+    global worker_runtime, worker_use_cache
+    worker_runtime = LoxRuntime(capture=True, optimize=optimize, pool_size=1, cache_size=0,
+                                output=Output(CaptureSink(), 'exit'), jit_threshold=jit_threshold)
+    worker_use_cache = use_cache
+
+def run_job(path: str) -> ScriptResult:
+    runtime: LoxRuntime = worker_runtime
+    result: ScriptResult = ScriptResult(path)
+    sink: CaptureSink = runtime.output.sink
+    sink.clear()
+    start: float = perf_counter()
+    try:
+        with open(path, 'r') as f:
+            source: str = f.read()
+        program: Program = None
+        cache: ProgramCache = None
+        if worker_use_cache and os.path.isfile(path):
+            cache = ProgramCache(path, runtime.optimize)
+            statements: list = cache.load()
+            if statements is not None:
+                program = Program(statements, source, runtime.optimize)
+                result.cached = True
+        if program is None:
+            program = runtime.compile(source)
+            if program is not None and cache is not None:
+                cache.store(program.statements)
+        result.compile_time = perf_counter() - start
+        if program is not None:
+            start = perf_counter()
+            runtime.run(program)
+            result.run_time = perf_counter() - start
+        result.status = 1 if runtime.had_err else 0
+        result.stderr = ''.join(message + '\n' for message in runtime.messages)
+    except OSError as err:
+        result.status = 2
+        result.stderr = f'can\'t read {path}: {err.strerror}\n'
+    except Exception as err:
+        # one broken script must not take the worker, and with it the rest of the batch, down
+        result.status = 2
+        result.stderr = f'internal error: {type(err).__name__}: {err}\n'
+    runtime.output.flush()
+    result.stdout = sink.getvalue()
+    return result
+
+def read_manifest(path: str) -> list[str]:
+    base: str = os.path.dirname(os.path.abspath(path))
+    scripts: list[str] = []
+    with open(path, 'r') as f:
+        for line in f:
+            entry: str = line.strip()
+            if entry and not entry.startswith('#'):
+                scripts.append(os.path.join(base, entry))
+    return scripts
+
+def run_batch(paths: list[str], options: Namespace) -> int:
+    jobs: int = options.jobs or os.cpu_count() or 1
+    start: float = perf_counter()
+    settings: tuple = (options.optimize, not options.no_cache, options.jit_threshold)
+    if jobs == 1:
+        init_worker(*settings)
+        results: list[ScriptResult] = [run_job(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=settings) as pool:
+            results = list(pool.map(run_job, paths, chunksize=max(1, len(paths) // (jobs * 8))))
+    elapsed: float = perf_counter() - start
+    # replayed in the order the scripts were given, not the order they finished in
+    for result in results:
+        sys.stdout.write(result.stdout)
+        sys.stdout.flush()
+        sys.stderr.write(result.stderr)
+    failed: int = sum(1 for result in results if result.status != 0)
+    summary: dict[str, object] = {
+        'scripts': len(results),
+        'failed': failed,
+        'jobs': jobs,
+        'wall_seconds': round(elapsed, 6),
+        'script_seconds': round(sum(result.compile_time + result.run_time for result in results), 6),
+        'results': [result.as_dict() for result in results]
+    }
+    if options.summary is not None:
+        with open(options.summary, 'w') as f:
+            json.dump(summary, f, indent=2)
+            f.write('\n')
+    print(f'batch: {len(results)} scripts, {failed} failed, {elapsed:.2f} s on {jobs} worker(s)', file=sys.stderr)
+    return 1 if failed else 0
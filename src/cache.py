@@ -0,0 +1,164 @@
+import os
+import io
+import copyreg
+import pickle
+import shutil
+import struct
+import hashlib
+import zlib
+import gc
+from mmap import mmap, ACCESS_READ
+from expressions import Binary, Unary
+from statements import Stmt, While
+from token_cls import Token
+from token_type import TokenType
+import expressions
+import statements
+from version import version
+
+cache_dir_name: str = '__loxcache__'
+magic: bytes = b'LOXC'
+format_version: int = 2
+header: struct.Struct = struct.Struct('<4sHH16s32s16sQI')
+optimized_flag: int = 1
+
+def schema_digest() -> bytes:
+    # any change to the node layout invalidates old entries even without a version bump
+    layout: list[str] = []
+    for module in (expressions, statements):
+        for name, cls in sorted(vars(module).items()):
+            if isinstance(cls, type) and cls.__module__ == module.__name__:
+                slots: list[str] = [slot for klass in cls.__mro__ for slot in getattr(klass, '__slots__', ())]
+                layout.append(f'{name}:{",".join(slots)}')
+    return hashlib.sha256(';'.join(layout).encode('utf-8')).digest()[:16]
+
+schema: bytes = schema_digest()
+
+def node_classes() -> dict[tuple[str, str], type]:
+    classes: dict[tuple[str, str], type] = {}
+    for module in (expressions, statements):
+        for name, cls in vars(module).items():
+            if isinstance(cls, type) and cls.__module__ == module.__name__:
+                classes[(module.__name__, name)] = cls
+    return classes
+
+# what the interpreter fills in on nodes while it runs: quickened handlers and compiled loops are Python functions
+# of this process, so a stored tree starts over from what the resolver left
+runtime_fields: dict[type, dict[str, object]] = {
+    Binary: {'handler': None, 'hits': 0, 'misses': 0},
+    Unary: {'handler': None, 'hits': 0, 'misses': 0},
+    While: {'iterations': 0, 'compiled': None, 'stepped': None, 'deopts': 0}
+}
+slot_names: dict[type, list[str]] = {
+    cls: [slot for klass in cls.__mro__ for slot in getattr(klass, '__slots__', ())] for cls in runtime_fields
+}
+
+class NodePickler(pickle.Pickler):
+    def __init__(self, file: io.BytesIO) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def reducer_override(self, obj: object) -> object:
+        fields: dict[str, object] = runtime_fields.get(type(obj))
+        if fields is None:
+            return NotImplemented
+        state: dict[str, object] = {name: getattr(obj, name) for name in slot_names[type(obj)]}
+        state.update(fields)
+        return copyreg.__newobj__, (type(obj),), (None, state)
+
+# a pickle may call anything it can name, and the checks in the header don't stop a forged file, so only the
+# classes a program is made of can be looked up
+class NodeUnpickler(pickle.Unpickler):
+    allowed: dict[tuple[str, str], object] = {
+        **node_classes(),
+        ('token_cls', 'Token'): Token,
+        ('token_type', 'TokenType'): TokenType
+    }
+
+    def find_class(self, module: str, name: str) -> object:
+        found: object = self.allowed.get((module, name))
+        if found is None:
+            raise pickle.UnpicklingError(f'{module}.{name} is not allowed')
+        return found
+
+class ProgramCache:
+    def __init__(self, path: str, optimize: bool=False) -> None:
+        self.path: str = path
+        self.flags: int = optimized_flag if optimize else 0
+        directory, name = os.path.split(os.path.abspath(path))
+        stem: str = os.path.splitext(name)[0]
+        suffix: str = '.opt' if optimize else ''
+        self.cache_path: str = os.path.join(directory, cache_dir_name, f'{stem}.lox-{version}{suffix}.bin')
+        with open(path, 'rb') as f:
+            self.digest: bytes = hashlib.sha256(f.read()).digest()
+
+    def make_header(self, payload: bytes) -> bytes:
+        return header.pack(magic, format_version, self.flags, version.encode('ascii'),
+                           self.digest, schema, len(payload), zlib.crc32(payload))
+
+    def load(self) -> list[Stmt]:
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data: mmap = mmap(f.fileno(), 0, access=ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        with data:
+            if len(data) < header.size:
+                return None
+            fields: tuple = header.unpack_from(data)
+            length: int = fields[6]
+            if (fields[0] != magic or fields[1] != format_version or fields[2] != self.flags
+                    or fields[3].rstrip(b'\0') != version.encode('ascii') or fields[4] != self.digest
+                    or fields[5] != schema or len(data) != header.size + length):
+                return None
+            with memoryview(data) as view:
+                payload: memoryview = view[header.size:]
+                intact: bool = zlib.crc32(payload) == fields[7]
+                payload.release()
+            if not intact:
+                return None
+            data.seek(header.size)
+            # pickling and unpickling only allocate, so the collector would just rescan the tree
+            collecting: bool = gc.isenabled()
+            gc.disable()
+            try:
+                return NodeUnpickler(data).load()
+            except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError):
+                return None
+            finally:
+                if collecting:
+                    gc.enable()
+
+    def store(self, program: list[Stmt]) -> bool:
+        collecting: bool = gc.isenabled()
+        gc.disable()
+        try:
+            buffer: io.BytesIO = io.BytesIO()
+            NodePickler(buffer).dump(program)
+            payload: bytes = buffer.getvalue()
+        except RecursionError:
+            return False
+        finally:
+            if collecting:
+                gc.enable()
+        temp_path: str = f'{self.cache_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(self.make_header(payload))
+                f.write(payload)
+            # readers only ever see a complete file
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+def clear_cache(directory: str) -> bool:
+    cache_dir: str = os.path.join(directory, cache_dir_name)
+    if not os.path.isdir(cache_dir):
+        return False
+    shutil.rmtree(cache_dir)
+    return True
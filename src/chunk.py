@@ -0,0 +1,113 @@
+from enum import IntEnum
+from token_cls import Token
+
+class OpCode(IntEnum):
+    CONSTANT = 1
+    NIL = 2
+    TRUE = 3
+    FALSE = 4
+    POP = 5
+
+    # variables
+    GET_LOCAL = 6
+    SET_LOCAL = 7
+    DEFINE_LOCAL = 8
+    GET_GLOBAL = 9
+    SET_GLOBAL = 10
+    DEFINE_GLOBAL = 11
+
+    # operators
+    EQUAL = 12
+    NOT_EQUAL = 13
+    GREATER = 14
+    GREATER_EQUAL = 15
+    LESS = 16
+    LESS_EQUAL = 17
+    ADD = 18
+    SUBTRACT = 19
+    MULTIPLY = 20
+    DIVIDE = 21
+    MODULO = 22
+    NOT = 23
+    NEGATE = 24
+
+    # statements & control flow
+    PRINT = 25
+    JUMP = 26
+    JUMP_IF_FALSE = 27
+    JUMP_IF_TRUE = 28
+    POP_JUMP_IF_FALSE = 29
+    LOOP = 30
+    RETURN = 31
+    CALL = 32
+
+operand_ops: set[OpCode] = {
+    OpCode.CONSTANT,
+    OpCode.GET_LOCAL,
+    OpCode.SET_LOCAL,
+    OpCode.DEFINE_LOCAL,
+    OpCode.GET_GLOBAL,
+    OpCode.SET_GLOBAL,
+    OpCode.DEFINE_GLOBAL,
+    OpCode.JUMP,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.JUMP_IF_TRUE,
+    OpCode.POP_JUMP_IF_FALSE,
+    OpCode.LOOP,
+    OpCode.CALL
+}
+
+jump_ops: set[OpCode] = {
+    OpCode.JUMP,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.JUMP_IF_TRUE,
+    OpCode.POP_JUMP_IF_FALSE
+}
+
+class Chunk:
+    def __init__(self) -> None:
+        self.code: list[int] = []
+        self.tokens: list[Token] = []
+        self.lines: list[int] = []
+        self.constants: list[object] = []
+        self.constant_index: dict[tuple[type, str], int] = {}
+        self.local_count: int = 0
+
+    def write(self, byte: int, token: Token=None, line: int=0) -> int:
+        self.code.append(byte)
+        self.tokens.append(token)
+        self.lines.append(token.line if token is not None else line)
+        return len(self.code) - 1
+
+    def add_constant(self, value: object) -> int:
+        key: tuple[type, str] = (type(value), repr(value))
+        if key not in self.constant_index:
+            self.constants.append(value)
+            self.constant_index[key] = len(self.constants) - 1
+        return self.constant_index[key]
+
+def disassemble(chunk: Chunk, name: str) -> str:
+    lines: list[str] = [f'== {name} ==']
+    offset: int = 0
+    while offset < len(chunk.code):
+        text, offset = disassemble_instruction(chunk, offset)
+        lines.append(text)
+    return '\n'.join(lines)
+
+def disassemble_instruction(chunk: Chunk, offset: int) -> tuple[str, int]:
+    if offset > 0 and chunk.lines[offset] == chunk.lines[offset - 1]:
+        line: str = '   |'
+    else:
+        line = f'{chunk.lines[offset]:4d}'
+    op: OpCode = OpCode(chunk.code[offset])
+    prefix: str = f'{offset:04d} {line} {op.name:<18}'
+    if op not in operand_ops:
+        return prefix.rstrip(), offset + 1
+    operand: int = chunk.code[offset + 1]
+    if op == OpCode.CONSTANT or op in (OpCode.GET_GLOBAL, OpCode.SET_GLOBAL, OpCode.DEFINE_GLOBAL):
+        return f'{prefix}{operand:4d} {chunk.constants[operand]!r}', offset + 2
+    if op in jump_ops:
+        return f'{prefix}{operand:4d} -> {offset + 2 + operand:04d}', offset + 2
+    if op == OpCode.LOOP:
+        return f'{prefix}{operand:4d} -> {offset + 2 - operand:04d}', offset + 2
+    return f'{prefix}{operand:4d}', offset + 2
@@ -0,0 +1,291 @@
+from typing import Callable
+from expressions import *
+from statements import *
+from visitor import Visitor
+from token_cls import Token
+from token_type import TokenType
+from interpreter import Interpreter
+from error import error, RuntimeErr
+from output import active_output
+from numarray import arithmetic, negate_array
+from natives import natives, call_value
+
+Thunk = Callable[[], object]
+
+class ClosureCompiler(Visitor):
+    def __init__(self) -> None:
+        self.globals: dict[str, object] = dict(natives)
+        self.frame: list[object] = []
+        self.bases: list[int] = []
+        self.top: int = 0
+        self.local_count: int = 0
+
+    def interpret(self, stmts: list[Stmt]) -> None:
+        program: Thunk = self.compile(stmts)
+        try:
+            program()
+        except RuntimeErr as err:
+            error(line=err.token.line, token=err.token, msg=err.message)
+            return None
+
+    def compile(self, stmts: list[Stmt]) -> Thunk:
+        program: Thunk = self.sequence(stmts)
+        self.frame.extend([None] * (self.local_count - len(self.frame)))
+        return program
+
+    def sequence(self, stmts: list[Stmt]) -> Thunk:
+        compiled: list[Thunk] = [stmt.accept(self) for stmt in stmts if stmt is not None]
+        if len(compiled) == 1:
+            return compiled[0]
+        if len(compiled) == 2:
+            first, second = compiled
+            def run_pair() -> None:
+                first()
+                second()
+            return run_pair
+        def run_all() -> None:
+            for stmt in compiled:
+                stmt()
+        return run_all
+
+    # statements
+    def visit_expression_stmt(self, stmt: Expression) -> Thunk:
+        return stmt.expression.accept(self)
+
+    def visit_print_stmt(self, stmt: Print) -> Thunk:
+        value: Thunk = stmt.expression.accept(self)
+        stringify = Interpreter.stringify
+        write_line = active_output().write_line
+        def run_print() -> None:
+            write_line(stringify(value()))
+        return run_print
+
+    def visit_var_stmt(self, stmt: Var) -> Thunk:
+        value: Thunk = stmt.initializer.accept(self) if stmt.initializer is not None else (lambda: None)
+        if stmt.slot is None:
+            global_vars: dict[str, object] = self.globals
+            name: str = stmt.name.lexeme
+            def define_global() -> None:
+                global_vars[name] = value()
+            return define_global
+        frame: list[object] = self.frame
+        index: int = self.bases[-1] + stmt.slot
+        def define_local() -> None:
+            frame[index] = value()
+        return define_local
+
+    def visit_block_stmt(self, stmt: Block) -> Thunk:
+        if not stmt.slot_count:
+            return self.sequence(stmt.statements)
+        self.bases.append(self.top)
+        self.top += stmt.slot_count
+        self.local_count = max(self.local_count, self.top)
+        body: Thunk = self.sequence(stmt.statements)
+        self.top = self.bases.pop()
+        return body
+
+    def visit_if_stmt(self, stmt: If) -> Thunk:
+        condition: Thunk = stmt.condition.accept(self)
+        then_branch: Thunk = stmt.then_branch.accept(self)
+        if stmt.else_branch is None:
+            def run_if() -> None:
+                value: object = condition()
+                if value is not None and value is not False:
+                    then_branch()
+            return run_if
+        else_branch: Thunk = stmt.else_branch.accept(self)
+        def run_if_else() -> None:
+            value: object = condition()
+            if value is not None and value is not False:
+                then_branch()
+            else:
+                else_branch()
+        return run_if_else
+
+    def visit_while_stmt(self, stmt: While) -> Thunk:
+        condition: Thunk = stmt.condition.accept(self)
+        body: Thunk = stmt.body.accept(self)
+        def run_while() -> None:
+            value: object = condition()
+            while value is not None and value is not False:
+                body()
+                value = condition()
+        return run_while
+
+    # expressions
+    def visit_literal_expr(self, expr: Literal) -> Thunk:
+        value: object = expr.value
+        return lambda: value
+
+    def visit_grouping_expr(self, expr: Grouping) -> Thunk:
+        return expr.expression.accept(self)
+
+    def visit_variable_expr(self, expr: Variable) -> Thunk:
+        if expr.depth is None:
+            global_vars: dict[str, object] = self.globals
+            token: Token = expr.name
+            name: str = token.lexeme
+            def get_global() -> object:
+                if name in global_vars:
+                    return global_vars[name]
+                error(line=token.line, token=token, msg=f'Undefined variable \'{name}\'.')
+                return None
+            return get_global
+        frame: list[object] = self.frame
+        index: int = self.local_index(expr)
+        return lambda: frame[index]
+
+    def visit_assign_expr(self, expr: Assign) -> Thunk:
+        value: Thunk = expr.value.accept(self)
+        if expr.depth is None:
+            global_vars: dict[str, object] = self.globals
+            token: Token = expr.name
+            name: str = token.lexeme
+            def set_global() -> object:
+                result: object = value()
+                if name in global_vars:
+                    global_vars[name] = result
+                else:
+                    error(line=token.line, token=token, msg=f'Undefined variable \'{name}\'.')
+                return result
+            return set_global
+        frame: list[object] = self.frame
+        index: int = self.local_index(expr)
+        def set_local() -> object:
+            result: object = value()
+            frame[index] = result
+            return result
+        return set_local
+
+    def visit_call_expr(self, expr: Call) -> Thunk:
+        callee: Thunk = expr.callee.accept(self)
+        arguments: list[Thunk] = [argument.accept(self) for argument in expr.arguments]
+        paren: Token = expr.paren
+        def call() -> object:
+            return call_value(callee(), [argument() for argument in arguments], paren)
+        return call
+
+    def visit_logical_expr(self, expr: Logical) -> Thunk:
+        left: Thunk = expr.left.accept(self)
+        right: Thunk = expr.right.accept(self)
+        if expr.op == TokenType.OR:
+            def run_or() -> object:
+                value: object = left()
+                if value is not None and value is not False:
+                    return value
+                return right()
+            return run_or
+        def run_and() -> object:
+            value: object = left()
+            if value is None or value is False:
+                return value
+            return right()
+        return run_and
+
+    def visit_unary_expr(self, expr: Unary) -> Thunk:
+        right: Thunk = expr.right.accept(self)
+        operator: Token = expr.operator
+        if expr.op == TokenType.MINUS:
+            def negate() -> object:
+                value: object = right()
+                if type(value) is not float:
+                    return negate_array(value, operator)
+                return -value
+            return negate
+        def run_not() -> object:
+            value: object = right()
+            return value is None or value is False
+        return run_not
+
+    def visit_binary_expr(self, expr: Binary) -> Thunk:
+        left: Thunk = expr.left.accept(self)
+        right: Thunk = expr.right.accept(self)
+        operator: Token = expr.operator
+        op: TokenType = expr.op
+        if op == TokenType.PLUS:
+            def add() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is float and type(b) is float:
+                    return a + b
+                if type(a) is str and type(b) is str:
+                    return a + b
+                return arithmetic(a, b, operator, 'Operands must be two numbers or two strings.')
+            return add
+        if op == TokenType.MINUS:
+            def subtract() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    return arithmetic(a, b, operator, 'Operand must be a number.')
+                return a - b
+            return subtract
+        if op == TokenType.STAR:
+            def multiply() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    return arithmetic(a, b, operator, 'Operand must be a number.')
+                return a * b
+            return multiply
+        if op == TokenType.SLASH:
+            def divide() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    return arithmetic(a, b, operator, 'Operand must be a number.')
+                if b == 0.0:
+                    raise RuntimeErr(operator, 'Can\'t divide by zero.')
+                return a / b
+            return divide
+        if op == TokenType.MODULO:
+            def modulo() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    return arithmetic(a, b, operator, 'Modulo operator must take two numbers as arguments')
+                if b == 0.0:
+                    raise RuntimeErr(operator, 'Can\'t divide by zero.')
+                return a % b
+            return modulo
+        if op == TokenType.GREATER:
+            def greater() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeErr(operator, 'Operand must be a number.')
+                return a > b
+            return greater
+        if op == TokenType.GREATER_EQUAL:
+            def greater_equal() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeErr(operator, 'Operand must be a number.')
+                return a >= b
+            return greater_equal
+        if op == TokenType.LESS:
+            def less() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeErr(operator, 'Operand must be a number.')
+                return a < b
+            return less
+        if op == TokenType.LESS_EQUAL:
+            def less_equal() -> object:
+                a: object = left()
+                b: object = right()
+                if type(a) is not float or type(b) is not float:
+                    raise RuntimeErr(operator, 'Operand must be a number.')
+                return a <= b
+            return less_equal
+        if op == TokenType.EQUAL_EQUAL:
+            return lambda: left() == right()
+        if op == TokenType.BANG_EQUAL:
+            return lambda: left() != right()
+        return lambda: None
+
+    # Helper functions
+    def local_index(self, expr: Expr) -> int:
+        return self.bases[-1 - expr.depth] + expr.slot
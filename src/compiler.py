@@ -0,0 +1,164 @@
+from expressions import *
+from statements import *
+from visitor import Visitor
+from token_cls import Token
+from token_type import TokenType
+from chunk import Chunk, OpCode
+
+class Compiler(Visitor):
+    binary_ops: dict[TokenType, OpCode] = {
+        TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+        TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+        TokenType.GREATER: OpCode.GREATER,
+        TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+        TokenType.LESS: OpCode.LESS,
+        TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+        TokenType.PLUS: OpCode.ADD,
+        TokenType.MINUS: OpCode.SUBTRACT,
+        TokenType.STAR: OpCode.MULTIPLY,
+        TokenType.SLASH: OpCode.DIVIDE,
+        TokenType.MODULO: OpCode.MODULO
+    }
+
+    def __init__(self) -> None:
+        self.chunk: Chunk = Chunk()
+        self.bases: list[int] = []
+        self.top: int = 0
+        self.line: int = 0
+
+    def compile(self, stmts: list[Stmt]) -> Chunk:
+        for stmt in stmts:
+            if stmt is not None:
+                stmt.accept(self)
+        self.emit(OpCode.RETURN)
+        return self.chunk
+
+    # statements
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        stmt.expression.accept(self)
+        self.emit(OpCode.POP)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        stmt.expression.accept(self)
+        self.emit(OpCode.PRINT)
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        self.line = stmt.name.line
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        else:
+            self.emit(OpCode.NIL)
+        if stmt.slot is None:
+            self.emit(OpCode.DEFINE_GLOBAL, self.chunk.add_constant(stmt.name.lexeme), stmt.name)
+        else:
+            self.emit(OpCode.DEFINE_LOCAL, self.bases[-1] + stmt.slot, stmt.name)
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        if not stmt.slot_count:
+            for inner in stmt.statements:
+                if inner is not None:
+                    inner.accept(self)
+            return
+        self.bases.append(self.top)
+        self.top += stmt.slot_count
+        self.chunk.local_count = max(self.chunk.local_count, self.top)
+        for inner in stmt.statements:
+            if inner is not None:
+                inner.accept(self)
+        self.top = self.bases.pop()
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        stmt.condition.accept(self)
+        then_jump: int = self.emit_jump(OpCode.POP_JUMP_IF_FALSE)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is None:
+            self.patch_jump(then_jump)
+            return
+        else_jump: int = self.emit_jump(OpCode.JUMP)
+        self.patch_jump(then_jump)
+        stmt.else_branch.accept(self)
+        self.patch_jump(else_jump)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        loop_start: int = len(self.chunk.code)
+        stmt.condition.accept(self)
+        exit_jump: int = self.emit_jump(OpCode.POP_JUMP_IF_FALSE)
+        stmt.body.accept(self)
+        self.emit_loop(loop_start)
+        self.patch_jump(exit_jump)
+
+    # expressions
+    def visit_literal_expr(self, expr: Literal) -> None:
+        if expr.value is None:
+            self.emit(OpCode.NIL)
+        elif expr.value is True:
+            self.emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit(OpCode.CONSTANT, self.chunk.add_constant(expr.value))
+
+    def visit_grouping_expr(self, expr: Grouping) -> None:
+        expr.expression.accept(self)
+
+    def visit_unary_expr(self, expr: Unary) -> None:
+        expr.right.accept(self)
+        if expr.op == TokenType.MINUS:
+            self.emit(OpCode.NEGATE, token=expr.operator)
+        else:
+            self.emit(OpCode.NOT, token=expr.operator)
+
+    def visit_binary_expr(self, expr: Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+        self.emit(self.binary_ops[expr.op], token=expr.operator)
+
+    def visit_call_expr(self, expr: Call) -> None:
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+        self.emit(OpCode.CALL, len(expr.arguments), expr.paren)
+
+    def visit_logical_expr(self, expr: Logical) -> None:
+        expr.left.accept(self)
+        if expr.op == TokenType.OR:
+            end_jump: int = self.emit_jump(OpCode.JUMP_IF_TRUE, expr.operator)
+        else:
+            end_jump = self.emit_jump(OpCode.JUMP_IF_FALSE, expr.operator)
+        self.emit(OpCode.POP)
+        expr.right.accept(self)
+        self.patch_jump(end_jump)
+
+    def visit_variable_expr(self, expr: Variable) -> None:
+        if expr.depth is None:
+            self.emit(OpCode.GET_GLOBAL, self.chunk.add_constant(expr.name.lexeme), expr.name)
+        else:
+            self.emit(OpCode.GET_LOCAL, self.local_index(expr), expr.name)
+
+    def visit_assign_expr(self, expr: Assign) -> None:
+        expr.value.accept(self)
+        if expr.depth is None:
+            self.emit(OpCode.SET_GLOBAL, self.chunk.add_constant(expr.name.lexeme), expr.name)
+        else:
+            self.emit(OpCode.SET_LOCAL, self.local_index(expr), expr.name)
+
+    # Helper functions
+    def local_index(self, expr: Expr) -> int:
+        return self.bases[-1 - expr.depth] + expr.slot
+
+    def emit(self, op: OpCode, operand: int=None, token: Token=None) -> int:
+        if token is not None:
+            self.line = token.line
+        offset: int = self.chunk.write(op, token, self.line)
+        if operand is not None:
+            self.chunk.write(operand, token, self.line)
+        return offset
+
+    def emit_jump(self, op: OpCode, token: Token=None) -> int:
+        return self.emit(op, 0, token) + 1
+
+    def patch_jump(self, offset: int) -> None:
+        self.chunk.code[offset] = len(self.chunk.code) - offset - 1
+
+    def emit_loop(self, loop_start: int) -> None:
+        self.emit(OpCode.LOOP, len(self.chunk.code) + 2 - loop_start)
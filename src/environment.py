@@ -13,7 +13,7 @@ class Environment:
         self.values.update({name: value})
     
     def assign(self, name: Token, value: object) -> None:
-        if name.lexeme in self.values.keys():
+        if name.lexeme in self.values:
             self.values[name.lexeme] = value
             return
         if self.enclosing is not None:
@@ -22,8 +22,27 @@ class Environment:
         error(line=name.line, token=name, msg=f'Undefined variable \'{name.lexeme}\'.')
 
     def get(self, name: Token) -> object:
-        if name.lexeme in self.values.keys():
+        if name.lexeme in self.values:
             return self.values[name.lexeme]
         if self.enclosing is not None:
             return self.enclosing.get(name)
         error(line=name.line, token=name, msg=f'Undefined variable \'{name.lexeme}\'.')
+
+class LocalEnvironment:
+    def __init__(self, enclosing: object, size: int) -> None:
+        self.slots: list[object] = [None] * size
+        self.enclosing: object = enclosing
+
+    def get_at(self, depth: int, slot: int) -> object:
+        environment: LocalEnvironment = self
+        while depth:
+            environment = environment.enclosing
+            depth -= 1
+        return environment.slots[slot]
+
+    def assign_at(self, depth: int, slot: int, value: object) -> None:
+        environment: LocalEnvironment = self
+        while depth:
+            environment = environment.enclosing
+            depth -= 1
+        environment.slots[slot] = value
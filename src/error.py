@@ -1,8 +1,10 @@
-from sys import stderr
+import sys
+from typing import TextIO, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from token_cls import Token
 from token_type import TokenType
-
-had_err: bool = False
+from output import active_output
 
 class RuntimeErr(Exception):
     def __init__(self, token: Token, message: str) -> None:
@@ -10,6 +12,22 @@ class RuntimeErr(Exception):
         self.message = message
         super().__init__(self.message)
 
+# raised by native functions, which don't know the token of the call that reached them
+class NativeErr(Exception):
+    def __init__(self, message: str) -> None:
+        self.message = message
+        super().__init__(self.message)
+
+# raised by a step hook to stop a program between steps, the interpreter lets it through to whoever is running it
+class Interrupt(Exception):
+    pass
+
+# raised when a heap snapshot can't be written or restored
+class SnapshotErr(Exception):
+    def __init__(self, message: str) -> None:
+        self.message = message
+        super().__init__(self.message)
+
 class ParseErr(Exception):
     def __init__(self, token: Token, message: str) -> None:
         self.token = token
@@ -17,6 +35,41 @@ class ParseErr(Exception):
         super().__init__(self.message)
         error(line=self.token.line, token=self.token, msg=self.message)
 
+class ErrorReporter:
+    def __init__(self, stream: TextIO=None, capture: bool=False) -> None:
+        self.stream: TextIO = stream
+        self.capture: bool = capture
+        self.had_err: bool = False
+        self.messages: list[str] = []
+
+    def report(self, line: int, where: str, message: str) -> None:
+        text: str = format_error(line, where, message)
+        if self.capture:
+            self.messages.append(text)
+        else:
+            # buffered program output has to reach the terminal before the error does
+            active_output().flush()
+            print(text, file=self.stream if self.stream is not None else sys.stderr)
+        self.had_err = True
+
+    def reset(self) -> None:
+        self.had_err = False
+        self.messages.clear()
+
+default_reporter: ErrorReporter = ErrorReporter()
+current_reporter: ContextVar = ContextVar('current_reporter', default=default_reporter)
+
+def active_reporter() -> ErrorReporter:
+    return current_reporter.get()
+
+@contextmanager
+def reporting(reporter: ErrorReporter) -> Iterator[ErrorReporter]:
+    token = current_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        current_reporter.reset(token)
+
 def error(line: int=0, token: Token=None, msg: str='default message') -> None:
     if token is None:
         report(line, '', msg)
@@ -25,14 +78,14 @@ def error(line: int=0, token: Token=None, msg: str='default message') -> None:
     else:
         report(token.line, f' at {token.lexeme}', msg)
 
+def format_error(line: int, where: str, message: str) -> str:
+    return f'[line {line}] Error{where}: {message}'
+
 def report(line: int, where: str, message: str) -> None:
-    print(f'[line {line}] Error{where}: {message}', file=stderr)
-    set_err_status(True)
+    current_reporter.get().report(line, where, message)
 
 def get_err_status() -> bool:
-    global had_err
-    return had_err
+    return current_reporter.get().had_err
 
 def set_err_status(status: bool) -> None:
-    global had_err
-    had_err = status
\ No newline at end of file
+    current_reporter.get().had_err = status
@@ -1,29 +1,80 @@
 from abc import ABC, abstractmethod
 from token_cls import Token
+from token_type import TokenType
+
+operator_lexemes: dict[TokenType, str] = {
+    TokenType.MINUS: '-',
+    TokenType.PLUS: '+',
+    TokenType.MODULO: '%',
+    TokenType.STAR: '*',
+    TokenType.SLASH: '/',
+    TokenType.BANG: '!',
+    TokenType.BANG_EQUAL: '!=',
+    TokenType.EQUAL_EQUAL: '==',
+    TokenType.LESS: '<',
+    TokenType.LESS_EQUAL: '<=',
+    TokenType.GREATER: '>',
+    TokenType.GREATER_EQUAL: '>=',
+    TokenType.AND: 'and',
+    TokenType.OR: 'or'
+}
 
 class Expr(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor):
         pass
 
+# operator nodes keep only the token type and line, the token is rebuilt for error reports
+class Operator(Expr):
+    __slots__ = ('op', 'line')
+
+    @property
+    def operator(self) -> Token:
+        return Token(self.op, operator_lexemes[self.op], None, self.line)
+
 class Assign(Expr):
+    __slots__ = ('name', 'value', 'depth', 'slot')
+
     def __init__(self, name: Token, value: Expr):
         self.name = name
         self.value = value
+        self.depth: int = None
+        self.slot: int = None
 
     def accept(self, visitor):
         return visitor.visit_assign_expr(self)
 
-class Binary(Expr):
+class Binary(Operator):
+    __slots__ = ('left', 'right', 'handler', 'hits', 'misses')
+
     def __init__(self, left: Expr, operator: Token,  right: Expr):
         self.left = left
-        self.operator = operator
+        self.op: TokenType = operator.type
+        self.line: int = operator.line
         self.right = right
+        self.handler: object = None
+        self.hits: int = 0
+        self.misses: int = 0
 
     def accept(self, visitor):
         return visitor.visit_binary_expr(self)
 
+class Call(Expr):
+    __slots__ = ('callee', 'paren', 'arguments')
+
+    def __init__(self, callee: Expr, paren: Token, arguments: list[Expr]) -> None:
+        self.callee = callee
+        self.paren = paren
+        self.arguments = arguments
+
+    def accept(self, visitor):
+        return visitor.visit_call_expr(self)
+
 class Grouping(Expr):
+    __slots__ = ('expression',)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
@@ -31,32 +82,47 @@ class Grouping(Expr):
         return visitor.visit_grouping_expr(self)
 
 class Literal(Expr):
+    __slots__ = ('value',)
+
     def __init__(self, value: object):
         self.value = value
 
     def accept(self, visitor):
         return visitor.visit_literal_expr(self)
 
-class Logical(Expr):
+class Logical(Operator):
+    __slots__ = ('left', 'right')
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left = left
-        self.operator = operator
+        self.op: TokenType = operator.type
+        self.line: int = operator.line
         self.right = right
 
     def accept(self, visitor):
         return visitor.visit_logical_expr(self)
 
-class Unary(Expr):
+class Unary(Operator):
+    __slots__ = ('right', 'handler', 'hits', 'misses')
+
     def __init__(self, operator: Token, right: Expr):
-        self.operator = operator
+        self.op: TokenType = operator.type
+        self.line: int = operator.line
         self.right = right
+        self.handler: object = None
+        self.hits: int = 0
+        self.misses: int = 0
 
     def accept(self, visitor):
         return visitor.visit_unary_expr(self)
 
 class Variable(Expr):
+    __slots__ = ('name', 'depth', 'slot')
+
     def __init__(self, name: Token) -> None:
         self.name = name
-    
+        self.depth: int = None
+        self.slot: int = None
+
     def accept(self, visitor):
         return visitor.visit_variable_expr(self)
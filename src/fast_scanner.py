@@ -0,0 +1,114 @@
+import re
+from typing import Iterable, Iterator
+from token_cls import Token
+from token_type import TokenType
+from scanner import Scanner
+
+class FastScanner(Scanner):
+    operators: dict[str, TokenType] = {
+        '(': TokenType.LEFT_PAREN,
+        ')': TokenType.RIGHT_PAREN,
+        '{': TokenType.LEFT_BRACE,
+        '}': TokenType.RIGHT_BRACE,
+        ',': TokenType.COMMA,
+        '.': TokenType.DOT,
+        '-': TokenType.MINUS,
+        '+': TokenType.PLUS,
+        '%': TokenType.MODULO,
+        ';': TokenType.SEMICOLON,
+        '*': TokenType.STAR,
+        '/': TokenType.SLASH,
+        '!': TokenType.BANG,
+        '!=': TokenType.BANG_EQUAL,
+        '=': TokenType.EQUAL,
+        '==': TokenType.EQUAL_EQUAL,
+        '<': TokenType.LESS,
+        '<=': TokenType.LESS_EQUAL,
+        '>': TokenType.GREATER,
+        '>=': TokenType.GREATER_EQUAL
+    }
+
+    # group numbers double as the dispatch codes in scan_tokens, keep them in sync
+    pattern: re.Pattern = re.compile(r'''
+        [ \t\r]*
+        (?:
+            ([A-Za-z][^\W_]*)                  # 1 identifier or keyword
+            |(!=|==|<=|>=|[(){},.\-+%;*!=<>])   # 2 operator
+            |(\d+(?:\.\d+)?)                    # 3 number
+            |(\n)                               # 4 newline
+            |("[^"]*")                          # 5 string
+            |(//[^\n]*)                         # 6 line comment
+            |(/\*.*?\*/)                        # 7 block comment
+            |(/(?![/*]))                        # 8 slash
+            |([^ \t\r])                         # 9 anything else, scanned by Scanner.scan_token
+        )
+    ''', re.VERBOSE | re.DOTALL)
+
+    def scan_tokens(self) -> list[Token]:
+        self.scan_buffer(self.source, self.current, len(self.source), final=True)
+        self.tokens.append(Token(TokenType.EOF, '', None, self.line))
+        return self.tokens
+
+    def scan_chunks(self, chunks: Iterable[str]) -> Iterator[Token]:
+        buffer: str = ''
+        for chunk in chunks:
+            buffer += chunk
+            cut: int = buffer.rfind('\n') + 1
+            if cut == 0:
+                continue
+            self.source = buffer
+            resume: int = self.scan_buffer(buffer, 0, cut, final=False)
+            buffer = buffer[resume:]
+            yield from self.tokens
+            self.tokens.clear()
+        self.source = buffer
+        self.scan_buffer(buffer, 0, len(buffer), final=True)
+        self.tokens.append(Token(TokenType.EOF, '', None, self.line))
+        yield from self.tokens
+        self.tokens.clear()
+
+    def scan_buffer(self, buffer: str, pos: int, endpos: int, final: bool) -> int:
+        append = self.tokens.append
+        keywords: dict[str, TokenType] = self.keywords
+        operators: dict[str, TokenType] = self.operators
+        identifier: TokenType = TokenType.IDENTIFIER
+        string: TokenType = TokenType.STRING
+        number: TokenType = TokenType.NUMBER
+        line: int = self.line
+        while pos is not None:
+            resume: int = None
+            for m in self.pattern.finditer(buffer, pos, endpos):
+                kind: int = m.lastindex
+                if kind == 1:
+                    text: str = m.group(1)
+                    append(Token(keywords.get(text, identifier), text, None, line))
+                elif kind == 2 or kind == 8:
+                    text = m.group(kind)
+                    append(Token(operators[text], text, None, line))
+                elif kind == 4:
+                    line += 1
+                elif kind == 3:
+                    text = m.group(3)
+                    append(Token(number, text, float(text), line))
+                elif kind == 5:
+                    text = m.group(5)
+                    line += text.count('\n')
+                    append(Token(string, text, text[1:-1], line))
+                elif kind == 7:
+                    line += m.group(7).count('\n')
+                elif kind == 9:
+                    start: int = m.start(9)
+                    if not final and buffer[start] in '"/':
+                        # a string or block comment that may close in a later chunk
+                        self.line = line
+                        return start
+                    self.start = self.current = start
+                    self.line = line
+                    self.scan_token()
+                    line = self.line
+                    resume = self.current
+                    break
+            pos = resume
+        self.line = line
+        self.current = endpos
+        return endpos
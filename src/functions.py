@@ -0,0 +1,11 @@
+from statements import Function
+
+class LoxFunction:
+    __slots__ = ('declaration', 'closure')
+
+    def __init__(self, declaration: Function, closure: object) -> None:
+        self.declaration: Function = declaration
+        self.closure: object = closure
+
+    def __str__(self) -> str:
+        return f'<fn {self.declaration.name.lexeme}>'
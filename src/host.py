@@ -0,0 +1,160 @@
+import asyncio
+import threading
+from runtime import LoxRuntime, Program
+from interpreter import Interpreter
+from error import ErrorReporter, Interrupt, reporting
+from output import Output, CaptureSink, writing
+
+default_slice_steps: int = 10_000
+
+class HostResult:
+    def __init__(self) -> None:
+        # 'ok', 'error', 'timeout' or 'quota'
+        self.status: str = 'ok'
+        self.stdout: str = ''
+        self.errors: list[str] = []
+        self.steps: int = 0
+        self.slices: int = 0
+        self.elapsed: float = 0.0
+
+# a paused program is a Python stack in the middle of the tree walk, so each one keeps a thread of its own,
+# and that thread only moves while the host has granted it a slice of steps
+class Worker:
+    def __init__(self, program: Program, loop: asyncio.AbstractEventLoop) -> None:
+        self.program: Program = program
+        self.loop: asyncio.AbstractEventLoop = loop
+        self.interpreter: Interpreter = Interpreter()
+        self.interpreter.step_hook = self.pause
+        self.reporter: ErrorReporter = ErrorReporter(capture=True)
+        self.sink: CaptureSink = CaptureSink()
+        self.resume: threading.Semaphore = threading.Semaphore(0)
+        self.paused: asyncio.Future = None
+        self.grant: int = 0
+        # steps taken by the slices that have ended
+        self.used: int = 0
+        self.stopping: bool = False
+        self.finished: bool = False
+        self.failure: BaseException = None
+        self.thread: threading.Thread = threading.Thread(target=self.main, name='lox-worker', daemon=True)
+        self.thread.start()
+
+    def main(self) -> None:
+        self.resume.acquire()
+        try:
+            if not self.stopping:
+                output: Output = Output(self.sink, 'exit')
+                with reporting(self.reporter), writing(output):
+                    self.interpreter.steps = self.grant
+                    try:
+                        self.interpreter.interpret(self.program.statements)
+                        self.used += self.grant - self.interpreter.steps
+                    except Interrupt:
+                        pass
+                    finally:
+                        output.flush()
+        except BaseException as err:
+            # anything but a Lox error is a bug in the interpreter, which the host raises again
+            self.failure = err
+        finally:
+            self.finished = True
+            self.loop.call_soon_threadsafe(self.wake, self.paused)
+
+    # the interpreter's step hook, called on the worker thread each time a slice is used up
+    def pause(self) -> int:
+        self.used += self.grant
+        self.loop.call_soon_threadsafe(self.wake, self.paused)
+        self.resume.acquire()
+        if self.stopping:
+            raise Interrupt()
+        return self.grant
+
+    @staticmethod
+    def wake(paused: asyncio.Future) -> None:
+        if not paused.done():
+            paused.set_result(None)
+
+    async def run_slice(self, steps: int) -> None:
+        self.paused = self.loop.create_future()
+        self.grant = steps
+        self.resume.release()
+        await asyncio.shield(self.paused)
+
+    # the thread has only to return once finished is set, but joining it still mustn't block the loop
+    async def join(self) -> None:
+        await self.loop.run_in_executor(None, self.thread.join)
+
+    # unwinds the program on its thread, once the slice it may be running has ended
+    async def stop(self) -> None:
+        if self.paused is not None:
+            await asyncio.shield(self.paused)
+        if self.finished:
+            return
+        self.stopping = True
+        self.paused = self.loop.create_future()
+        self.resume.release()
+        await asyncio.shield(self.paused)
+
+# time-slices Lox programs on one event loop: only one runs at a time, and each gives up its turn after every slice
+class AsyncHost:
+    def __init__(self, slice_steps: int=default_slice_steps, optimize: bool=False) -> None:
+        self.slice_steps: int = slice_steps
+        self.runtime: LoxRuntime = LoxRuntime(capture=True, optimize=optimize)
+        # created on first use, inside the loop it belongs to
+        self.turn: asyncio.Lock = None
+
+    # cancelling the task running this stops the program and raises CancelledError as usual
+    async def run(self, source: str, timeout: float=None, max_steps: int=None) -> HostResult:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self.turn is None:
+            self.turn = asyncio.Lock()
+        result: HostResult = HostResult()
+        start: float = loop.time()
+        program: Program = self.runtime.compile(source)
+        if program is None:
+            result.status = 'error'
+            result.errors = list(self.runtime.messages)
+            return result
+        # a program only gets its thread when its first turn comes, so programs waiting in line hold none
+        worker: Worker = None
+        try:
+            while worker is None or not worker.finished:
+                async with self.turn:
+                    used: int = worker.used if worker is not None else 0
+                    if timeout is not None and loop.time() - start >= timeout:
+                        result.status = 'timeout'
+                    elif max_steps is not None and used >= max_steps:
+                        result.status = 'quota'
+                    else:
+                        if worker is None:
+                            worker = Worker(program, loop)
+                        steps: int = self.slice_steps if max_steps is None else min(self.slice_steps, max_steps - used)
+                        try:
+                            await worker.run_slice(steps)
+                        except asyncio.CancelledError:
+                            # a slice can't be cut short, so it ends and unwinds before anyone else gets a turn
+                            await worker.stop()
+                            raise
+                        result.slices += 1
+                        continue
+                    if worker is not None:
+                        await worker.stop()
+                    break
+        except asyncio.CancelledError:
+            if worker is not None:
+                await worker.stop()
+                await worker.join()
+            raise
+        if worker is not None:
+            await worker.join()
+            if worker.failure is not None:
+                raise worker.failure
+            result.stdout = worker.sink.getvalue()
+            result.errors = list(worker.reporter.messages)
+            if result.status == 'ok' and worker.reporter.had_err:
+                result.status = 'error'
+            result.steps = worker.used
+        result.elapsed = loop.time() - start
+        return result
+
+    async def run_all(self, sources: list[str], timeout: float=None, max_steps: int=None) -> list[HostResult]:
+        return list(await asyncio.gather(*(self.run(source, timeout, max_steps) for source in sources)))
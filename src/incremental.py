@@ -0,0 +1,508 @@
+import re
+import gc
+from bisect import bisect_right
+from itertools import compress
+from typing import Callable
+from token_cls import Token
+from token_type import TokenType
+from expressions import *
+from statements import *
+from fast_scanner import FastScanner
+from token_parser import Parser
+from error import ErrorReporter, format_error, reporting, report
+
+# keeps diagnostics as (line, where, message) so their lines can move with the code they point at
+class DiagnosticReporter(ErrorReporter):
+    def __init__(self) -> None:
+        super().__init__(capture=True)
+        self.items: list[tuple[int, str, str]] = []
+
+    def report(self, line: int, where: str, message: str) -> None:
+        self.items.append((line, where, message))
+        self.had_err = True
+
+# a run of tokens and the whitespace and comments before it, which start right where the previous chunk's last
+# token ends. A chunk is usually one top-level declaration; when an edit or error recovery pulls declarations into
+# another one, they keep chunks of their own behind its head, so that a later edit can take them over again
+class Chunk:
+    __slots__ = ('start', 'base', 'ends', 'tokens', 'stmt', 'scan_errors', 'parse_errors', 'head', 'whole', 'nested')
+
+    def __init__(self, start: int, tokens: list[Token], ends: list[int]) -> None:
+        self.start: int = start
+        # token ends and scan error offsets are kept relative to base, so the chunk moves by changing two numbers
+        self.base: int = start
+        self.ends: list[int] = [end - start for end in ends]
+        self.tokens: list[Token] = tokens
+        self.stmt: Stmt = None
+        # (offset, line, where, message), in the gap or on the tokens of this chunk
+        self.scan_errors: list[tuple[int, int, str, str]] = []
+        # of a head, all that its top-level declaration reported, and otherwise what the chunk's own did
+        self.parse_errors: list[tuple[int, str, str]] = []
+        # starts a top-level declaration
+        self.head: bool = False
+        # the tokens are what one call to declaration() took, which makes stmt and parse_errors reusable
+        self.whole: bool = False
+        # stmt is part of the head's tree, which moves its lines
+        self.nested: bool = False
+
+class RegionScanner(FastScanner):
+    def __init__(self, source: str, line: int, reporter: DiagnosticReporter) -> None:
+        super().__init__(source)
+        self.line = line
+        self.reporter: DiagnosticReporter = reporter
+        self.ends: list[int] = []
+        # (offset, line, where, message)
+        self.errors: list[tuple[int, int, str, str]] = []
+
+    # the dispatch of FastScanner.scan_buffer, also keeping where each token ends. Returns False when endpos
+    # falls inside a token, string or comment, which makes it no place to pick the old tokens up again
+    def scan_region(self, pos: int, endpos: int, final: bool) -> bool:
+        source: str = self.source
+        append = self.tokens.append
+        ends: list[int] = self.ends
+        keywords: dict[str, TokenType] = self.keywords
+        operators: dict[str, TokenType] = self.operators
+        identifier: TokenType = TokenType.IDENTIFIER
+        string: TokenType = TokenType.STRING
+        number: TokenType = TokenType.NUMBER
+        line: int = self.line
+        last: re.Match = None
+        while pos is not None:
+            resume: int = None
+            for m in self.pattern.finditer(source, pos, endpos):
+                last = m
+                kind: int = m.lastindex
+                if kind == 1:
+                    text: str = m.group(1)
+                    append(Token(keywords.get(text, identifier), text, None, line))
+                    ends.append(m.end())
+                elif kind == 2 or kind == 8:
+                    text = m.group(kind)
+                    append(Token(operators[text], text, None, line))
+                    ends.append(m.end())
+                elif kind == 4:
+                    line += 1
+                elif kind == 3:
+                    text = m.group(3)
+                    append(Token(number, text, float(text), line))
+                    ends.append(m.end())
+                elif kind == 5:
+                    text = m.group(5)
+                    line += text.count('\n')
+                    append(Token(string, text, text[1:-1], line))
+                    ends.append(m.end())
+                elif kind == 7:
+                    line += m.group(7).count('\n')
+                elif kind == 9:
+                    start: int = m.start(9)
+                    if not final and source[start] in '"/':
+                        return False
+                    self.start = self.current = start
+                    self.line = line
+                    count: int = len(self.tokens)
+                    reported: int = len(self.reporter.items)
+                    with reporting(self.reporter):
+                        self.scan_token()
+                    if len(self.tokens) > count:
+                        ends.append(self.current)
+                    self.errors += [(start, *item) for item in self.reporter.items[reported:]]
+                    line = self.line
+                    if self.current > endpos and not final:
+                        return False
+                    resume = self.current
+                    last = None
+                    break
+            pos = resume
+        self.line = line
+        if last is not None and not final and last.end() == endpos:
+            # a match cut short by endpos, like an identifier or line comment running on past it
+            return self.pattern.match(source, last.start()).end() == endpos
+        return True
+
+# parses the chunks around an edit and the tokens scanned again, pulling in the chunks after them as the parse
+# reaches them, like StreamingParser does with the scanner
+class RegionParser(Parser):
+    def __init__(self, document: 'IncrementalParser', next_chunk: int) -> None:
+        super().__init__([])
+        self.document: IncrementalParser = document
+        self.next_chunk: int = next_chunk
+        # each run of tokens added: its first index, and the offset its token ends are relative to
+        self.firsts: list[int] = []
+        self.bases: list[int] = []
+        self.ends: list[list[int]] = []
+        # token index -> index of the chunk starting there, for the declarations that can be taken over, and for
+        # the heads past the edit, where the parse can stop
+        self.reusable: dict[int, int] = {}
+        self.heads: dict[int, int] = {}
+        # (token index, chunk index) of the declarations taken over since the driver last cleared it
+        self.reused: list[tuple[int, int]] = []
+        # (chunk index, scan errors at absolute offsets) of the chunks pulled in
+        self.scan_errors: list[tuple[int, list[tuple[int, int, str, str]]]] = []
+
+    # a declaration parses the same wherever it's reached from, so an unchanged one that an edit moved into a
+    # block, or that error recovery reached, is taken over with its errors rather than parsed again
+    def declaration(self) -> Stmt:
+        kept: int = self.reusable.get(self.cur)
+        if kept is None:
+            return super().declaration()
+        chunk: Chunk = self.document.chunks[kept]
+        for line, where, message in chunk.parse_errors:
+            report(line, where, message)
+        self.reused.append((self.cur, kept))
+        self.cur += len(chunk.tokens)
+        return chunk.stmt
+
+    def peek(self) -> Token:
+        if self.cur == len(self.tokens):
+            self.pull()
+        return self.tokens[self.cur]
+
+    def pull(self) -> None:
+        document: IncrementalParser = self.document
+        if self.next_chunk == len(document.chunks):
+            self.add_tokens([Token(TokenType.EOF, '', None, document.eof_line)], len(document.source), [0])
+            return
+        i: int = self.next_chunk
+        self.next_chunk += 1
+        document.settle_lines(i + 1)
+        chunk: Chunk = document.chunks[i]
+        if chunk.head:
+            self.heads[len(self.tokens)] = i
+        if chunk.scan_errors:
+            self.scan_errors.append((i, document.absolute(i, chunk.scan_errors)))
+        self.add_chunk(i, True)
+
+    def add_chunk(self, i: int, reusable: bool) -> None:
+        chunk: Chunk = self.document.chunks[i]
+        if reusable and chunk.whole:
+            self.reusable[len(self.tokens)] = i
+        self.add_tokens(chunk.tokens, self.document.chunk_base(i), chunk.ends)
+
+    def add_tokens(self, tokens: list[Token], base: int, ends: list[int]) -> None:
+        if not tokens:
+            return
+        self.firsts.append(len(self.tokens))
+        self.bases.append(base)
+        self.ends.append(ends)
+        self.tokens += tokens
+
+    # absolute ends of the tokens from first to stop
+    def token_ends(self, first: int, stop: int) -> list[int]:
+        result: list[int] = []
+        run: int = bisect_right(self.firsts, first) - 1
+        while first < stop:
+            offset: int = self.firsts[run]
+            upto: int = min(stop, offset + len(self.ends[run]))
+            base: int = self.bases[run]
+            result += [base + end for end in self.ends[run][first - offset:upto - offset]]
+            first = upto
+            run += 1
+        return result
+
+# a source text kept scanned and parsed across edits. An edit is scanned again from the end of the chunk before it,
+# and parsed again from the head of that chunk's declaration until the parse lands on a head past the edit, from
+# where the old tokens and trees stay. The chunks after an edit move lazily: those from char_fixed and line_fixed
+# on are still off by char_delta and line_delta, which edits close to the last one mostly leave alone
+class IncrementalParser:
+    def __init__(self, source: str='') -> None:
+        self.source: str = ''
+        self.chunks: list[Chunk] = []
+        # the stmt of each chunk, of which the heads' make up the tree
+        self.stmts: list[Stmt] = []
+        # 1 for each head, and for each chunk with errors to report, so that finding them is a scan in C
+        self.heads: bytearray = bytearray()
+        self.errored: bytearray = bytearray()
+        self.eof_line: int = 1
+        self.char_fixed: int = 0
+        self.char_delta: int = 0
+        self.line_fixed: int = 0
+        self.line_delta: int = 0
+        # scan errors after the last chunk, with offsets from the end of the source and lines from the last one
+        self.tail_errors: list[tuple[int, int, str, str]] = []
+        self.edit(0, 0, source)
+
+    @property
+    def statements(self) -> list[Stmt]:
+        self.settle_lines(len(self.chunks))
+        return list(compress(self.stmts, self.heads))
+
+    @property
+    def diagnostics(self) -> list[str]:
+        # a full scan reports every scan error before the parser starts
+        scan_errors: list[str] = []
+        parse_errors: list[str] = []
+        i: int = self.errored.find(1)
+        while i != -1:
+            chunk: Chunk = self.chunks[i]
+            shift: int = self.line_delta if i >= self.line_fixed else 0
+            scan_errors += [format_error(line + shift, where, message) for _, line, where, message in chunk.scan_errors]
+            if chunk.head:
+                parse_errors += [format_error(line + shift, where, message) for line, where, message in chunk.parse_errors]
+            i = self.errored.find(1, i + 1)
+        scan_errors += [format_error(self.eof_line + line, where, message) for _, line, where, message in self.tail_errors]
+        return scan_errors + parse_errors
+
+    # replaces source[start:end] with text and returns the diagnostics of the whole source afterwards
+    def edit(self, start: int, end: int, text: str) -> list[str]:
+        # an edit only allocates, so the collector would just rescan the tokens it pulls in over and over
+        collecting: bool = gc.isenabled()
+        gc.disable()
+        try:
+            self.splice(start, end, text)
+        finally:
+            if collecting:
+                gc.enable()
+        return self.diagnostics
+
+    def splice(self, start: int, end: int, text: str) -> None:
+        source: str = self.source
+        char_delta: int = len(text) - (end - start)
+        line_delta: int = text.count('\n') - source.count('\n', start, end)
+        self.source = source = source[:start] + text + source[end:]
+        self.eof_line += line_delta
+        chunks: list[Chunk] = self.chunks
+        # first is the first chunk the edit may touch or run into, and after the first one past it. The parse starts
+        # at the head of the chunk before first, since what follows that chunk may now parse differently
+        first: int = self.search(lambda i: self.chunk_end(i) >= start)
+        after: int = self.search(lambda i: self.chunk_start(i) > end)
+        reparse: int = max(self.heads.rfind(1, 0, first), 0)
+        owned: int = self.heads.find(1, after)
+        if owned == -1:
+            owned = len(chunks)
+        self.settle_chars(first)
+        self.settle_lines(max(first, owned))
+        # the tree of the declaration the edit is in goes, so the declarations inside it move their own lines again
+        for chunk in chunks[reparse:owned]:
+            chunk.nested = False
+        pos: int = 0
+        line: int = 1
+        if first > 0:
+            pos = self.chunk_end(first - 1)
+            line = chunks[first - 1].tokens[-1].line
+        self.move_chars(after, char_delta)
+        self.move_lines(after, line_delta)
+
+        # scan up to where an unchanged chunk starts, further out each time that lands inside a token or comment
+        reporter: DiagnosticReporter = DiagnosticReporter()
+        resume: int = after
+        step: int = 1
+        while True:
+            final: bool = resume == len(chunks)
+            scanner: RegionScanner = RegionScanner(source, line, reporter)
+            if scanner.scan_region(pos, len(source) if final else self.chunk_start(resume), final):
+                break
+            resume = min(resume + step, len(chunks))
+            step *= 2
+
+        scan_errors: list[tuple[int, int, str, str]] = []
+        parser: RegionParser = RegionParser(self, resume)
+        # the chunk just before the edit looked one token past its end, and that token may have changed
+        for i in range(reparse, first):
+            scan_errors += self.absolute(i, chunks[i].scan_errors)
+            parser.add_chunk(i, i < first - 1)
+        parser.add_tokens(scanner.tokens, 0, scanner.ends)
+        scan_errors += scanner.errors
+        if reparse < first:
+            pos = self.chunk_start(reparse)
+        fresh: list[Chunk] = []
+        kept: int = None
+        with reporting(reporter):
+            while not parser.tok_end():
+                kept = parser.heads.get(parser.cur)
+                if kept is not None:
+                    break
+                top: int = parser.cur
+                reported: int = len(reporter.items)
+                parser.reused.clear()
+                stmt: Stmt = parser.declaration()
+                # the declaration's tokens, split into the declarations it took over and chunks for the rest
+                head: int = len(fresh)
+                begin: int = top
+                for token, i in parser.reused:
+                    if token > begin:
+                        fresh.append(self.new_chunk(parser, begin, token))
+                    chunk: Chunk = chunks[i]
+                    chunk.base = self.chunk_base(i)
+                    chunk.head = False
+                    chunk.nested = stmt is not None
+                    fresh.append(chunk)
+                    begin = token + len(chunk.tokens)
+                if begin < parser.cur:
+                    fresh.append(self.new_chunk(parser, begin, parser.cur))
+                chunk = fresh[head]
+                chunk.head = True
+                chunk.nested = False
+                chunk.whole = len(fresh) == head + 1
+                chunk.stmt = stmt
+                chunk.parse_errors = reporter.items[reported:]
+                for chunk in fresh[head:]:
+                    chunk.start = pos
+                    pos = chunk.base + chunk.ends[-1]
+        stop: int = len(chunks) if kept is None else kept
+
+        # scan errors go to the chunk whose gap or tokens they are in, and the rest to the gap after the last one
+        for i, errors in parser.scan_errors:
+            if i < stop:
+                scan_errors += errors
+        for chunk in fresh:
+            chunk.scan_errors = []
+        owner: int = 0
+        leftover: list[tuple[int, int, str, str]] = []
+        for item in scan_errors:
+            if not fresh or item[0] >= pos:
+                leftover.append(item)
+                continue
+            while owner + 1 < len(fresh) and fresh[owner + 1].start <= item[0]:
+                owner += 1
+            chunk = fresh[owner]
+            chunk.scan_errors.append((item[0] - chunk.base, *item[1:]))
+
+        if kept is None:
+            # the old tail only goes when the scan reached the end of the source
+            tail: list[tuple[int, int, str, str]] = [] if final else self.tail_errors
+            self.tail_errors = [(offset - len(source), line - self.eof_line, where, message) for offset, line, where, message in leftover] + tail
+        else:
+            chunk = chunks[kept]
+            base: int = self.chunk_base(kept)
+            chunk.scan_errors = [(offset - base, *item) for offset, *item in leftover] + chunk.scan_errors
+            self.errored[kept] = reports(chunk)
+            self.set_start(kept, pos)
+
+        chunks[reparse:stop] = fresh
+        self.stmts[reparse:stop] = [chunk.stmt for chunk in fresh]
+        self.heads[reparse:stop] = bytes(chunk.head for chunk in fresh)
+        self.errored[reparse:stop] = bytes(reports(chunk) for chunk in fresh)
+        self.char_fixed = self.replaced(self.char_fixed, reparse, stop, len(fresh))
+        self.line_fixed = self.replaced(self.line_fixed, reparse, stop, len(fresh))
+
+    # Helper functions
+    def new_chunk(self, parser: RegionParser, first: int, stop: int) -> Chunk:
+        ends: list[int] = parser.token_ends(first, stop)
+        return Chunk(ends[0], parser.tokens[first:stop], ends)
+
+    def search(self, predicate: Callable[[int], bool]) -> int:
+        low: int = 0
+        high: int = len(self.chunks)
+        while low < high:
+            middle: int = (low + high) // 2
+            if predicate(middle):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def chunk_start(self, i: int) -> int:
+        return self.chunks[i].start + (self.char_delta if i >= self.char_fixed else 0)
+
+    def chunk_base(self, i: int) -> int:
+        return self.chunks[i].base + (self.char_delta if i >= self.char_fixed else 0)
+
+    def chunk_end(self, i: int) -> int:
+        return self.chunk_base(i) + self.chunks[i].ends[-1]
+
+    def set_start(self, i: int, start: int) -> None:
+        self.chunks[i].start = start - (self.char_delta if i >= self.char_fixed else 0)
+
+    def absolute(self, i: int, errors: list[tuple[int, int, str, str]]) -> list[tuple[int, int, str, str]]:
+        base: int = self.chunk_base(i)
+        return [(base + offset, *item) for offset, *item in errors]
+
+    # where a fixed pointer goes once count chunks replace the ones from start to stop
+    @staticmethod
+    def replaced(fixed: int, start: int, stop: int, count: int) -> int:
+        return fixed + count - (stop - start) if fixed >= stop else start + count
+
+    def settle_chars(self, upto: int) -> None:
+        if self.char_fixed >= upto:
+            return
+        if self.char_delta:
+            for chunk in self.chunks[self.char_fixed:upto]:
+                chunk.start += self.char_delta
+                chunk.base += self.char_delta
+        self.char_fixed = upto
+
+    def settle_lines(self, upto: int) -> None:
+        if self.line_fixed >= upto:
+            return
+        if self.line_delta:
+            for chunk in self.chunks[self.line_fixed:upto]:
+                shift_chunk(chunk, self.line_delta)
+        self.line_fixed = upto
+
+    # chunks from first on move by delta characters. What is pending from an edit further on is settled rather than
+    # shifting the chunks in between, which would be repeated on every keystroke here
+    def move_chars(self, first: int, delta: int) -> None:
+        if not delta:
+            return
+        if self.char_fixed < first:
+            self.settle_chars(first)
+        elif self.char_fixed > first:
+            self.settle_chars(len(self.chunks))
+            self.char_fixed = first
+            self.char_delta = 0
+        self.char_delta += delta
+
+    # shifting a chunk's lines walks its tree, so when lines are still pending from an edit further on, whichever of
+    # the chunks between the two edits and the ones pending is the shorter run gets shifted
+    def move_lines(self, first: int, delta: int) -> None:
+        if not delta:
+            return
+        if self.line_fixed < first:
+            self.settle_lines(first)
+        elif self.line_fixed > first and self.line_delta:
+            if self.line_fixed - first <= len(self.chunks) - self.line_fixed:
+                for chunk in self.chunks[first:self.line_fixed]:
+                    shift_chunk(chunk, delta)
+                self.line_delta += delta
+                return
+            self.settle_lines(len(self.chunks))
+        if self.line_fixed > first:
+            # nothing is pending
+            self.line_fixed = first
+            self.line_delta = 0
+        self.line_delta += delta
+
+def reports(chunk: Chunk) -> bool:
+    return bool(chunk.scan_errors or chunk.head and chunk.parse_errors)
+
+def shift_chunk(chunk: Chunk, delta: int) -> None:
+    for token in chunk.tokens:
+        token.line += delta
+    if not chunk.nested:
+        shift_lines(chunk.stmt, delta)
+    chunk.scan_errors = [(offset, line + delta, where, message) for offset, line, where, message in chunk.scan_errors]
+    chunk.parse_errors = [(line + delta, where, message) for line, where, message in chunk.parse_errors]
+
+# the nodes or lists of nodes each node holds, and the nodes that keep a line of their own
+children: dict[type, Callable[[object], tuple]] = {
+    Assign: lambda node: (node.value,),
+    Binary: lambda node: (node.left, node.right),
+    Call: lambda node: (node.callee, node.arguments),
+    Grouping: lambda node: (node.expression,),
+    Literal: lambda node: (),
+    Logical: lambda node: (node.left, node.right),
+    Unary: lambda node: (node.right,),
+    Variable: lambda node: (),
+    Expression: lambda node: (node.expression,),
+    Function: lambda node: (node.body,),
+    If: lambda node: (node.condition, node.then_branch, node.else_branch),
+    While: lambda node: (node.condition, node.body),
+    Print: lambda node: (node.expression,),
+    Return: lambda node: (node.value,),
+    Var: lambda node: (node.initializer,),
+    Block: lambda node: (node.statements,)
+}
+line_nodes: frozenset[type] = frozenset({Binary, Logical, Unary, Expression, Function, If, While, Print, Return, Block})
+
+# tokens move with their chunk, this moves the lines that statements and operator nodes keep for themselves
+def shift_lines(node: object, delta: int) -> None:
+    stack: list[object] = [node]
+    while stack:
+        node = stack.pop()
+        kind: type = type(node)
+        if kind is list:
+            stack += node
+        elif node is not None:
+            if kind in line_nodes:
+                node.line += delta
+            stack += children[kind](node)
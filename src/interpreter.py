@@ -1,28 +1,92 @@
+import sys
+from typing import TextIO, Callable
 from expressions import *
 from statements import *
 from visitor import Visitor
-from environment import Environment
+from environment import Environment, LocalEnvironment
 from token_type import TokenType
 from error import error, RuntimeErr
+from quicken import MISS, respecialize_limit, specialize_binary, specialize_unary
+from rope import string_types, concat
+from numarray import arithmetic, negate_array
+from natives import natives, call_value
+from functions import LoxFunction
+from output import Output, active_output, format_number
+
+default_jit_threshold: int = 1000
+max_deopts: int = 4
+
+# nested Lox calls past this depth stop with 'Stack overflow.'
+max_call_depth: int = 10_000
+# a Lox call takes about eight Python frames. From 3.11 on, Python calls don't recurse in C, so the limit can be
+# raised to fit max_call_depth; before that, the C stack would overflow first and crash, so the default limit stays
+# and recursion runs out of it after a hundred or so calls
+recursion_limit: int = 100_000 if sys.version_info >= (3, 11) else 0
+
+# cached on a While node whose loop can't be compiled
+NOT_COMPILABLE: object = object()
+
+# statement visitors return None, or one of these while a return statement unwinds to its call
+RETURN: object = object()
+TAIL_CALL: object = object()
 
 class Interpreter(Visitor):
     def __init__(self):
-        self.environ: Environment = Environment()
+        self.globals: Environment = Environment()
+        self.globals.values.update(natives)
+        self.environ: object = self.globals
+        self.quickened: list[Operator] = []
+        self.jit_threshold: int = default_jit_threshold
+        self.jit_log: TextIO = None
+        self.output: Output = active_output()
+        self.block_entries: int = 0
+        self.environments: int = 0
+        self.returned: object = None
+        self.tail_function: LoxFunction = None
+        self.tail_frame: LocalEnvironment = None
+        # with a hook, loop iterations, calls and top-level statements each take a step, and the hook is called
+        # whenever steps runs out: it returns the next budget, or raises Interrupt to stop the program
+        self.step_hook: Callable[[], int] = None
+        self.steps: int = 0
+        self.depth: int = 0
 
     def interpret(self, stmts: list[Stmt]) -> None:
+        self.output = active_output()
+        if sys.getrecursionlimit() < recursion_limit:
+            sys.setrecursionlimit(recursion_limit)
+        stepped: bool = self.step_hook is not None
         try:
             for stmt in stmts:
                 stmt.accept(self)
+                if stepped:
+                    self.steps -= 1
+                    if self.steps <= 0:
+                        self.steps = self.step_hook()
         except RuntimeErr as err:
             error(line=err.token.line, token=err.token, msg=err.message)
             return None
 
+    def reset(self) -> None:
+        self.globals.values.clear()
+        self.globals.values.update(natives)
+        self.environ = self.globals
+        # a pooled interpreter would otherwise keep every program it ran alive through the quickened nodes
+        self.quickened.clear()
+        self.block_entries = 0
+        self.environments = 0
+        self.returned = None
+        self.tail_function = None
+        self.tail_frame = None
+        self.step_hook = None
+        self.steps = 0
+        self.depth = 0
+
     def visit_literal_expr(self, expr: Literal) -> object:
         return expr.value
 
     def visit_logical_expr(self, expr: Logical) -> object:
         left: object = expr.left.accept(self)
-        if (expr.operator.type == TokenType.OR):
+        if (expr.op == TokenType.OR):
             if self.is_truthy(left):
                 return left
         else:
@@ -35,127 +99,321 @@ class Interpreter(Visitor):
 
     def visit_unary_expr(self, expr: Unary) -> object:
         right: object = expr.right.accept(self)
-        if expr.operator.type == TokenType.MINUS:
-            self.check_operands(right)
-            return -float(right)
-        if expr.operator.type == TokenType.BANG:
+        handler = expr.handler
+        if handler is not None:
+            result: object = handler(right)
+            if result is not MISS:
+                expr.hits += 1
+                return result
+            expr.misses += 1
+            if expr.misses >= respecialize_limit:
+                expr.handler = None
+        if expr.misses < respecialize_limit:
+            self.quicken(expr, specialize_unary(expr.op, right))
+        if expr.op == TokenType.MINUS:
+            if type(right) is not float:
+                return negate_array(right, expr.operator)
+            return -right
+        if expr.op == TokenType.BANG:
             return not self.is_truthy(right)
         return None
 
     def visit_variable_expr(self, expr: Variable) -> object:
-        return self.environ.get(expr.name)
+        if expr.depth is None:
+            return self.globals.get(expr.name)
+        return self.environ.get_at(expr.depth, expr.slot)
 
     def visit_assign_expr(self, expr: Assign) -> object:
         value: object = expr.value.accept(self)
-        self.environ.assign(expr.name, value)
+        if expr.depth is None:
+            self.globals.assign(expr.name, value)
+        else:
+            self.environ.assign_at(expr.depth, expr.slot, value)
         return value
 
     def visit_binary_expr(self, expr: Binary) -> object:
         left: object = expr.left.accept(self)
         right: object = expr.right.accept(self)
-        if expr.operator.type == TokenType.GREATER:
-            self.check_operands(expr.operator, left, right)
-            return float(left) > float(right)
-        if expr.operator.type == TokenType.GREATER_EQUAL:
-            self.check_operands(expr.operator, left, right)
-            return float(left) >= float(right)
-        if expr.operator.type == TokenType.LESS:
-            self.check_operands(expr.operator, left, right)
-            return float(left) < float(right)
-        if expr.operator.type == TokenType.LESS_EQUAL:
-            self.check_operands(expr.operator, left, right)
-            return float(left) <= float(right)
-        if expr.operator.type == TokenType.MINUS:
-            self.check_operands(expr.operator, left, right)
-            return float(left) - float(right)
-        if expr.operator.type == TokenType.BANG_EQUAL:
-            return not self.is_equal(left, right)
-        if expr.operator.type == TokenType.EQUAL_EQUAL:
+        handler = expr.handler
+        if handler is not None:
+            result: object = handler(left, right)
+            if result is not MISS:
+                expr.hits += 1
+                return result
+            expr.misses += 1
+            if expr.misses >= respecialize_limit:
+                expr.handler = None
+        if expr.misses < respecialize_limit:
+            self.quicken(expr, specialize_binary(expr.op, left, right))
+        return self.binary_op(expr, left, right)
+
+    def binary_op(self, expr: Binary, left: object, right: object) -> object:
+        op: TokenType = expr.op
+        if op == TokenType.PLUS:
+            if type(left) is float and type(right) is float:
+                return left + right
+            if isinstance(left, string_types) and isinstance(right, string_types):
+                return concat(left, right)
+            return arithmetic(left, right, expr.operator, 'Operands must be two numbers or two strings.')
+        if op == TokenType.EQUAL_EQUAL:
             return self.is_equal(left, right)
-        if expr.operator.type == TokenType.SLASH:
-            self.check_operands(expr.operator, left, right)
-            if float(right) == 0.0:
+        if op == TokenType.BANG_EQUAL:
+            return not self.is_equal(left, right)
+        if op == TokenType.MODULO:
+            if type(left) is float and type(right) is float:
+                if right == 0.0:
+                    raise RuntimeErr(expr.operator, 'Can\'t divide by zero.')
+                return left % right
+            return arithmetic(left, right, expr.operator, 'Modulo operator must take two numbers as arguments')
+        if type(left) is not float or type(right) is not float:
+            return arithmetic(left, right, expr.operator, 'Operand must be a number.')
+        if op == TokenType.GREATER:
+            return left > right
+        if op == TokenType.GREATER_EQUAL:
+            return left >= right
+        if op == TokenType.LESS:
+            return left < right
+        if op == TokenType.LESS_EQUAL:
+            return left <= right
+        if op == TokenType.MINUS:
+            return left - right
+        if op == TokenType.STAR:
+            return left * right
+        if op == TokenType.SLASH:
+            if right == 0.0:
                 raise RuntimeErr(expr.operator, 'Can\'t divide by zero.')
-            return float(left) / float(right)
-        if expr.operator.type == TokenType.STAR:
-            self.check_operands(expr.operator, left, right)
-            return float(left) * float(right)
-        if expr.operator.type == TokenType.MODULO:
-            if isinstance(left, float) and isinstance(right, float):
-                return float(left) % float(right)
-            raise RuntimeErr(expr.operator, 'Modulo operator must take two numbers as arguments')
-        if expr.operator.type == TokenType.PLUS:
-            if isinstance(left, float) and isinstance(right, float):
-                return float(left) + float(right)
-            if isinstance(left, str) and isinstance(right, str):
-                return str(left) + str(right) 
-            raise RuntimeErr(expr.operator, 'Operands must be two numbers or two strings.')
+            return left / right
         return None
-    
+
+    def visit_call_expr(self, expr: Call) -> object:
+        callee: object = expr.callee.accept(self)
+        if type(callee) is not LoxFunction:
+            return call_value(callee, [argument.accept(self) for argument in expr.arguments], expr.paren)
+        if self.depth >= max_call_depth:
+            raise RuntimeErr(expr.paren, 'Stack overflow.')
+        self.depth += 1
+        try:
+            return self.call(callee, self.bind(callee, expr))
+        except RecursionError:
+            raise RuntimeErr(expr.paren, 'Stack overflow.') from None
+        finally:
+            self.depth -= 1
+
+    # evaluates the arguments straight into the slots of a new frame
+    def bind(self, function: LoxFunction, expr: Call) -> LocalEnvironment:
+        arguments: list[Expr] = expr.arguments
+        arity: int = len(function.declaration.params)
+        if len(arguments) != arity:
+            for argument in arguments:
+                argument.accept(self)
+            raise RuntimeErr(expr.paren, f'Expected {arity} arguments but got {len(arguments)}.')
+        frame: LocalEnvironment = LocalEnvironment(function.closure, function.declaration.slot_count)
+        slots: list[object] = frame.slots
+        index: int = 0
+        for argument in arguments:
+            slots[index] = argument.accept(self)
+            index += 1
+        return frame
+
+    # a tail call hands its function and frame back here instead of calling, so tail recursion runs in a loop
+    def call(self, function: LoxFunction, frame: LocalEnvironment) -> object:
+        previous: object = self.environ
+        stepped: bool = self.step_hook is not None
+        try:
+            while True:
+                if stepped:
+                    self.steps -= 1
+                    if self.steps <= 0:
+                        self.steps = self.step_hook()
+                self.environ = frame
+                for stmt in function.declaration.body:
+                    signal: object = stmt.accept(self)
+                    if signal is not None:
+                        break
+                else:
+                    return None
+                if signal is RETURN:
+                    value: object = self.returned
+                    self.returned = None
+                    return value
+                function = self.tail_function
+                frame = self.tail_frame
+                self.tail_function = None
+                self.tail_frame = None
+        finally:
+            self.environ = previous
+
+    def quicken(self, expr: Operator, handler: object) -> None:
+        if handler is not None and handler is not expr.handler:
+            if expr.handler is None:
+                self.quickened.append(expr)
+            expr.handler = handler
+
     def visit_expression_stmt(self, stmt: Expression) -> None:
         stmt.expression.accept(self)
 
-    def visit_if_stmt(self, stmt: If) -> None:
+    def visit_function_stmt(self, stmt: Function) -> None:
+        function: LoxFunction = LoxFunction(stmt, self.environ)
+        if stmt.slot is None:
+            self.globals.define(stmt.name.lexeme, function)
+        else:
+            self.environ.slots[stmt.slot] = function
+
+    def visit_return_stmt(self, stmt: Return) -> object:
+        value: Expr = stmt.value
+        if type(value) is Call:
+            callee: object = value.callee.accept(self)
+            if type(callee) is LoxFunction:
+                self.tail_frame = self.bind(callee, value)
+                self.tail_function = callee
+                return TAIL_CALL
+            self.returned = call_value(callee, [argument.accept(self) for argument in value.arguments], value.paren)
+            return RETURN
+        self.returned = value.accept(self) if value is not None else None
+        return RETURN
+
+    def visit_if_stmt(self, stmt: If) -> object:
         if self.is_truthy(stmt.condition.accept(self)):
-            stmt.then_branch.accept(self)
-        elif stmt.else_branch is not None:
-            stmt.else_branch.accept(self)
+            return stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            return stmt.else_branch.accept(self)
         return None
     
     def visit_print_stmt(self, stmt: Print) -> None:
         value: object = stmt.expression.accept(self)
-        print(self.stringify(value))
+        self.output.write_line(self.stringify(value))
     
     def visit_var_stmt(self, stmt: Var) -> None:
         value: object = None
         if stmt.initializer is not None:
             value = stmt.initializer.accept(self)
-        self.environ.define(stmt.name.lexeme, value)
+        if stmt.slot is None:
+            self.globals.define(stmt.name.lexeme, value)
+        else:
+            self.environ.slots[stmt.slot] = value
 
-    def visit_while_stmt(self, stmt: While) -> None:
+    def visit_while_stmt(self, stmt: While) -> object:
+        threshold: int = self.jit_threshold
+        if threshold and stmt.iterations >= threshold and self.tier_up(stmt):
+            return None
+        stepped: bool = self.step_hook is not None
+        body: Stmt = stmt.body
+        environment: LocalEnvironment = None
+        if type(body) is Block and body.slot_count and not body.captured:
+            # nothing can hold on to the environment once an iteration ends, so every iteration can share one
+            environment = LocalEnvironment(self.environ, body.slot_count)
+            self.environments += 1
         while self.is_truthy(stmt.condition.accept(self)):
-            stmt.body.accept(self)
+            if environment is not None:
+                self.block_entries += 1
+                signal: object = self.execute_block(body.statements, environment)
+            else:
+                signal = body.accept(self)
+            if signal is not None:
+                return signal
+            if stepped:
+                self.steps -= 1
+                if self.steps <= 0:
+                    self.steps = self.step_hook()
+            if threshold:
+                stmt.iterations += 1
+                if stmt.iterations >= threshold and self.tier_up(stmt):
+                    return None
         return None
+
+    # runs the rest of the loop as compiled code, False means keep walking the tree
+    def tier_up(self, stmt: While) -> bool:
+        # an interpreter on a step budget needs the variant of the loop that counts its steps
+        stepped: bool = self.step_hook is not None
+        compiled: object = stmt.stepped if stepped else stmt.compiled
+        if compiled is NOT_COMPILABLE:
+            return False
+        if compiled is None:
+            # imported here since the loop compiler builds on the transpiler, which imports this module
+            from tiering import compile_loop, NotCompilable
+            try:
+                compiled, guards = compile_loop(stmt, self.environ, self.globals.values, stepped)
+            except (NotCompilable, KeyError, SyntaxError, RecursionError, MemoryError):
+                stmt.compiled = stmt.stepped = NOT_COMPILABLE
+                self.log_jit(f'loop at line {stmt.line} can\'t be compiled')
+                return False
+            self.set_compiled(stmt, stepped, compiled)
+            described: str = ', '.join(f'{name}: {kind.__name__}' for name, kind in guards.items())
+            self.log_jit(f'compiled loop at line {stmt.line} after {stmt.iterations} iterations'
+                         f' (guards: {described or "none"})')
+        if compiled(self.environ, self.globals.values, self):
+            return True
+        stmt.deopts += 1
+        stmt.iterations = 0
+        self.set_compiled(stmt, stepped, NOT_COMPILABLE if stmt.deopts >= max_deopts else None)
+        self.log_jit(f'guard failed for loop at line {stmt.line}, deoptimized to the tree walker'
+                     f' ({stmt.deopts} of {max_deopts})')
+        return False
+
+    @staticmethod
+    def set_compiled(stmt: While, stepped: bool, compiled: object) -> None:
+        if stepped:
+            stmt.stepped = compiled
+        else:
+            stmt.compiled = compiled
+
+    def scope_report(self) -> str:
+        avoided: int = self.block_entries - self.environments
+        rate: float = avoided / self.block_entries * 100 if self.block_entries else 0.0
+        return (f'scopes: {self.block_entries} block entries, {self.environments} environments allocated, '
+                f'{avoided} avoided ({rate:.1f}%)')
+
+    def log_jit(self, message: str) -> None:
+        if self.jit_log is not None:
+            self.output.flush()
+            print(f'jit: {message}', file=self.jit_log)
      
-    def visit_block_stmt(self, stmt: Block) -> None:
-        self.execute_block(stmt.statements, Environment(self.environ))
-        return None
+    def visit_block_stmt(self, stmt: Block) -> object:
+        self.block_entries += 1
+        if not stmt.slot_count:
+            for inner in stmt.statements:
+                signal: object = inner.accept(self)
+                if signal is not None:
+                    return signal
+            return None
+        self.environments += 1
+        return self.execute_block(stmt.statements, LocalEnvironment(self.environ, stmt.slot_count))
 
-    def execute_block(self, statements: list[Stmt], environment: Environment) -> None:
-        previous: Environment = self.environ
+    def execute_block(self, statements: list[Stmt], environment: LocalEnvironment) -> object:
+        previous: object = self.environ
         try:
             self.environ = environment
             for stmt in statements:
-                stmt.accept(self)
+                signal: object = stmt.accept(self)
+                if signal is not None:
+                    return signal
+            return None
         finally:
             self.environ = previous
 
     # Utilities
-    def is_truthy(self, obj: object) -> bool:
+    @staticmethod
+    def is_truthy(obj: object) -> bool:
         if obj is None:
             return False
         if isinstance(obj, bool):
             return bool(obj)
         return True
 
-    def is_equal(self, a: object, b: object) -> bool:
+    @staticmethod
+    def is_equal(a: object, b: object) -> bool:
         if a is None and b is None:
             return True
         if a is None:
             return False
         return a == b
 
-    def check_operands(self, operator: Token, *operands: list[object]) -> None:
-        for operand in operands:
-            if not isinstance(operand, float):
-                raise RuntimeErr(operator, 'Operand must be a number.')
-    
-    def stringify(self, obj: object) -> str:
+    @staticmethod
+    def stringify(obj: object) -> str:
+        if type(obj) is str:
+            return obj
+        if type(obj) is float:
+            return format_number(obj)
         if obj is None:
             return 'none'
-        if isinstance(obj, float):
-            text: str = str(obj)
-            if text.endswith('.0'):
-                return text[:len(text)-2]
-            return text
         return str(obj)
@@ -1,57 +1,291 @@
 #!/usr/bin/env python3
 
-from sys import argv, exit
-from error import get_err_status, set_err_status
+import os
+from sys import exit, stderr, stdout
+from argparse import ArgumentParser, Namespace
+from error import error, get_err_status, set_err_status, SnapshotErr
 from token_cls import Token
-from statements import Stmt
-from scanner import Scanner
+from statements import Stmt, Function, Block, If, While
+from fast_scanner import FastScanner
 from token_parser import Parser
-from interpreter import Interpreter
+from resolver import Resolver
+from interpreter import Interpreter, default_jit_threshold
+from compiler import Compiler
+from chunk import Chunk, disassemble
+from vm import VM
+from closure_compiler import ClosureCompiler
+from transpiler import Transpiler
+from optimizer import Optimizer
+from streaming import run_streaming
+from token_buffer import TokenBuffer, BufferParser
+from cache import ProgramCache, clear_cache
+from version import version
+from runtime import LoxRuntime, Session
+from quicken import quickening_report
+from profiler import ProfilingInterpreter
+from output import Output, StdoutSink, FileSink, active_output, writing, flush_policies
+from batch import run_batch, read_manifest
+from snapshot import save_snapshot, load_snapshot
+
+backends: list[str] = ['tree', 'vm', 'closure', 'transpile']
 
 def main() -> None:
-    if len(argv) > 2:
-        raise Exception("Usage: jlox [script]")
-    elif len(argv) == 2:
-        run_script(argv[1])
-    else:
-        run_prompt()
+    arg_parser: ArgumentParser = ArgumentParser(prog='lox', usage='%(prog)s [options] [script ...]')
+    arg_parser.add_argument('scripts', nargs='*', metavar='script',
+                            help='script to run; several scripts are run as a batch')
+    arg_parser.add_argument('--backend', choices=backends, default='tree',
+                            help='execution backend (default: tree)')
+    arg_parser.add_argument('-O', '--optimize', action='store_true',
+                            help='fold constants and prune dead branches before running')
+    arg_parser.add_argument('--opt-report', action='store_true',
+                            help='report how many nodes the optimizer removed (with -O)')
+    arg_parser.add_argument('--transpile', dest='backend', action='store_const', const='transpile',
+                            help='compile the script to Python source and run that (same as --backend=transpile)')
+    arg_parser.add_argument('--dump-python', action='store_true',
+                            help='print the generated Python before running (transpile backend)')
+    arg_parser.add_argument('--disassemble', action='store_true',
+                            help='print the compiled bytecode before running (vm backend)')
+    arg_parser.add_argument('--stream', action='store_true',
+                            help='scan, parse and run the script one top-level declaration at a time')
+    arg_parser.add_argument('--compact-tokens', action='store_true',
+                            help='keep tokens in a compact column buffer over the memory-mapped script')
+    arg_parser.add_argument('--quicken-stats', action='store_true',
+                            help='report per-node hit and miss counts of the specialized operators (tree backend)')
+    arg_parser.add_argument('--scope-stats', action='store_true',
+                            help='report how many block entries needed a new environment (tree backend)')
+    arg_parser.add_argument('--jit-threshold', type=int, default=default_jit_threshold, metavar='N',
+                            help=f'compile a while loop to Python after N iterations, 0 disables (tree backend, default: {default_jit_threshold})')
+    arg_parser.add_argument('--jit-log', action='store_true',
+                            help='report compiled loops and deoptimizations on stderr (tree backend)')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='time every statement and expression and print the busiest lines and nodes (tree backend)')
+    arg_parser.add_argument('--profile-stacks', metavar='FILE',
+                            help='with --profile, also write collapsed stacks for flamegraph tools to FILE')
+    arg_parser.add_argument('--flush', choices=flush_policies,
+                            help='when printed output is written out: every line, in 64 KiB blocks, or at exit '
+                                 '(default: line on a terminal, block otherwise)')
+    arg_parser.add_argument('--output', metavar='FILE',
+                            help='write printed output to FILE instead of stdout')
+    arg_parser.add_argument('--jobs', type=int, metavar='N',
+                            help='run a batch of scripts on N worker processes (default: one per CPU)')
+    arg_parser.add_argument('--manifest', metavar='FILE',
+                            help='add the scripts listed in FILE, one path per line, to the batch')
+    arg_parser.add_argument('--summary', metavar='FILE',
+                            help='write per-script status, timings and captured output of a batch to FILE as JSON')
+    arg_parser.add_argument('--snapshot', metavar='FILE',
+                            help='once the script has run, save its globals and everything they reference to FILE (tree backend)')
+    arg_parser.add_argument('--restore', metavar='FILE',
+                            help='start with the globals saved in FILE by --snapshot instead of running their setup again (tree backend)')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='always scan and parse the script, and leave the program cache untouched')
+    arg_parser.add_argument('--clear-cache', action='store_true',
+                            help='remove the program cache next to the script (or in the current directory)')
+    options: Namespace = arg_parser.parse_args()
+    scripts: list[str] = options.scripts + (read_manifest(options.manifest) if options.manifest is not None else [])
+    batch: bool = len(scripts) > 1 or options.jobs is not None or options.manifest is not None
+    options.script = scripts[0] if scripts else None
+    if options.clear_cache:
+        clear_cache(os.path.dirname(os.path.abspath(options.script)) if options.script is not None else os.getcwd())
+        if options.script is None:
+            exit(0)
+    if options.stream and (options.backend != 'tree' or options.optimize or options.compact_tokens):
+        arg_parser.error('--stream only supports the tree backend without -O or --compact-tokens')
+    if options.profile and (options.backend != 'tree' or options.stream):
+        arg_parser.error('--profile only supports the tree backend without --stream')
+    if (options.snapshot or options.restore) and (options.backend != 'tree' or options.stream or options.profile):
+        arg_parser.error('--snapshot and --restore only support the tree backend without --stream or --profile')
+    if batch:
+        if (options.backend != 'tree' or options.stream or options.profile or options.compact_tokens
+                or options.snapshot or options.restore):
+            arg_parser.error('a batch of scripts only supports the tree backend without --stream, --profile, '
+                             '--compact-tokens, --snapshot or --restore')
+        # the reports are per interpreter, and a worker's interpreter runs many scripts
+        if options.jit_log or options.quicken_stats or options.scope_stats:
+            arg_parser.error('--jit-log, --quicken-stats and --scope-stats only report on a single script')
+        if options.jobs is not None and options.jobs < 1:
+            arg_parser.error('--jobs must be at least 1')
+        exit(run_batch(scripts, options))
+    policy: str = options.flush or ('line' if options.script is None or stdout.isatty() else 'block')
+    sink: object = FileSink(options.output) if options.output is not None else StdoutSink()
+    with writing(Output(sink, policy)):
+        if options.script is not None:
+            run_script(options.script, options)
+        else:
+            run_prompt(options)
 
-def run_script(path: str) -> None:
-    with open(path, 'r') as f:
-        text: list[str] = ''.join(f.readlines())
-    run(text)
+def run_script(path: str, options: Namespace=None) -> None:
+    if options is not None and options.stream:
+        run_streaming(path)
+        exit(1 if get_err_status() else 0)
+    interpreter: Interpreter = None
+    restored: set[str] = None
+    if options is not None and options.restore is not None:
+        interpreter = Interpreter()
+        restored = set(restore(interpreter, options.restore))
+    cache: ProgramCache = None
+    # pipes can only be read once, and a cached program has nothing left for --opt-report to report
+    if options is not None and not (options.no_cache or options.opt_report) and os.path.isfile(path):
+        cache = ProgramCache(path, options.optimize)
+        statements: list[Stmt] = cache.load()
+        if statements is not None:
+            run_program(statements, options, interpreter)
+            exit(1 if get_err_status() else 0)
+        if restored:
+            # a program resolved against restored globals may use names that a plain run would reject
+            cache = None
+    if options is not None and options.compact_tokens:
+        parser: Parser = BufferParser(TokenBuffer.from_file(path))
+    else:
+        with open(path, 'r') as f:
+            text: list[str] = ''.join(f.readlines())
+        parser = Parser(FastScanner(text).scan_tokens())
+    statements = compile_program(parser, options, restored)
+    if statements is not None:
+        if cache is not None:
+            cache.store(statements)
+        run_program(statements, options, interpreter)
     if get_err_status():
         exit(1)
     exit(0)
 
-def run_prompt() -> None:
+def run_prompt(options: Namespace=None) -> None:
     print(version_info())
+    session: Session = None
+    if options is None or options.backend == 'tree':
+        session = LoxRuntime(optimize=options is not None and options.optimize).session()
+        if options is not None and options.restore is not None:
+            session.resolver.globals.update(restore(session.interpreter, options.restore))
     is_running: bool = True
     while is_running:
         try:
+            active_output().flush()
             text: str = input('>> ')
             if text == '':
                 raise EOFError
+            elif session is not None:
+                session.execute(text)
             else:
-                run(text)
+                run(text, options)
                 set_err_status(False)
         except (KeyboardInterrupt, EOFError):
             print('')
             is_running = False
+    if session is not None:
+        session.finish()
+    if session is not None and options is not None and options.snapshot is not None:
+        snapshot(session.interpreter, options.snapshot)
     exit(0)
 
 def version_info() -> str:
-    return 'Welcome to python-lox 1.3.0!'
+    return f'Welcome to python-lox {version}!'
 
-def run(source: str) -> None:
-    scanner: Scanner = Scanner(source)
+def run(source: str, options: Namespace=None) -> None:
+    scanner: FastScanner = FastScanner(source)
     tokens: list[Token] = scanner.scan_tokens()
-    parser: Parser = Parser(tokens)
+    execute(Parser(tokens), options)
+
+def execute(parser: Parser, options: Namespace=None) -> None:
+    statements: list[Stmt] = compile_program(parser, options)
+    if statements is not None:
+        run_program(statements, options)
+
+def compile_program(parser: Parser, options: Namespace=None, known_globals: set[str]=None) -> list[Stmt]:
     statements: list[Stmt] = parser.parse()
     if get_err_status():
+        return None
+    resolver: Resolver = Resolver(known_globals)
+    resolver.resolve(statements)
+    if get_err_status():
+        return None
+    if options is not None and options.optimize:
+        optimizer: Optimizer = Optimizer()
+        statements = optimizer.optimize(statements)
+        if options.opt_report:
+            print(f'optimizer: removed {optimizer.removed} of {optimizer.nodes_before} nodes', file=stderr)
+    return statements
+
+# function declarations can only appear in blocks, so the branches of ifs and whiles are the only other place to look
+def find_function(statements: list[Stmt]) -> Function:
+    for stmt in statements:
+        if isinstance(stmt, Function):
+            return stmt
+        inner: list[Stmt] = []
+        if isinstance(stmt, Block):
+            inner = stmt.statements
+        elif isinstance(stmt, If):
+            inner = [stmt.then_branch, stmt.else_branch]
+        elif isinstance(stmt, While):
+            inner = [stmt.body]
+        found: Function = find_function([nested for nested in inner if nested is not None])
+        if found is not None:
+            return found
+    return None
+
+def run_program(statements: list[Stmt], options: Namespace=None, interpreter: Interpreter=None) -> None:
+    backend: str = options.backend if options is not None else 'tree'
+    if backend != 'tree':
+        declaration: Function = find_function(statements)
+        if declaration is not None:
+            error(token=declaration.name, msg=f'The {backend} backend can\'t run functions, use --backend=tree.')
+            return
+    if backend == 'vm':
+        chunk: Chunk = Compiler().compile(statements)
+        if options.disassemble:
+            print(disassemble(chunk, '<script>'))
+        VM().interpret(chunk)
         return
-    interpreter: Interpreter = Interpreter()
+    if backend == 'closure':
+        ClosureCompiler().interpret(statements)
+        return
+    if backend == 'transpile':
+        Transpiler().interpret(statements, dump=options.dump_python)
+        return
+    if options is not None and options.profile:
+        profile(statements, options)
+        return
+    if interpreter is None:
+        interpreter = Interpreter()
+    if options is not None:
+        interpreter.jit_threshold = options.jit_threshold
+        interpreter.jit_log = stderr if options.jit_log else None
     interpreter.interpret(statements)
+    # a setup that failed part way would only be saved half done
+    if options is not None and options.snapshot is not None and not get_err_status():
+        snapshot(interpreter, options.snapshot)
+    if options is not None and options.quicken_stats:
+        active_output().flush()
+        print(quickening_report(interpreter.quickened), file=stderr)
+    if options is not None and options.scope_stats:
+        active_output().flush()
+        print(interpreter.scope_report(), file=stderr)
+
+def restore(interpreter: Interpreter, path: str) -> list[str]:
+    try:
+        return load_snapshot(interpreter, path)
+    except SnapshotErr as err:
+        print(err.message, file=stderr)
+        exit(1)
+
+def snapshot(interpreter: Interpreter, path: str) -> None:
+    active_output().flush()
+    try:
+        save_snapshot(interpreter, path)
+    except SnapshotErr as err:
+        print(err.message, file=stderr)
+        exit(1)
+
+def profile(statements: list[Stmt], options: Namespace) -> None:
+    profiler: ProfilingInterpreter = ProfilingInterpreter()
+    profiler.interpret(statements)
+    active_output().flush()
+    source: list[str] = None
+    if options.script is not None and os.path.isfile(options.script):
+        with open(options.script, 'r') as f:
+            source = f.read().splitlines()
+    print(profiler.report(source), file=stderr)
+    if options.profile_stacks is not None:
+        with open(options.profile_stacks, 'w') as f:
+            f.write(profiler.collapsed_stacks())
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,135 @@
+from time import time
+from array import array
+from math import fsum
+from operator import mul
+from typing import Callable
+from token_cls import Token
+from error import RuntimeErr, NativeErr
+from numarray import NumArray
+from rope import Rope
+
+class NativeFunction:
+    __slots__ = ('name', 'arity', 'function')
+
+    def __init__(self, name: str, function: Callable) -> None:
+        self.name: str = name
+        self.arity: int = function.__code__.co_argcount
+        self.function: Callable = function
+
+    def __str__(self) -> str:
+        return f'<native fn {self.name}>'
+
+def call_value(callee: object, arguments: list[object], paren: Token) -> object:
+    if type(callee) is not NativeFunction:
+        raise RuntimeErr(paren, 'Can only call functions.')
+    if len(arguments) != callee.arity:
+        raise RuntimeErr(paren, f'Expected {callee.arity} arguments but got {len(arguments)}.')
+    try:
+        return callee.function(*arguments)
+    except NativeErr as err:
+        raise RuntimeErr(paren, err.message) from None
+
+# argument checks
+def expect_array(value: object) -> array:
+    if type(value) is not NumArray:
+        raise NativeErr('Argument must be an array.')
+    return value.data
+
+def expect_number(value: object) -> float:
+    if type(value) is not float:
+        raise NativeErr('Argument must be a number.')
+    return value
+
+def expect_integer(value: object) -> int:
+    if type(value) is not float or not value.is_integer():
+        raise NativeErr('Argument must be an integer.')
+    return int(value)
+
+def expect_index(value: object, limit: int) -> int:
+    index: int = expect_integer(value)
+    if not 0 <= index < limit:
+        raise NativeErr('Index out of range.')
+    return index
+
+def expect_same_length(left: array, right: array) -> None:
+    if len(left) != len(right):
+        raise NativeErr('Arrays must have the same length.')
+
+def expect_elements(data: array) -> array:
+    if not data:
+        raise NativeErr('Array is empty.')
+    return data
+
+# natives
+def native_clock() -> float:
+    return time()
+
+def native_array(size: object, value: object) -> NumArray:
+    count: int = expect_integer(size)
+    if count < 0:
+        raise NativeErr('Size must not be negative.')
+    return NumArray.filled(count, expect_number(value))
+
+def native_range(start: object, end: object) -> NumArray:
+    return NumArray(array('d', map(float, range(expect_integer(start), expect_integer(end)))))
+
+def native_len(value: object) -> float:
+    if type(value) is NumArray or type(value) is str:
+        return float(len(value))
+    if type(value) is Rope:
+        return float(value.length)
+    raise NativeErr('Argument must be an array or a string.')
+
+def native_get(values: object, index: object) -> float:
+    data: array = expect_array(values)
+    return data[expect_index(index, len(data))]
+
+def native_set(values: object, index: object, value: object) -> float:
+    data: array = expect_array(values)
+    data[expect_index(index, len(data))] = expect_number(value)
+    return value
+
+def native_sum(values: object) -> float:
+    return fsum(expect_array(values))
+
+def native_min(values: object) -> float:
+    return min(expect_elements(expect_array(values)))
+
+def native_max(values: object) -> float:
+    return max(expect_elements(expect_array(values)))
+
+def native_dot(left: object, right: object) -> float:
+    a: array = expect_array(left)
+    b: array = expect_array(right)
+    expect_same_length(a, b)
+    return fsum(map(mul, a, b))
+
+def native_slice(values: object, start: object, end: object) -> NumArray:
+    data: array = expect_array(values)
+    first: int = expect_index(start, len(data) + 1)
+    last: int = expect_index(end, len(data) + 1)
+    if first > last:
+        raise NativeErr('Slice start is after its end.')
+    return NumArray(data[first:last])
+
+def native_fill(values: object, value: object) -> NumArray:
+    data: array = expect_array(values)
+    data[:] = array('d', [expect_number(value)]) * len(data)
+    return values
+
+natives: dict[str, NativeFunction] = {
+    name: NativeFunction(name, function) for name, function in [
+        ('clock', native_clock),
+        ('array', native_array),
+        ('range', native_range),
+        ('len', native_len),
+        ('get', native_get),
+        ('set', native_set),
+        ('sum', native_sum),
+        ('min', native_min),
+        ('max', native_max),
+        ('dot', native_dot),
+        ('slice', native_slice),
+        ('fill', native_fill)
+    ]
+}
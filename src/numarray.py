@@ -0,0 +1,95 @@
+from array import array
+from itertools import repeat
+from operator import add, sub, mul, truediv, mod, neg
+from typing import Callable
+from token_cls import Token
+from token_type import TokenType
+from error import RuntimeErr
+from output import format_number
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# NumPy only pays for its call overhead on longer arrays, and can be switched off to compare
+use_numpy: bool = numpy is not None
+numpy_threshold: int = 2048
+
+class NumArray:
+    __slots__ = ('data',)
+
+    def __init__(self, data: array) -> None:
+        self.data: array = data
+
+    @classmethod
+    def filled(cls, size: int, value: float) -> 'NumArray':
+        return cls(array('d', [value]) * size)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is NumArray and self.data == other.data
+
+    __hash__ = None
+
+    def __str__(self) -> str:
+        return '[' + ', '.join(map(format_number, self.data)) + ']'
+
+elementwise_ops: dict[TokenType, Callable[[float, float], float]] = {
+    TokenType.PLUS: add,
+    TokenType.MINUS: sub,
+    TokenType.STAR: mul,
+    TokenType.SLASH: truediv,
+    TokenType.MODULO: mod
+}
+
+# only the ufuncs that round exactly like the Python operators, so results don't depend on NumPy being installed
+numpy_ops: dict[TokenType, object] = {
+    TokenType.PLUS: numpy.add,
+    TokenType.MINUS: numpy.subtract,
+    TokenType.STAR: numpy.multiply,
+    TokenType.SLASH: numpy.divide
+} if numpy is not None else {}
+
+def view(data: array) -> object:
+    return numpy.frombuffer(data, dtype=numpy.float64)
+
+# called by every backend once its float and string fast paths have failed, message is the error it would have raised
+def arithmetic(left: object, right: object, token: Token, message: str) -> NumArray:
+    op: TokenType = token.type
+    if op not in elementwise_ops:
+        raise RuntimeErr(token, message)
+    if type(left) is NumArray:
+        size: int = len(left.data)
+        if type(right) is NumArray:
+            if len(right.data) != size:
+                raise RuntimeErr(token, 'Arrays must have the same length.')
+        elif type(right) is not float:
+            raise RuntimeErr(token, message)
+    elif type(right) is NumArray and type(left) is float:
+        size = len(right.data)
+    else:
+        raise RuntimeErr(token, message)
+    if op == TokenType.SLASH or op == TokenType.MODULO:
+        divisor: object = right.data if type(right) is NumArray else (right,)
+        if 0.0 in divisor:
+            raise RuntimeErr(token, 'Can\'t divide by zero.')
+    a: object = left.data if type(left) is NumArray else left
+    b: object = right.data if type(right) is NumArray else right
+    if use_numpy and size >= numpy_threshold and op in numpy_ops:
+        result: array = array('d', bytes(8 * size))
+        numpy_ops[op](view(a) if type(a) is array else a, view(b) if type(b) is array else b, out=view(result))
+        return NumArray(result)
+    function: Callable[[float, float], float] = elementwise_ops[op]
+    if type(a) is not array:
+        return NumArray(array('d', map(function, repeat(a), b)))
+    if type(b) is not array:
+        return NumArray(array('d', map(function, a, repeat(b))))
+    return NumArray(array('d', map(function, a, b)))
+
+def negate_array(right: object, token: Token) -> NumArray:
+    if type(right) is not NumArray:
+        raise RuntimeErr(token, 'Operand must be a number.')
+    return NumArray(array('d', map(neg, right.data)))
@@ -0,0 +1,216 @@
+from expressions import *
+from statements import *
+from visitor import Visitor
+from token_type import TokenType
+from interpreter import Interpreter
+from error import RuntimeErr
+from rope import Rope
+
+def count_nodes(node: object) -> int:
+    if node is None:
+        return 0
+    if isinstance(node, list):
+        return sum(count_nodes(item) for item in node)
+    if isinstance(node, (Binary, Logical)):
+        return 1 + count_nodes(node.left) + count_nodes(node.right)
+    if isinstance(node, Unary):
+        return 1 + count_nodes(node.right)
+    if isinstance(node, (Grouping, Expression, Print)):
+        return 1 + count_nodes(node.expression)
+    if isinstance(node, Assign):
+        return 1 + count_nodes(node.value)
+    if isinstance(node, Call):
+        return 1 + count_nodes(node.callee) + count_nodes(node.arguments)
+    if isinstance(node, Var):
+        return 1 + count_nodes(node.initializer)
+    if isinstance(node, If):
+        return 1 + count_nodes(node.condition) + count_nodes(node.then_branch) + count_nodes(node.else_branch)
+    if isinstance(node, While):
+        return 1 + count_nodes(node.condition) + count_nodes(node.body)
+    if isinstance(node, Block):
+        return 1 + count_nodes(node.statements)
+    if isinstance(node, Function):
+        return 1 + count_nodes(node.body)
+    if isinstance(node, Return):
+        return 1 + count_nodes(node.value)
+    return 1
+
+def static_type(expr: Expr) -> type:
+    if isinstance(expr, Literal):
+        return type(expr.value)
+    if isinstance(expr, Grouping):
+        return static_type(expr.expression)
+    if isinstance(expr, Assign):
+        return static_type(expr.value)
+    if isinstance(expr, Unary):
+        return float if expr.op == TokenType.MINUS else bool
+    if isinstance(expr, Logical):
+        left: type = static_type(expr.left)
+        return left if left is static_type(expr.right) else None
+    if isinstance(expr, Binary):
+        if expr.op in Optimizer.numeric_ops:
+            return float
+        if expr.op == TokenType.PLUS:
+            left = static_type(expr.left)
+            return left if left in (float, str) and left is static_type(expr.right) else None
+        return bool
+    return None
+
+class Optimizer(Visitor):
+    numeric_ops: set[TokenType] = {
+        TokenType.MINUS,
+        TokenType.STAR,
+        TokenType.SLASH,
+        TokenType.MODULO
+    }
+
+    def __init__(self) -> None:
+        self.evaluator: Interpreter = Interpreter()
+        self.nodes_before: int = 0
+        self.nodes_after: int = 0
+
+    @property
+    def removed(self) -> int:
+        return self.nodes_before - self.nodes_after
+
+    def optimize(self, stmts: list[Stmt]) -> list[Stmt]:
+        self.nodes_before += count_nodes(stmts)
+        optimized: list[Stmt] = self.optimize_all(stmts)
+        self.nodes_after += count_nodes(optimized)
+        return optimized
+
+    def optimize_all(self, stmts: list[Stmt]) -> list[Stmt]:
+        optimized: list[Stmt] = []
+        for stmt in stmts:
+            if stmt is not None:
+                stmt = stmt.accept(self)
+                if stmt is not None:
+                    optimized.append(stmt)
+        return optimized
+
+    # statements
+    def visit_expression_stmt(self, stmt: Expression) -> Stmt:
+        stmt.expression = stmt.expression.accept(self)
+        if isinstance(stmt.expression, Literal):
+            return None
+        return stmt
+
+    def visit_print_stmt(self, stmt: Print) -> Stmt:
+        stmt.expression = stmt.expression.accept(self)
+        return stmt
+
+    def visit_var_stmt(self, stmt: Var) -> Stmt:
+        if stmt.initializer is not None:
+            stmt.initializer = stmt.initializer.accept(self)
+        return stmt
+
+    def visit_block_stmt(self, stmt: Block) -> Stmt:
+        stmt.statements = self.optimize_all(stmt.statements)
+        if not stmt.statements:
+            return None
+        return stmt
+
+    def visit_if_stmt(self, stmt: If) -> Stmt:
+        stmt.condition = stmt.condition.accept(self)
+        then_branch: Stmt = stmt.then_branch.accept(self)
+        else_branch: Stmt = stmt.else_branch.accept(self) if stmt.else_branch is not None else None
+        if isinstance(stmt.condition, Literal):
+            return then_branch if Interpreter.is_truthy(stmt.condition.value) else else_branch
+        stmt.then_branch = then_branch if then_branch is not None else Block([], stmt.line)
+        stmt.else_branch = else_branch
+        return stmt
+
+    def visit_while_stmt(self, stmt: While) -> Stmt:
+        stmt.condition = stmt.condition.accept(self)
+        if isinstance(stmt.condition, Literal) and not Interpreter.is_truthy(stmt.condition.value):
+            return None
+        body: Stmt = stmt.body.accept(self)
+        stmt.body = body if body is not None else Block([], stmt.line)
+        return stmt
+
+    def visit_function_stmt(self, stmt: Function) -> Stmt:
+        stmt.body = self.optimize_all(stmt.body)
+        return stmt
+
+    def visit_return_stmt(self, stmt: Return) -> Stmt:
+        if stmt.value is not None:
+            stmt.value = stmt.value.accept(self)
+        return stmt
+
+    # expressions
+    def visit_literal_expr(self, expr: Literal) -> Expr:
+        return expr
+
+    def visit_variable_expr(self, expr: Variable) -> Expr:
+        return expr
+
+    def visit_grouping_expr(self, expr: Grouping) -> Expr:
+        return expr.expression.accept(self)
+
+    def visit_assign_expr(self, expr: Assign) -> Expr:
+        expr.value = expr.value.accept(self)
+        return expr
+
+    def visit_call_expr(self, expr: Call) -> Expr:
+        expr.callee = expr.callee.accept(self)
+        expr.arguments = [argument.accept(self) for argument in expr.arguments]
+        return expr
+
+    def visit_logical_expr(self, expr: Logical) -> Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        if not isinstance(expr.left, Literal):
+            return expr
+        truthy: bool = Interpreter.is_truthy(expr.left.value)
+        if expr.op == TokenType.OR:
+            return expr.left if truthy else expr.right
+        return expr.right if truthy else expr.left
+
+    def visit_unary_expr(self, expr: Unary) -> Expr:
+        expr.right = expr.right.accept(self)
+        if isinstance(expr.right, Literal):
+            return self.fold(expr)
+        if (expr.op == TokenType.BANG and isinstance(expr.right, Unary)
+                and expr.right.op == TokenType.BANG and static_type(expr.right.right) is bool):
+            return expr.right.right
+        return expr
+
+    def visit_binary_expr(self, expr: Binary) -> Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        if isinstance(expr.left, Literal) and isinstance(expr.right, Literal):
+            return self.fold(expr)
+        return self.simplify(expr)
+
+    # Helper functions
+    def fold(self, expr: Expr) -> Expr:
+        try:
+            value: object = expr.accept(self.evaluator)
+        except RuntimeErr:
+            return expr
+        # ropes belong to the tree walker, every backend and the cache read string literals as str
+        return Literal(str(value) if type(value) is Rope else value)
+
+    def simplify(self, expr: Binary) -> Expr:
+        op: TokenType = expr.op
+        left: Expr = expr.left
+        right: Expr = expr.right
+        if op == TokenType.STAR:
+            if self.is_constant(right, 1.0) and static_type(left) is float:
+                return left
+            if self.is_constant(left, 1.0) and static_type(right) is float:
+                return right
+        if op == TokenType.SLASH and self.is_constant(right, 1.0) and static_type(left) is float:
+            return left
+        if op == TokenType.MINUS and self.is_constant(right, 0.0) and static_type(left) is float:
+            return left
+        if op == TokenType.PLUS:
+            if self.is_constant(right, '') and static_type(left) is str:
+                return left
+            if self.is_constant(left, '') and static_type(right) is str:
+                return right
+        return expr
+
+    @staticmethod
+    def is_constant(expr: Expr, value: object) -> bool:
+        return isinstance(expr, Literal) and type(expr.value) is type(value) and repr(expr.value) == repr(value)
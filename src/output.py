@@ -0,0 +1,96 @@
+import sys
+import atexit
+from math import copysign
+from typing import TextIO, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+flush_policies: list[str] = ['line', 'block', 'exit']
+
+# sinks
+
+class StdoutSink:
+    # looked up on every write so redirect_stdout keeps working
+    def write(self, text: str) -> None:
+        sys.stdout.write(text)
+
+    def flush(self) -> None:
+        sys.stdout.flush()
+
+class FileSink:
+    def __init__(self, path: str, append: bool=False) -> None:
+        self.file: TextIO = open(path, 'a' if append else 'w')
+
+    def write(self, text: str) -> None:
+        self.file.write(text)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+class CaptureSink:
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+
+    def write(self, text: str) -> None:
+        self.chunks.append(text)
+
+    def flush(self) -> None:
+        pass
+
+    def getvalue(self) -> str:
+        return ''.join(self.chunks)
+
+    def clear(self) -> None:
+        self.chunks.clear()
+
+# buffers printed lines and hands them to the sink in one write per flush
+class Output:
+    def __init__(self, sink: object=None, policy: str='block', buffer_size: int=1 << 16) -> None:
+        self.sink: object = sink if sink is not None else StdoutSink()
+        self.policy: str = policy
+        self.buffer_size: int = buffer_size
+        self.limit: int = {'line': 0, 'block': buffer_size, 'exit': sys.maxsize}[policy]
+        self.lines: list[str] = []
+        self.pending: int = 0
+
+    def write_line(self, text: str) -> None:
+        self.lines.append(text)
+        self.pending += len(text) + 1
+        if self.pending > self.limit:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.lines:
+            self.lines.append('')
+            self.sink.write('\n'.join(self.lines))
+            self.lines.clear()
+            self.pending = 0
+        self.sink.flush()
+
+default_output: Output = Output(policy='line')
+current_output: ContextVar = ContextVar('current_output', default=default_output)
+
+atexit.register(default_output.flush)
+
+def active_output() -> Output:
+    return current_output.get()
+
+@contextmanager
+def writing(output: Output) -> Iterator[Output]:
+    token = current_output.set(output)
+    try:
+        yield output
+    finally:
+        output.flush()
+        current_output.reset(token)
+
+# floats print without a trailing .0 when integral, except where repr switches to an exponent
+def format_number(value: float) -> str:
+    if value.is_integer() and -1e16 < value < 1e16:
+        if value or copysign(1.0, value) > 0:
+            return str(int(value))
+        return '-0'
+    return repr(value)
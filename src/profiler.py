@@ -0,0 +1,145 @@
+from time import perf_counter
+from typing import Callable
+from expressions import *
+from statements import *
+from interpreter import Interpreter
+
+def node_line(node: object) -> int:
+    line: int = getattr(node, 'line', 0)
+    if not line and isinstance(node, (Variable, Assign, Var)):
+        line = node.name.line
+    elif not line and isinstance(node, Call):
+        line = node.paren.line
+    return line
+
+def node_label(node: object) -> str:
+    name: str = type(node).__name__
+    if isinstance(node, Operator):
+        return f'{name} {node.operator.lexeme}'
+    if isinstance(node, (Variable, Assign, Var, Function)):
+        return f'{name} {node.name.lexeme}'
+    return name
+
+class LineStats:
+    __slots__ = ('count', 'inclusive', 'exclusive', 'active')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.inclusive: float = 0.0
+        self.exclusive: float = 0.0
+        self.active: int = 0
+
+class NodeStats:
+    __slots__ = ('count', 'inclusive', 'exclusive', 'active', 'line', 'label', 'line_stats', 'parent_path', 'path')
+
+    def __init__(self, line: int, label: str, line_stats: LineStats) -> None:
+        self.count: int = 0
+        self.inclusive: float = 0.0
+        self.exclusive: float = 0.0
+        # visits still running, so a recursive call's time isn't added to the inclusive time twice
+        self.active: int = 0
+        self.line: int = line
+        self.label: str = label
+        self.line_stats: LineStats = line_stats
+        # the stack path is looked up again only when the node is reached from a different parent stack
+        self.parent_path: int = None
+        self.path: int = None
+
+# times every visit, so compiled loops are turned off to keep their bodies visible
+class ProfilingInterpreter(Interpreter):
+    def __init__(self) -> None:
+        super().__init__()
+        self.jit_threshold = 0
+        self.nodes: dict[object, NodeStats] = {}
+        self.lines: dict[int, LineStats] = {}
+        # stack paths are numbered, each one a parent path plus a node, since recursion makes them too long to build as strings
+        self.path_ids: dict[tuple[int, NodeStats], int] = {}
+        self.path_links: list[tuple[int, NodeStats]] = []
+        self.stacks: dict[int, float] = {}
+        self.frames: list[list] = []
+        self.total: float = 0.0
+
+    def measure(self, node: object, visit: Callable) -> object:
+        stats: NodeStats = self.nodes.get(node)
+        frames: list[list] = self.frames
+        parent: list = frames[-1] if frames else None
+        if stats is None:
+            line: int = node_line(node) or (parent[1].line if parent is not None else 0)
+            line_stats: LineStats = self.lines.get(line)
+            if line_stats is None:
+                line_stats = self.lines[line] = LineStats()
+            stats = self.nodes[node] = NodeStats(line, node_label(node), line_stats)
+        parent_path: int = parent[2] if parent is not None else -1
+        if stats.parent_path != parent_path:
+            stats.parent_path = parent_path
+            link: tuple[int, NodeStats] = (parent_path, stats)
+            path: int = self.path_ids.get(link)
+            if path is None:
+                path = self.path_ids[link] = len(self.path_links)
+                self.path_links.append(link)
+            stats.path = path
+        frame: list = [0.0, stats, stats.path]
+        frames.append(frame)
+        line_stats = stats.line_stats
+        # a line's count and inclusive time come from the nodes entering it, not the ones nested inside it
+        entering: bool = parent is None or parent[1].line != stats.line
+        stats.active += 1
+        if entering:
+            line_stats.active += 1
+        start: float = perf_counter()
+        try:
+            return visit(self, node)
+        finally:
+            elapsed: float = perf_counter() - start
+            frames.pop()
+            exclusive: float = elapsed - frame[0]
+            stats.count += 1
+            stats.active -= 1
+            if not stats.active:
+                stats.inclusive += elapsed
+            stats.exclusive += exclusive
+            self.stacks[stats.path] = self.stacks.get(stats.path, 0.0) + exclusive
+            line_stats.exclusive += exclusive
+            if entering:
+                line_stats.count += 1
+                line_stats.active -= 1
+                if not line_stats.active:
+                    line_stats.inclusive += elapsed
+            if parent is not None:
+                parent[0] += elapsed
+            else:
+                self.total += elapsed
+
+    def report(self, source: list[str]=None, limit: int=20) -> str:
+        rows: list[str] = [f'profile: {self.total:.3f} s in {sum(s.count for s in self.nodes.values())} node visits', '',
+                           f'{"line":>6} {"count":>10} {"incl ms":>11} {"excl ms":>11}  source']
+        for line, stats in sorted(self.lines.items(), key=lambda item: -item[1].exclusive)[:limit]:
+            text: str = source[line - 1].strip() if source is not None and 0 < line <= len(source) else ''
+            rows.append(f'{line:>6} {stats.count:>10} {stats.inclusive * 1e3:>11.3f} {stats.exclusive * 1e3:>11.3f}  {text}')
+        rows += ['', f'{"node":<24} {"line":>6} {"count":>10} {"incl ms":>11} {"excl ms":>11}']
+        for stats in sorted(self.nodes.values(), key=lambda stats: -stats.exclusive)[:limit]:
+            rows.append(f'{stats.label:<24} {stats.line:>6} {stats.count:>10} {stats.inclusive * 1e3:>11.3f} {stats.exclusive * 1e3:>11.3f}')
+        return '\n'.join(rows)
+
+    # one 'frame;frame;frame microseconds' line per stack, the format flamegraph.pl and speedscope read
+    def collapsed_stacks(self) -> str:
+        # a parent path is always numbered before its children
+        names: list[str] = []
+        for parent_path, stats in self.path_links:
+            frame: str = f'{stats.label} (line {stats.line})'
+            names.append(f'{names[parent_path]};{frame}' if parent_path >= 0 else frame)
+        lines: list[str] = []
+        for path, seconds in self.stacks.items():
+            microseconds: int = round(seconds * 1e6)
+            if microseconds > 0:
+                lines.append(f'{names[path]} {microseconds}\n')
+        return ''.join(lines)
+
+def instrument(visit: Callable) -> Callable:
+    def profiled(self: ProfilingInterpreter, node: object) -> object:
+        return self.measure(node, visit)
+    return profiled
+
+for name, visit in list(vars(Interpreter).items()):
+    if name.startswith('visit_'):
+        setattr(ProfilingInterpreter, name, instrument(visit))
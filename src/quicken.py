@@ -0,0 +1,126 @@
+from typing import Callable
+from token_type import TokenType
+from rope import Rope, concat
+
+# returned by a handler whose guard failed, so the caller falls back to the generic path
+MISS: object = object()
+
+# a node whose guards keep failing stops being re-specialized after this many misses
+respecialize_limit: int = 8
+
+def add_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left + right
+    return MISS
+
+def concat_strings(left: object, right: object) -> object:
+    if (type(left) is str or type(left) is Rope) and (type(right) is str or type(right) is Rope):
+        return concat(left, right)
+    return MISS
+
+def subtract_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left - right
+    return MISS
+
+def multiply_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left * right
+    return MISS
+
+def divide_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float and right != 0.0:
+        return left / right
+    return MISS
+
+def modulo_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float and right != 0.0:
+        return left % right
+    return MISS
+
+def greater_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left > right
+    return MISS
+
+def greater_equal_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left >= right
+    return MISS
+
+def less_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left < right
+    return MISS
+
+def less_equal_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left <= right
+    return MISS
+
+def equal_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left == right
+    return MISS
+
+def not_equal_numbers(left: object, right: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left != right
+    return MISS
+
+def equal_strings(left: object, right: object) -> object:
+    if type(left) is str and type(right) is str:
+        return left == right
+    return MISS
+
+def not_equal_strings(left: object, right: object) -> object:
+    if type(left) is str and type(right) is str:
+        return left != right
+    return MISS
+
+def negate_number(right: object) -> object:
+    if type(right) is float:
+        return -right
+    return MISS
+
+def not_value(right: object) -> object:
+    return right is None or right is False
+
+binary_handlers: dict[tuple[TokenType, type, type], Callable[[object, object], object]] = {
+    (TokenType.PLUS, float, float): add_numbers,
+    (TokenType.PLUS, str, str): concat_strings,
+    (TokenType.PLUS, Rope, str): concat_strings,
+    (TokenType.PLUS, str, Rope): concat_strings,
+    (TokenType.PLUS, Rope, Rope): concat_strings,
+    (TokenType.MINUS, float, float): subtract_numbers,
+    (TokenType.STAR, float, float): multiply_numbers,
+    (TokenType.SLASH, float, float): divide_numbers,
+    (TokenType.MODULO, float, float): modulo_numbers,
+    (TokenType.GREATER, float, float): greater_numbers,
+    (TokenType.GREATER_EQUAL, float, float): greater_equal_numbers,
+    (TokenType.LESS, float, float): less_numbers,
+    (TokenType.LESS_EQUAL, float, float): less_equal_numbers,
+    (TokenType.EQUAL_EQUAL, float, float): equal_numbers,
+    (TokenType.BANG_EQUAL, float, float): not_equal_numbers,
+    (TokenType.EQUAL_EQUAL, str, str): equal_strings,
+    (TokenType.BANG_EQUAL, str, str): not_equal_strings
+}
+
+def specialize_binary(op: TokenType, left: object, right: object) -> Callable[[object, object], object]:
+    return binary_handlers.get((op, type(left), type(right)))
+
+def specialize_unary(op: TokenType, right: object) -> Callable[[object], object]:
+    if op == TokenType.BANG:
+        return not_value
+    if op == TokenType.MINUS and type(right) is float:
+        return negate_number
+    return None
+
+def quickening_report(nodes: list) -> str:
+    rows: list[str] = [f'{"line":>6}  {"op":<4} {"handler":<22} {"hits":>12} {"misses":>8} {"hit rate":>9}']
+    for node in sorted(nodes, key=lambda node: (node.line, node.op.value)):
+        total: int = node.hits + node.misses
+        rate: float = node.hits / total * 100 if total else 0.0
+        name: str = node.handler.__name__ if node.handler is not None else '(generic)'
+        rows.append(f'{node.line:>6}  {node.operator.lexeme:<4} {name:<22} {node.hits:>12} {node.misses:>8} {rate:>8.1f}%')
+    return '\n'.join(rows)
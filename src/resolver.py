@@ -0,0 +1,144 @@
+from expressions import *
+from statements import *
+from visitor import Visitor
+from token_cls import Token
+from error import error
+from natives import natives
+
+class Resolver(Visitor):
+    def __init__(self, known_globals: set[str]=None) -> None:
+        self.globals: set[str] = set(natives)
+        if known_globals is not None:
+            self.globals.update(known_globals)
+        self.scopes: list[dict[str, int]] = []
+        self.blocks: list[Block] = []
+        self.function_depth: int = 0
+        # globals used inside a function may be declared after it, so they're checked once everything is resolved
+        self.pending: dict[str, Token] = {}
+
+    # late=False leaves globals that functions use unchecked until check_pending, as the streaming mode needs
+    def resolve(self, stmts: list[Stmt], late: bool=True) -> None:
+        self.resolve_all(stmts)
+        if late:
+            self.check_pending()
+
+    # reports the globals functions used that were never declared
+    def check_pending(self) -> None:
+        for name, token in self.pending.items():
+            if name not in self.globals:
+                error(line=token.line, token=token, msg=f'Undefined variable \'{name}\'.')
+        self.pending.clear()
+
+    def resolve_all(self, stmts: list[Stmt]) -> None:
+        for stmt in stmts:
+            if stmt is not None:
+                stmt.accept(self)
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        # a block that declares nothing gets no scope, and a slot_count of 0 tells every backend to skip it
+        if not any(type(inner) is Var or type(inner) is Function for inner in stmt.statements):
+            stmt.slot_count = 0
+            self.resolve_all(stmt.statements)
+            return
+        self.scopes.append({})
+        self.blocks.append(stmt)
+        self.resolve_all(stmt.statements)
+        self.blocks.pop()
+        stmt.slot_count = len(self.scopes.pop())
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        self.declare(stmt)
+        for block in self.blocks:
+            block.captured = True
+        scope: dict[str, int] = {}
+        for param in stmt.params:
+            if param.lexeme in scope:
+                error(line=param.line, token=param, msg='Already a variable with this name in this scope.')
+            scope[param.lexeme] = len(scope)
+        self.scopes.append(scope)
+        self.function_depth += 1
+        self.resolve_all(stmt.body)
+        self.function_depth -= 1
+        stmt.slot_count = len(self.scopes.pop())
+
+    def visit_return_stmt(self, stmt: Return) -> None:
+        if not self.function_depth:
+            error(line=stmt.keyword.line, token=stmt.keyword, msg='Can\'t return from top-level code.')
+        if stmt.value is not None:
+            stmt.value.accept(self)
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        self.declare(stmt)
+
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        stmt.expression.accept(self)
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        stmt.condition.accept(self)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        stmt.expression.accept(self)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        stmt.condition.accept(self)
+        stmt.body.accept(self)
+
+    def visit_assign_expr(self, expr: Assign) -> None:
+        expr.value.accept(self)
+        self.resolve_local(expr, expr.name)
+
+    def visit_binary_expr(self, expr: Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_call_expr(self, expr: Call) -> None:
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+
+    def visit_grouping_expr(self, expr: Grouping) -> None:
+        expr.expression.accept(self)
+
+    def visit_literal_expr(self, expr: Literal) -> None:
+        return None
+
+    def visit_logical_expr(self, expr: Logical) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_unary_expr(self, expr: Unary) -> None:
+        expr.right.accept(self)
+
+    def visit_variable_expr(self, expr: Variable) -> None:
+        self.resolve_local(expr, expr.name)
+
+    # Helper functions
+    def declare(self, stmt: Stmt) -> None:
+        if not self.scopes:
+            self.globals.add(stmt.name.lexeme)
+            stmt.slot = None
+            return
+        scope: dict[str, int] = self.scopes[-1]
+        if stmt.name.lexeme not in scope:
+            scope[stmt.name.lexeme] = len(scope)
+        stmt.slot = scope[stmt.name.lexeme]
+
+    def resolve_local(self, expr: Expr, name: Token) -> None:
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if name.lexeme in scope:
+                expr.depth = depth
+                expr.slot = scope[name.lexeme]
+                return
+        expr.depth = None
+        expr.slot = None
+        if name.lexeme in self.globals:
+            return
+        if self.function_depth:
+            self.pending.setdefault(name.lexeme, name)
+        else:
+            error(line=name.line, token=name, msg=f'Undefined variable \'{name.lexeme}\'.')
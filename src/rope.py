@@ -0,0 +1,53 @@
+# concatenations shorter than this stay plain str, so short strings never pay for the indirection
+rope_threshold: int = 256
+
+# a string built by appending: ropes made from the same original share one parts list,
+# and a rope only owns the first `count` entries of it
+class Rope:
+    __slots__ = ('parts', 'count', 'length', 'flat')
+
+    def __init__(self, parts: list[str], length: int) -> None:
+        self.parts: list[str] = parts
+        self.count: int = len(parts)
+        self.length: int = length
+        self.flat: str = None
+
+    def append(self, text: str) -> 'Rope':
+        parts: list[str] = self.parts
+        if self.count != len(parts):
+            # another rope has already grown the shared list past this one
+            parts = parts[:self.count]
+        parts.append(text)
+        return Rope(parts, self.length + len(text))
+
+    def __str__(self) -> str:
+        if self.flat is None:
+            parts: list[str] = self.parts
+            self.flat = ''.join(parts if self.count == len(parts) else parts[:self.count])
+            # keep appending from the flat copy instead of holding on to the pieces
+            self.parts = [self.flat]
+            self.count = 1
+        return self.flat
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is Rope or type(other) is str:
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __reduce__(self) -> tuple:
+        return (str, (str(self),))
+
+string_types: tuple[type, type] = (str, Rope)
+
+def concat(left: object, right: object) -> object:
+    if type(right) is Rope:
+        right = str(right)
+    if type(left) is Rope:
+        return left.append(right)
+    length: int = len(left) + len(right)
+    if length < rope_threshold:
+        return left + right
+    return Rope([left, right], length)
@@ -0,0 +1,118 @@
+from typing import TextIO, Iterator
+from contextlib import contextmanager
+from statements import Stmt
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from optimizer import Optimizer
+from interpreter import Interpreter, default_jit_threshold
+from error import ErrorReporter, reporting
+from output import Output, active_output, writing
+
+class Program:
+    def __init__(self, statements: list[Stmt], source: str, optimized: bool=False) -> None:
+        self.statements: list[Stmt] = statements
+        self.source: str = source
+        self.optimized: bool = optimized
+
+class LoxRuntime:
+    def __init__(self, stream: TextIO=None, capture: bool=False, optimize: bool=False,
+                 pool_size: int=8, cache_size: int=1024, output: Output=None,
+                 jit_threshold: int=default_jit_threshold) -> None:
+        self.reporter: ErrorReporter = ErrorReporter(stream, capture)
+        # None prints wherever the caller's active output goes
+        self.output: Output = output
+        self.optimize: bool = optimize
+        self.jit_threshold: int = jit_threshold
+        self.pool_size: int = pool_size
+        self.idle: list[Interpreter] = []
+        self.cache_size: int = cache_size
+        self.programs: dict[str, Program] = {}
+
+    @property
+    def had_err(self) -> bool:
+        return self.reporter.had_err
+
+    @property
+    def messages(self) -> list[str]:
+        return self.reporter.messages
+
+    def compile(self, source: str) -> Program:
+        program: Program = self.programs.get(source)
+        if program is not None:
+            self.reporter.reset()
+            return program
+        program = self.compile_with(source, Resolver())
+        if program is not None and self.cache_size > 0:
+            if len(self.programs) >= self.cache_size:
+                del self.programs[next(iter(self.programs))]
+            self.programs[source] = program
+        return program
+
+    def compile_with(self, source: str, resolver: Resolver, late: bool=True) -> Program:
+        self.reporter.reset()
+        with reporting(self.reporter):
+            statements: list[Stmt] = Parser(FastScanner(source).scan_tokens()).parse()
+            if self.reporter.had_err:
+                return None
+            resolver.resolve(statements, late)
+            if self.reporter.had_err:
+                return None
+            if self.optimize:
+                statements = Optimizer().optimize(statements)
+        return Program(statements, source, self.optimize)
+
+    def run(self, program: Program) -> bool:
+        with self.interpreter() as interpreter:
+            return self.run_on(interpreter, program)
+
+    def run_on(self, interpreter: Interpreter, program: Program) -> bool:
+        self.reporter.reset()
+        with reporting(self.reporter), writing(self.output if self.output is not None else active_output()):
+            interpreter.interpret(program.statements)
+        return not self.reporter.had_err
+
+    def execute(self, source: str) -> bool:
+        program: Program = self.compile(source)
+        return program is not None and self.run(program)
+
+    @contextmanager
+    def interpreter(self) -> Iterator[Interpreter]:
+        interpreter: Interpreter = self.idle.pop() if self.idle else self.new_interpreter()
+        try:
+            yield interpreter
+        finally:
+            interpreter.reset()
+            if len(self.idle) < self.pool_size:
+                self.idle.append(interpreter)
+
+    def new_interpreter(self) -> Interpreter:
+        interpreter: Interpreter = Interpreter()
+        interpreter.jit_threshold = self.jit_threshold
+        return interpreter
+
+    def session(self) -> 'Session':
+        return Session(self)
+
+# one interpreter and resolver for the whole session, so globals survive from one line to the next
+class Session:
+    def __init__(self, runtime: LoxRuntime) -> None:
+        self.runtime: LoxRuntime = runtime
+        self.interpreter: Interpreter = runtime.new_interpreter()
+        self.resolver: Resolver = Resolver()
+
+    def execute(self, source: str) -> bool:
+        # a function may use a global that a later line defines
+        program: Program = self.runtime.compile_with(source, self.resolver, late=False)
+        return program is not None and self.runtime.run_on(self.interpreter, program)
+
+    # a global a function uses may be defined by any later line, so only the end of the session settles it
+    def finish(self) -> bool:
+        self.runtime.reporter.reset()
+        with reporting(self.runtime.reporter):
+            self.resolver.check_pending()
+        return not self.runtime.reporter.had_err
+
+    def reset(self) -> None:
+        self.interpreter.reset()
+        self.resolver = Resolver()
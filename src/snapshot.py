@@ -0,0 +1,127 @@
+import os
+import io
+import pickle
+import struct
+import zlib
+import gc
+from array import array, _array_reconstructor
+from mmap import mmap, ACCESS_READ
+from environment import Environment, LocalEnvironment
+from functions import LoxFunction
+from numarray import NumArray
+from interpreter import Interpreter
+from natives import NativeFunction, natives
+from error import SnapshotErr
+from cache import NodePickler, NodeUnpickler, schema
+from version import version
+
+magic: bytes = b'LOXS'
+format_version: int = 1
+# magic, format version, interpreter version, node layout, payload length, payload crc32
+header: struct.Struct = struct.Struct('<4sH16s16sQI')
+
+# the global environment and the builtins belong to the interpreter a snapshot is restored into, so they are only
+# written by name: functions defined at the top level close over that interpreter's globals
+class SnapshotPickler(NodePickler):
+    def __init__(self, file: io.BytesIO, globals_env: Environment) -> None:
+        super().__init__(file)
+        self.globals_env: Environment = globals_env
+
+    def persistent_id(self, obj: object) -> str:
+        if obj is self.globals_env:
+            return 'globals'
+        if type(obj) is NativeFunction and natives.get(obj.name) is obj:
+            return obj.name
+        return None
+
+class SnapshotUnpickler(NodeUnpickler):
+    # ropes are written as the str they flatten to
+    allowed: dict[tuple[str, str], object] = {
+        **NodeUnpickler.allowed,
+        ('functions', 'LoxFunction'): LoxFunction,
+        ('environment', 'LocalEnvironment'): LocalEnvironment,
+        ('numarray', 'NumArray'): NumArray,
+        ('array', 'array'): array,
+        ('array', '_array_reconstructor'): _array_reconstructor,
+        ('builtins', 'str'): str
+    }
+
+    def __init__(self, file: mmap, globals_env: Environment) -> None:
+        super().__init__(file)
+        self.globals_env: Environment = globals_env
+
+    def persistent_load(self, pid: str) -> object:
+        if pid == 'globals':
+            return self.globals_env
+        if pid not in natives:
+            raise pickle.UnpicklingError(f'unknown builtin {pid}')
+        return natives[pid]
+
+# writes the globals the program defined, and everything reachable from them, to path
+def save_snapshot(interpreter: Interpreter, path: str) -> int:
+    values: dict[str, object] = {
+        name: value for name, value in interpreter.globals.values.items() if natives.get(name) is not value
+    }
+    buffer: io.BytesIO = io.BytesIO()
+    collecting: bool = gc.isenabled()
+    gc.disable()
+    try:
+        SnapshotPickler(buffer, interpreter.globals).dump(values)
+    except RecursionError:
+        raise SnapshotErr(f'can\'t snapshot to {path}: the globals are nested too deeply') from None
+    except (pickle.PicklingError, TypeError, AttributeError) as err:
+        raise SnapshotErr(f'can\'t snapshot to {path}: {err}') from None
+    finally:
+        if collecting:
+            gc.enable()
+    payload: bytes = buffer.getvalue()
+    temp_path: str = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(header.pack(magic, format_version, version.encode('ascii'), schema, len(payload), zlib.crc32(payload)))
+            f.write(payload)
+        # the file only ever changes by a rename, so processes that have it mapped keep reading the old one
+        os.replace(temp_path, path)
+    except OSError as err:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise SnapshotErr(f'can\'t write {path}: {err.strerror}') from None
+    return header.size + len(payload)
+
+# defines the globals saved in path in interpreter, and returns their names
+def load_snapshot(interpreter: Interpreter, path: str) -> list[str]:
+    try:
+        with open(path, 'rb') as f:
+            data: mmap = mmap(f.fileno(), 0, access=ACCESS_READ)
+    except OSError as err:
+        raise SnapshotErr(f'can\'t read {path}: {err.strerror}') from None
+    except ValueError:
+        raise SnapshotErr(f'{path} is not a Lox snapshot') from None
+    with data:
+        if len(data) < header.size or data[:len(magic)] != magic:
+            raise SnapshotErr(f'{path} is not a Lox snapshot')
+        fields: tuple = header.unpack_from(data)
+        if fields[1] != format_version or fields[2].rstrip(b'\0') != version.encode('ascii') or fields[3] != schema:
+            written: str = fields[2].rstrip(b'\0').decode('ascii', 'replace')
+            raise SnapshotErr(f'{path} was written by python-lox {written}, this is {version}')
+        with memoryview(data) as view:
+            payload: memoryview = view[header.size:]
+            intact: bool = len(payload) == fields[4] and zlib.crc32(payload) == fields[5]
+            payload.release()
+        if not intact:
+            raise SnapshotErr(f'{path} is damaged')
+        data.seek(header.size)
+        # unpickling only allocates, so the collector would just rescan the tree
+        collecting: bool = gc.isenabled()
+        gc.disable()
+        try:
+            values: dict[str, object] = SnapshotUnpickler(data, interpreter.globals).load()
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError, ValueError):
+            raise SnapshotErr(f'{path} is damaged') from None
+        finally:
+            if collecting:
+                gc.enable()
+    interpreter.globals.values.update(values)
+    return list(values)
@@ -3,52 +3,106 @@ from token_cls import Token
 from expressions import Expr
 
 class Stmt(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept(self, visitor):
         pass
 
 class Expression(Stmt):
-    def __init__(self, expression: Expr) -> None:
+    __slots__ = ('expression', 'line')
+
+    def __init__(self, expression: Expr, line: int=0) -> None:
         self.expression: Expr = expression
+        self.line: int = line
     
     def accept(self, visitor):
         return visitor.visit_expression_stmt(self)
 
+class Function(Stmt):
+    __slots__ = ('name', 'params', 'body', 'slot', 'slot_count', 'line')
+
+    def __init__(self, name: Token, params: list[Token], body: list[Stmt], line: int=0) -> None:
+        self.name = name
+        self.params = params
+        self.body = body
+        self.slot: int = None
+        # parameters take the first slots of the frame, then the body's declarations
+        self.slot_count: int = len(params)
+        self.line: int = line
+
+    def accept(self, visitor):
+        return visitor.visit_function_stmt(self)
+
 class If(Stmt):
-    def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Stmt) -> None:
+    __slots__ = ('condition', 'then_branch', 'else_branch', 'line')
+
+    def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Stmt, line: int=0) -> None:
         self.condition = condition
         self.then_branch = then_branch
         self.else_branch = else_branch
+        self.line: int = line
 
     def accept(self, visitor):
         return visitor.visit_if_stmt(self)
 
 class While(Stmt):
-    def __init__(self, condition: Expr, body: Stmt) -> None:
+    __slots__ = ('condition', 'body', 'line', 'iterations', 'compiled', 'stepped', 'deopts')
+
+    def __init__(self, condition: Expr, body: Stmt, line: int=0) -> None:
         self.condition = condition
         self.body = body
+        self.line: int = line
+        self.iterations: int = 0
+        self.compiled: object = None
+        # the compiled loop that counts steps, for interpreters running on a step budget
+        self.stepped: object = None
+        self.deopts: int = 0
 
     def accept(self, visitor):
         return visitor.visit_while_stmt(self)
 
 class Print(Stmt):
-    def __init__(self, expression: Expr) -> None:
+    __slots__ = ('expression', 'line')
+
+    def __init__(self, expression: Expr, line: int=0) -> None:
         self.expression: Expr = expression
+        self.line: int = line
     
     def accept(self, visitor):
         return visitor.visit_print_stmt(self)
 
+class Return(Stmt):
+    __slots__ = ('keyword', 'value', 'line')
+
+    def __init__(self, keyword: Token, value: Expr, line: int=0) -> None:
+        self.keyword = keyword
+        self.value = value
+        self.line: int = line
+
+    def accept(self, visitor):
+        return visitor.visit_return_stmt(self)
+
 class Var(Stmt):
+    __slots__ = ('name', 'initializer', 'slot')
+
     def __init__(self, name: Token, initializer: Expr) -> None:
         self.name = name
         self.initializer = initializer
+        self.slot: int = None
     
     def accept(self, visitor):
         return visitor.visit_var_stmt(self)
 
 class Block(Stmt):
-    def __init__(self, statements: list[Stmt]) -> None:
+    __slots__ = ('statements', 'slot_count', 'captured', 'line')
+
+    def __init__(self, statements: list[Stmt], line: int=0) -> None:
         self.statements = statements
+        self.slot_count: int = 0
+        # a function declared inside can hold on to the block's environment after it exits
+        self.captured: bool = False
+        self.line: int = line
 
     def accept(self, visitor):
         return visitor.visit_block_stmt(self)
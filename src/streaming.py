@@ -0,0 +1,53 @@
+from typing import Iterator
+from token_cls import Token
+from statements import Stmt
+from fast_scanner import FastScanner
+from token_parser import Parser
+from resolver import Resolver
+from interpreter import Interpreter
+from error import get_err_status
+
+def read_chunks(path: str, size: int=1 << 16) -> Iterator[str]:
+    with open(path, 'r') as f:
+        while True:
+            chunk: str = f.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+class StreamingParser(Parser):
+    def __init__(self, tokens: Iterator[Token]) -> None:
+        super().__init__([])
+        self.stream: Iterator[Token] = tokens
+
+    def parse_iter(self) -> Iterator[Stmt]:
+        while not self.tok_end():
+            stmt: Stmt = self.declaration()
+            # keep only the previous token so consumed ones can be freed
+            if self.cur > 1:
+                del self.tokens[:self.cur - 1]
+                self.cur = 1
+            yield stmt
+
+    def parse(self) -> list[Stmt]:
+        return list(self.parse_iter())
+
+    def peek(self) -> Token:
+        while self.cur >= len(self.tokens):
+            self.tokens.append(next(self.stream))
+        return self.tokens[self.cur]
+
+def run_streaming(path: str, chunk_size: int=1 << 16, interpreter: Interpreter=None) -> None:
+    scanner: FastScanner = FastScanner('')
+    parser: StreamingParser = StreamingParser(scanner.scan_chunks(read_chunks(path, chunk_size)))
+    resolver: Resolver = Resolver()
+    if interpreter is None:
+        interpreter = Interpreter()
+    for stmt in parser.parse_iter():
+        if stmt is None:
+            continue
+        resolver.resolve([stmt], late=False)
+        if not get_err_status():
+            interpreter.interpret([stmt])
+    # a function may use a global that a later declaration defines, so only the end of the stream settles it
+    resolver.check_pending()
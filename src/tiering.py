@@ -0,0 +1,377 @@
+from math import inf, nan
+from typing import Callable
+from expressions import *
+from statements import *
+from visitor import Visitor
+from token_type import TokenType
+from interpreter import Interpreter
+from transpiler import Transpiler, divide_err
+from rope import Rope, string_types, concat
+from output import active_output
+from numarray import arithmetic, negate_array
+from natives import NativeFunction, call_value
+
+guardable_types: dict[type, str] = {float: '_float', str: '_string', bool: '_bool', NativeFunction: '_native'}
+
+# raised for loops that declare functions, return, or call anything that isn't known to be a native
+class NotCompilable(Exception):
+    pass
+
+# ropes are strings as far as Lox is concerned, and code typed for str handles both
+def lox_type(value: object) -> type:
+    kind: type = type(value)
+    return str if kind is Rope else kind
+
+def type_guard(name: str, kind: type) -> str:
+    if kind is str:
+        return f'type({name}) is not _string and type({name}) is not _rope'
+    return f'type({name}) is not {guardable_types[kind]}'
+
+def add_values(left: object, right: object, token: object) -> object:
+    if type(left) is float and type(right) is float:
+        return left + right
+    if isinstance(left, string_types) and isinstance(right, string_types):
+        return concat(left, right)
+    return arithmetic(left, right, token, 'Operands must be two numbers or two strings.')
+
+def variable_key(blocks: list[int], depth: int, slot: int, name: str) -> tuple:
+    if depth is None:
+        return ('g', name)
+    if depth < len(blocks):
+        return ('l', blocks[-1 - depth], slot)
+    return ('o', depth - len(blocks), slot)
+
+def result_type(expr: Expr, types: dict[tuple, type], key: Callable[[Expr], tuple]) -> type:
+    if isinstance(expr, Literal):
+        return type(expr.value)
+    if isinstance(expr, Grouping):
+        return result_type(expr.expression, types, key)
+    if isinstance(expr, Variable):
+        return types.get(key(expr))
+    if isinstance(expr, Assign):
+        return result_type(expr.value, types, key)
+    if isinstance(expr, Unary):
+        if expr.op == TokenType.BANG:
+            return bool
+        return float if result_type(expr.right, types, key) is float else None
+    if isinstance(expr, Logical):
+        left: type = result_type(expr.left, types, key)
+        return left if left is result_type(expr.right, types, key) else None
+    if isinstance(expr, Binary):
+        if expr.op in Transpiler.bool_ops:
+            return bool
+        # arithmetic on arrays gives an array, so only float operands are known to give a float
+        left = result_type(expr.left, types, key)
+        if left is not result_type(expr.right, types, key):
+            return None
+        return left if left is float or left is str and expr.op == TokenType.PLUS else None
+    return None
+
+# finds the variables whose type can't change while the loop runs, given their types on entry
+class LoopTypes(Visitor):
+    def __init__(self, entry_type: Callable[[tuple], type]) -> None:
+        self.entry_type: Callable[[tuple], type] = entry_type
+        self.types: dict[tuple, type] = {}
+        self.unstable: set[tuple] = set()
+        self.blocks: list[int] = []
+        self.block_count: int = 0
+        self.changed: bool = False
+
+    def infer(self, loop: While) -> dict[tuple, type]:
+        self.changed = True
+        while self.changed:
+            self.changed = False
+            self.block_count = 0
+            loop.condition.accept(self)
+            loop.body.accept(self)
+        return {key: kind for key, kind in self.types.items() if key not in self.unstable}
+
+    def key(self, expr: Expr) -> tuple:
+        return variable_key(self.blocks, expr.depth, expr.slot, expr.name.lexeme)
+
+    def observe(self, key: tuple) -> None:
+        if key[0] != 'l' and key not in self.types:
+            kind: type = self.entry_type(key)
+            self.types[key] = kind if kind in guardable_types else None
+
+    def assign(self, key: tuple, kind: type) -> None:
+        if key in self.unstable:
+            return
+        if key not in self.types:
+            self.types[key] = kind
+            self.changed = True
+        elif self.types[key] is not kind or kind not in guardable_types:
+            self.unstable.add(key)
+            self.changed = True
+
+    # statements
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        stmt.expression.accept(self)
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        stmt.expression.accept(self)
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        kind: type = type(None)
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+            kind = result_type(stmt.initializer, self.types, self.key)
+        self.assign(('l', self.blocks[-1], stmt.slot), kind)
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        if not stmt.slot_count:
+            for inner in stmt.statements:
+                if inner is not None:
+                    inner.accept(self)
+            return
+        self.block_count += 1
+        self.blocks.append(self.block_count)
+        for inner in stmt.statements:
+            if inner is not None:
+                inner.accept(self)
+        self.blocks.pop()
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        stmt.condition.accept(self)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        stmt.condition.accept(self)
+        stmt.body.accept(self)
+
+    def visit_function_stmt(self, stmt: Function) -> None:
+        raise NotCompilable()
+
+    def visit_return_stmt(self, stmt: Return) -> None:
+        raise NotCompilable()
+
+    # expressions
+    def visit_literal_expr(self, expr: Literal) -> None:
+        pass
+
+    def visit_grouping_expr(self, expr: Grouping) -> None:
+        expr.expression.accept(self)
+
+    def visit_variable_expr(self, expr: Variable) -> None:
+        self.observe(self.key(expr))
+
+    def visit_assign_expr(self, expr: Assign) -> None:
+        expr.value.accept(self)
+        key: tuple = self.key(expr)
+        self.observe(key)
+        self.assign(key, result_type(expr.value, self.types, self.key))
+
+    def visit_logical_expr(self, expr: Logical) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_unary_expr(self, expr: Unary) -> None:
+        expr.right.accept(self)
+
+    def visit_binary_expr(self, expr: Binary) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visit_call_expr(self, expr: Call) -> None:
+        expr.callee.accept(self)
+        for argument in expr.arguments:
+            argument.accept(self)
+
+# compiles a while loop into a function over the live environments that starts at the condition
+class LoopCompiler(Transpiler):
+    def __init__(self, environment: object, global_values: dict[str, object], stepped: bool=False) -> None:
+        super().__init__()
+        self.indent = 2
+        self.stepped: bool = stepped
+        self.environment: object = environment
+        self.global_values: dict[str, object] = global_values
+        self.outer: dict[tuple, str] = {}
+        self.names: dict[tuple, str] = {}
+        self.assigned: set[tuple] = set()
+        self.types: dict[tuple, type] = {}
+
+    def compile_loop(self, loop: While) -> tuple[Callable, dict[str, type]]:
+        self.types = LoopTypes(lambda key: lox_type(self.load(key))).infer(loop)
+        self.visit_while_stmt(loop)
+        guards: dict[tuple, type] = {key: self.types[key] for key in self.outer if self.types.get(key) is not None}
+        namespace: dict[str, object] = {
+            '_k': self.tokens,
+            '_str': Interpreter.stringify,
+            '_output': active_output,
+            '_divide_err': divide_err,
+            '_arith': arithmetic,
+            '_negate': negate_array,
+            '_call': call_value,
+            '_add': add_values,
+            '_concat': concat,
+            '_rope': Rope,
+            '_float': float,
+            '_string': str,
+            '_bool': bool,
+            '_native': NativeFunction,
+            '_countdown': range,
+            '_inf': inf,
+            '_nan': nan
+        }
+        exec(self.compile(self.build(guards)), namespace)
+        return namespace['__lox_loop__'], {self.names[key]: kind for key, kind in guards.items()}
+
+    def build(self, guards: dict[tuple, type]) -> str:
+        # a compiled loop outlives the run it was compiled in, so it looks up the output on every entry
+        lines: list[str] = ['def __lox_loop__(_env, _globals, _interp):', '    _write = _output().write_line']
+        depth: int = max((key[1] for key in self.outer if key[0] == 'o'), default=-1)
+        if depth >= 0:
+            lines.append('    _e0 = _env')
+        for level in range(1, depth + 1):
+            lines.append(f'    _e{level} = _e{level - 1}.enclosing')
+        for key, name in self.outer.items():
+            lines.append(f'    {name} = {self.location(key)}')
+        if guards:
+            checks: list[str] = [type_guard(self.outer[key], kind) for key, kind in guards.items()]
+            lines.append(f'    if {" or ".join(checks)}:')
+            lines.append('        return False')
+        if self.stepped:
+            lines.append('    _steps = _interp.steps')
+        lines.append('    try:')
+        lines.extend(self.lines)
+        lines.append('    finally:')
+        stores: list[str] = [f'        {self.location(key)} = {name}' for key, name in self.outer.items() if key in self.assigned]
+        if self.stepped:
+            stores.append('        _interp.steps = _steps')
+        lines.extend(stores if stores else ['        pass'])
+        lines.append('    return True')
+        return '\n'.join(lines) + '\n'
+
+    def location(self, key: tuple) -> str:
+        if key[0] == 'g':
+            return f'_globals[{key[1]!r}]'
+        return f'_e{key[1]}.slots[{key[2]}]'
+
+    def load(self, key: tuple) -> object:
+        if key[0] == 'g':
+            return self.global_values[key[1]]
+        environment: object = self.environment
+        for _ in range(key[1]):
+            environment = environment.enclosing
+        return environment.slots[key[2]]
+
+    def key(self, expr: Expr) -> tuple:
+        return variable_key(self.blocks, expr.depth, expr.slot, expr.name.lexeme)
+
+    def name_for(self, key: tuple, lexeme: str) -> str:
+        if key[0] == 'l':
+            return f'l{key[1]}_{key[2]}'
+        if key not in self.outer:
+            self.outer[key] = f'v{len(self.outer)}'
+            self.names[key] = lexeme
+        return self.outer[key]
+
+    def static_type(self, expr: Expr) -> type:
+        return result_type(expr, self.types, self.key)
+
+    # statements
+    def visit_var_stmt(self, stmt: Var) -> None:
+        value: str = stmt.initializer.accept(self) if stmt.initializer is not None else 'None'
+        self.emit(f'{self.local_name(0, stmt.slot)} = {value}')
+
+    # every back-edge takes a step, as in the interpreter, and the steps left are kept in a local while the loop runs
+    def visit_while_stmt(self, stmt: While) -> None:
+        if not self.stepped:
+            super().visit_while_stmt(stmt)
+            return
+        if contains_loop(stmt.body):
+            super().visit_while_stmt(stmt)
+            self.indent += 1
+            self.emit('_steps -= 1')
+            self.emit('if _steps <= 0:')
+            self.emit('    _steps = _interp.step_hook()')
+            self.indent -= 1
+            return
+        # an innermost loop counts down with a range iterator instead, which costs less than a decrement and a test
+        self.emit('while True:')
+        self.indent += 1
+        self.emit('for _steps in _countdown(_steps, 0, -1):')
+        self.indent += 1
+        self.emit(f'if not {self.condition(stmt.condition)}:')
+        self.emit('    break')
+        self.indent -= 1
+        self.nested(stmt.body)
+        self.emit('else:')
+        self.emit('    _steps = _interp.step_hook()')
+        self.emit('    continue')
+        self.emit('break')
+        self.indent -= 1
+
+    # expressions
+    def visit_variable_expr(self, expr: Variable) -> str:
+        return self.name_for(self.key(expr), expr.name.lexeme)
+
+    def visit_assign_expr(self, expr: Assign) -> str:
+        value: str = expr.value.accept(self)
+        key: tuple = self.key(expr)
+        self.assigned.add(key)
+        return f'({self.name_for(key, expr.name.lexeme)} := {value})'
+
+    # a Lox function needs the interpreter to run, so only guarded natives are called from compiled code
+    def visit_call_expr(self, expr: Call) -> str:
+        if self.static_type(expr.callee) is not NativeFunction:
+            raise NotCompilable()
+        return super().visit_call_expr(expr)
+
+    def visit_unary_expr(self, expr: Unary) -> str:
+        if expr.op == TokenType.MINUS and self.static_type(expr.right) is float:
+            return f'(-{expr.right.accept(self)})'
+        return super().visit_unary_expr(expr)
+
+    def visit_binary_expr(self, expr: Binary) -> str:
+        kind: type = self.static_type(expr.left)
+        op: TokenType = expr.op
+        if kind not in (float, str) or self.static_type(expr.right) is not kind:
+            if op == TokenType.PLUS:
+                return self.generic_add(expr)
+            return super().visit_binary_expr(expr)
+        if kind is str and op not in (TokenType.PLUS, TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+            return super().visit_binary_expr(expr)
+        if op in (TokenType.SLASH, TokenType.MODULO):
+            # only a literal divisor is known to be non-zero
+            if not isinstance(expr.right, Literal) or expr.right.value == 0.0:
+                return super().visit_binary_expr(expr)
+            symbol: str = '/' if op == TokenType.SLASH else '%'
+            return f'({expr.left.accept(self)} {symbol} {expr.right.accept(self)})'
+        self.depth += 1
+        left: str = expr.left.accept(self)
+        right: str = expr.right.accept(self)
+        self.depth -= 1
+        if op == TokenType.PLUS:
+            return f'({left} + {right})' if kind is float else f'_concat({left}, {right})'
+        if op == TokenType.EQUAL_EQUAL:
+            return f'({left} == {right})'
+        if op == TokenType.BANG_EQUAL:
+            return f'({left} != {right})'
+        return f'({left} {self.numeric_ops[op]} {right})'
+
+    # string operands may be ropes, which only the interpreter's concatenation understands
+    def generic_add(self, expr: Binary) -> str:
+        a: str = self.temp('a')
+        b: str = self.temp('b')
+        self.depth += 1
+        left: str = expr.left.accept(self)
+        right: str = expr.right.accept(self)
+        self.depth -= 1
+        token: str = self.token_ref(expr.operator)
+        return f'({a} + {b} if type({a} := {left}) is type({b} := {right}) is float else _add({a}, {b}, {token}))'
+
+def contains_loop(stmt: Stmt) -> bool:
+    if isinstance(stmt, While):
+        return True
+    if isinstance(stmt, Block):
+        return any(contains_loop(inner) for inner in stmt.statements if inner is not None)
+    if isinstance(stmt, If):
+        return contains_loop(stmt.then_branch) or stmt.else_branch is not None and contains_loop(stmt.else_branch)
+    return False
+
+def compile_loop(loop: While, environment: object, global_values: dict[str, object],
+                 stepped: bool=False) -> tuple[Callable, dict[str, type]]:
+    return LoopCompiler(environment, global_values, stepped).compile_loop(loop)
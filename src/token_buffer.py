@@ -0,0 +1,253 @@
+import re
+from mmap import mmap, ACCESS_READ
+from array import array
+from token_type import TokenType
+from token_cls import Token
+from token_parser import Parser
+from error import error
+
+token_types: list[TokenType] = [None] * (max(t.value for t in TokenType) + 1)
+for token_type in TokenType:
+    token_types[token_type.value] = token_type
+eof_code: int = TokenType.EOF.value
+
+class TokenView:
+    __slots__ = ('buffer', 'index', 'cached_lexeme')
+
+    def __init__(self, buffer: 'TokenBuffer', index: int) -> None:
+        self.buffer: TokenBuffer = buffer
+        self.index: int = index
+        self.cached_lexeme: str = None
+
+    @property
+    def type(self) -> TokenType:
+        return token_types[self.buffer.types[self.index]]
+
+    @property
+    def line(self) -> int:
+        return self.buffer.lines[self.index]
+
+    @property
+    def lexeme(self) -> str:
+        if self.cached_lexeme is None:
+            self.cached_lexeme = self.buffer.lexeme(self.index)
+        return self.cached_lexeme
+
+    @property
+    def literal(self) -> object:
+        return self.buffer.literal(self.index)
+
+    def __str__(self) -> str:
+        return f'{self.type} {self.lexeme} {self.literal}'
+
+    # pickle as a plain token so the buffer and the mapped source are not dragged along
+    def __reduce__(self) -> tuple:
+        return Token, (self.type, self.lexeme, self.literal, self.line)
+
+class TokenBuffer:
+    keywords: dict[bytes, int] = {
+        b'and': TokenType.AND.value,
+        b'class': TokenType.CLASS.value,
+        b'else': TokenType.ELSE.value,
+        b'false': TokenType.FALSE.value,
+        b'for': TokenType.FOR.value,
+        b'fun': TokenType.FUN.value,
+        b'if': TokenType.IF.value,
+        b'nil': TokenType.NIL.value,
+        b'or': TokenType.OR.value,
+        b'print': TokenType.PRINT.value,
+        b'return': TokenType.RETURN.value,
+        b'super': TokenType.SUPER.value,
+        b'this': TokenType.THIS.value,
+        b'true': TokenType.TRUE.value,
+        b'var': TokenType.VAR.value,
+        b'while': TokenType.WHILE.value
+    }
+
+    operators: dict[bytes, int] = {
+        b'(': TokenType.LEFT_PAREN.value,
+        b')': TokenType.RIGHT_PAREN.value,
+        b'{': TokenType.LEFT_BRACE.value,
+        b'}': TokenType.RIGHT_BRACE.value,
+        b',': TokenType.COMMA.value,
+        b'.': TokenType.DOT.value,
+        b'-': TokenType.MINUS.value,
+        b'+': TokenType.PLUS.value,
+        b'%': TokenType.MODULO.value,
+        b';': TokenType.SEMICOLON.value,
+        b'*': TokenType.STAR.value,
+        b'/': TokenType.SLASH.value,
+        b'!': TokenType.BANG.value,
+        b'!=': TokenType.BANG_EQUAL.value,
+        b'=': TokenType.EQUAL.value,
+        b'==': TokenType.EQUAL_EQUAL.value,
+        b'<': TokenType.LESS.value,
+        b'<=': TokenType.LESS_EQUAL.value,
+        b'>': TokenType.GREATER.value,
+        b'>=': TokenType.GREATER_EQUAL.value
+    }
+
+    # group numbers double as the dispatch codes in scan, keep them in sync
+    pattern: re.Pattern = re.compile(rb'''
+        [ \t\r]*
+        (?:
+            ([A-Za-z\x80-\xff][A-Za-z0-9\x80-\xff]*) # 1 identifier or keyword, checked by scan_word past ASCII
+            |(!=|==|<=|>=|[(){},.\-+%;*!=<>])   # 2 operator
+            |([0-9]+(?:\.[0-9]+)?)              # 3 number
+            |(\n)                               # 4 newline
+            |("[^"]*")                          # 5 string
+            |(//[^\n]*)                         # 6 line comment
+            |(/\*.*?\*/)                        # 7 block comment
+            |(/(?![/*]))                        # 8 slash
+            |("[^"]*)                           # 9 unterminated string
+            |(/\*.*)                            # 10 unterminated block comment
+            |([^ \t\r])                         # 11 unexpected character
+        )
+    ''', re.VERBOSE | re.DOTALL)
+
+    def __init__(self, source: bytes) -> None:
+        self.source: bytes = source
+        self.types: array = array('B')
+        self.starts: array = array('I')
+        self.lengths: array = array('I')
+        self.lines: array = array('I')
+
+    @classmethod
+    def from_source(cls, source: str) -> 'TokenBuffer':
+        buffer: TokenBuffer = cls(source.encode('utf-8'))
+        buffer.scan()
+        return buffer
+
+    @classmethod
+    def from_file(cls, path: str) -> 'TokenBuffer':
+        with open(path, 'rb') as f:
+            try:
+                source: bytes = mmap(f.fileno(), 0, access=ACCESS_READ)
+            except ValueError:
+                source = b''
+            except OSError:
+                # pipes and other unmappable files are read into memory
+                source = f.read()
+        buffer: TokenBuffer = cls(source)
+        buffer.scan()
+        return buffer
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> TokenView:
+        if index < 0:
+            index += len(self.types)
+        return TokenView(self, index)
+
+    def lexeme(self, index: int) -> str:
+        start: int = self.starts[index]
+        return self.source[start:start + self.lengths[index]].decode('utf-8')
+
+    def literal(self, index: int) -> object:
+        code: int = self.types[index]
+        if code == TokenType.NUMBER.value:
+            return float(self.lexeme(index))
+        if code == TokenType.STRING.value:
+            start: int = self.starts[index]
+            text: str = self.source[start + 1:start + self.lengths[index] - 1].decode('utf-8')
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return text
+        return None
+
+    def scan(self) -> None:
+        source: bytes = self.source
+        add_type = self.types.append
+        add_start = self.starts.append
+        add_length = self.lengths.append
+        add_line = self.lines.append
+        keywords: dict[bytes, int] = self.keywords
+        operators: dict[bytes, int] = self.operators
+        identifier: int = TokenType.IDENTIFIER.value
+        string: int = TokenType.STRING.value
+        number: int = TokenType.NUMBER.value
+        line: int = 1
+        for m in self.pattern.finditer(source):
+            kind: int = m.lastindex
+            if kind == 4:
+                line += 1
+                continue
+            if kind == 6:
+                continue
+            if kind == 7 or kind == 10:
+                line += m.group(kind).count(b'\n')
+                continue
+            start: int = m.start(kind)
+            end: int = m.end(kind)
+            if kind == 1:
+                text: bytes = m.group(1)
+                if not text.isascii():
+                    self.scan_word(start, text, line)
+                    continue
+                add_type(keywords.get(text, identifier))
+            elif kind == 2 or kind == 8:
+                add_type(operators[m.group(kind)])
+            elif kind == 3:
+                add_type(number)
+            elif kind == 5:
+                line += m.group(kind).count(b'\n')
+                add_type(string)
+            elif kind == 9:
+                line += m.group(kind).count(b'\n')
+                error(line=line, msg='Unterminated String.')
+                continue
+            else:
+                error(line=line, msg='Unexpected Character.')
+                continue
+            add_start(start)
+            add_length(end - start)
+            add_line(line)
+        add_type(TokenType.EOF.value)
+        add_start(len(source))
+        add_length(0)
+        add_line(line)
+
+    # splits a run of letters, digits and other characters the way Scanner does: str.isalpha starts an identifier
+    # and str.isalnum continues it
+    def scan_word(self, start: int, word: bytes, line: int) -> None:
+        try:
+            text: str = word.decode('utf-8')
+        except UnicodeDecodeError:
+            error(line=line, msg='Unexpected Character.')
+            return None
+        offset: int = start
+        i: int = 0
+        while i < len(text):
+            j: int = i + 1
+            code: int = None
+            if text[i].isalpha():
+                while j < len(text) and text[j].isalnum():
+                    j += 1
+                code = self.keywords.get(text[i:j].encode('utf-8'), TokenType.IDENTIFIER.value)
+            elif text[i].isdigit():
+                while j < len(text) and text[j].isdigit():
+                    j += 1
+                code = TokenType.NUMBER.value
+            else:
+                error(line=line, msg='Unexpected Character.')
+            size: int = len(text[i:j].encode('utf-8'))
+            if code is not None:
+                self.types.append(code)
+                self.starts.append(offset)
+                self.lengths.append(size)
+                self.lines.append(line)
+            offset += size
+            i = j
+
+class BufferParser(Parser):
+    def __init__(self, tokens: TokenBuffer) -> None:
+        super().__init__(tokens)
+        self.types: array = tokens.types
+
+    def check(self, ttype: TokenType) -> bool:
+        code: int = self.types[self.cur]
+        return code == ttype.value and code != eof_code
+
+    def tok_end(self) -> bool:
+        return self.types[self.cur] == eof_code
@@ -2,7 +2,47 @@ from expressions import *
 from statements import *
 from token_cls import Token
 from token_type import TokenType
-from error import ParseErr
+from error import ParseErr, error
+
+or_level: int = 1
+and_level: int = 2
+equality_level: int = 3
+comparison_level: int = 4
+term_level: int = 5
+factor_level: int = 6
+unary_level: int = 7
+
+infix_levels: dict[TokenType, int] = {
+    TokenType.OR: or_level,
+    TokenType.AND: and_level,
+    TokenType.BANG_EQUAL: equality_level,
+    TokenType.EQUAL_EQUAL: equality_level,
+    TokenType.GREATER: comparison_level,
+    TokenType.GREATER_EQUAL: comparison_level,
+    TokenType.LESS: comparison_level,
+    TokenType.LESS_EQUAL: comparison_level,
+    TokenType.PLUS: term_level,
+    TokenType.MINUS: term_level,
+    TokenType.SLASH: factor_level,
+    TokenType.STAR: factor_level,
+    TokenType.MODULO: factor_level
+}
+
+# the level each operator's right operand is parsed at
+right_levels: dict[int, int] = {
+    or_level: and_level,
+    and_level: equality_level,
+    equality_level: factor_level,
+    comparison_level: factor_level,
+    term_level: factor_level,
+    factor_level: unary_level
+}
+
+literal_values: dict[TokenType, object] = {
+    TokenType.FALSE: False,
+    TokenType.TRUE: True,
+    TokenType.NIL: None
+}
 
 class Parser:
     cur: int = 0
@@ -32,6 +72,8 @@ class Parser:
         try:
             if self.match(TokenType.VAR):
                 return self.var_declaration()
+            if self.match(TokenType.FUN):
+                return self.function()
             return self.statement()
         except ParseErr:
             self.synchronize()
@@ -45,25 +87,45 @@ class Parser:
         self.consume(TokenType.SEMICOLON, 'Expected \';\' after variable declaration.')
         return Var(name, initializer)
 
+    def function(self) -> Stmt:
+        line: int = self.previous().line
+        name: Token = self.consume(TokenType.IDENTIFIER, 'Expected function name.')
+        self.consume(TokenType.LEFT_PAREN, 'Expected \'(\' after function name.')
+        params: list[Token] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            params.append(self.consume(TokenType.IDENTIFIER, 'Expected parameter name.'))
+            while self.match(TokenType.COMMA):
+                if len(params) >= 255:
+                    error(token=self.peek(), msg='Can\'t have more than 255 parameters.')
+                params.append(self.consume(TokenType.IDENTIFIER, 'Expected parameter name.'))
+        self.consume(TokenType.RIGHT_PAREN, 'Expected \')\' after parameters.')
+        self.consume(TokenType.LEFT_BRACE, 'Expected \'{\' before function body.')
+        return Function(name, params, self.block(), line)
+
     def while_statement(self) -> Stmt:
+        line: int = self.previous().line
         self.consume(TokenType.LEFT_PAREN, 'Expected \'(\' after \'while\'.')
         condition: Expr = self.expression()
         self.consume(TokenType.RIGHT_PAREN, 'Expected \')\' after condition.')
         body: Stmt = self.statement()
-        return While(condition, body)
+        return While(condition, body, line)
 
     def statement(self) -> Stmt:
         if self.match(TokenType.IF):
             return self.if_statement()
         if self.match(TokenType.PRINT):
             return self.print_statement()
+        if self.match(TokenType.RETURN):
+            return self.return_statement()
         if self.match(TokenType.WHILE):
             return self.while_statement()
         if self.match(TokenType.LEFT_BRACE):
-            return Block(self.block())
+            line: int = self.previous().line
+            return Block(self.block(), line)
         return self.expression_statement()
 
     def if_statement(self) -> Stmt:
+        line: int = self.previous().line
         self.consume(TokenType.LEFT_PAREN, 'Expected \'(\' after \'if\'.')
         condition: Expr = self.expression()
         self.consume(TokenType.RIGHT_PAREN, 'Expected \')\' after if condition.')
@@ -71,17 +133,27 @@ class Parser:
         else_branch: Stmt = None
         if self.match(TokenType.ELSE):
             else_branch = self.statement()
-        return If(condition, then_branch, else_branch)
+        return If(condition, then_branch, else_branch, line)
 
     def print_statement(self) -> Stmt:
+        line: int = self.previous().line
         value: Expr = self.expression()
         self.consume(TokenType.SEMICOLON, 'Expected \';\' after value.')
-        return Print(value)
+        return Print(value, line)
     
+    def return_statement(self) -> Stmt:
+        keyword: Token = self.previous()
+        value: Expr = None
+        if not self.check(TokenType.SEMICOLON):
+            value = self.expression()
+        self.consume(TokenType.SEMICOLON, 'Expected \';\' after return value.')
+        return Return(keyword, value, keyword.line)
+
     def expression_statement(self) -> Stmt:
+        line: int = self.peek().line
         expr: Expr = self.expression()
         self.consume(TokenType.SEMICOLON, 'Expected \';\' after expression.')
-        return Expression(expr)
+        return Expression(expr, line)
 
     def block(self) -> list[Stmt]:
         statements: list[Stmt] = []
@@ -91,92 +163,73 @@ class Parser:
         return statements
 
     def expression(self) -> Expr:
-        return self.assignment()
-
-    def assignment(self) -> Expr:
-        expr: Expr = self.or_op()
+        expr: Expr = self.binary(or_level)
         if self.match(TokenType.EQUAL):
             equals: Token = self.previous()
-            value: Expr = self.assignment()
+            value: Expr = self.expression()
             if isinstance(expr, Variable):
                 name: Token = expr.name
                 return Assign(name, value)
             raise ParseErr(equals, 'Invalid assignment target.')
         return expr
-    
-    def or_op(self) -> Expr:
-        expr: Expr = self.and_op()
-        while self.match(TokenType.OR):
-            operator: Token = self.previous()
-            right: Expr = self.and_op()
-            expr = Logical(expr, operator, right)
-        return expr
 
-    def and_op(self) -> Expr:
-        expr: Expr = self.equality()
-        while self.match(TokenType.AND):
-            operator: Token = self.previous()
-            right: Expr = self.equality()
-            expr = Logical(expr, operator, right)
-        return expr
+    # precedence climbing over infix_levels: once an operator is taken only operators at its level or
+    # looser can follow, since equality, comparison and term operators take a factor-level right operand
+    def binary(self, min_level: int) -> Expr:
+        expr: Expr = self.prefix()
+        max_level: int = factor_level
+        while True:
+            level: int = infix_levels.get(self.peek().type, 0)
+            if level < min_level or level > max_level:
+                return expr
+            operator: Token = self.advance()
+            right: Expr = self.binary(right_levels[level]) if level < factor_level else self.prefix()
+            expr = Logical(expr, operator, right) if level <= and_level else Binary(expr, operator, right)
+            max_level = level
 
-    def equality(self) -> Expr:
-        expr: Expr = self.comparison()
-        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-            oper: Token = self.previous()
-            right: Expr = self.factor()
-            expr = Binary(expr, oper, right)
-        return expr
-    
-    def comparison(self) -> Expr:
-        expr: Expr = self.term()
-        while self.match(TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL):
-            oper: Token = self.previous()
-            right: Expr = self.factor()
-            expr = Binary(expr, oper, right)
-        return expr
-    
-    def term(self) -> Expr:
-        expr: Expr = self.factor()
-        while self.match(TokenType.PLUS, TokenType.MINUS):
-            oper: Token = self.previous()
-            right: Expr = self.factor()
-            expr = Binary(expr, oper, right)
-        return expr
-    
-    def factor(self) -> Expr:
-        expr: Expr = self.unary()
-        while self.match(TokenType.SLASH, TokenType.STAR, TokenType.MODULO):
-            oper: Token = self.previous()
-            right: Expr = self.unary()
-            expr = Binary(expr, oper, right)
-        return expr
-    
-    def unary(self) -> Expr:
-        if self.match(TokenType.BANG, TokenType.MINUS):
-            oper: Token = self.previous()
-            right: Expr = self.unary()
-            return Unary(oper, right)
-        return self.primary()
-    
-    def primary(self) -> Expr:
-        if self.match(TokenType.FALSE):
-            return Literal(False)
-        if self.match(TokenType.TRUE):
-            return Literal(True)
-        if self.match(TokenType.NIL):
-            return Literal(None)
-        if self.match(TokenType.NUMBER, TokenType.STRING):
-            return Literal(self.previous().literal)
-        if self.match(TokenType.IDENTIFIER):
-            return Variable(self.previous())
-        if self.match(TokenType.LEFT_PAREN):
-            expr: Expr = self.expression()
+    def prefix(self) -> Expr:
+        token: Token = self.peek()
+        ttype: TokenType = token.type
+        if ttype == TokenType.BANG or ttype == TokenType.MINUS:
+            operators: list[Token] = []
+            while ttype == TokenType.BANG or ttype == TokenType.MINUS:
+                operators.append(self.advance())
+                token = self.peek()
+                ttype = token.type
+            expr: Expr = self.prefix()
+            for operator in reversed(operators):
+                expr = Unary(operator, expr)
+            return expr
+        if ttype == TokenType.NUMBER or ttype == TokenType.STRING:
+            self.advance()
+            expr = Literal(token.literal)
+        elif ttype == TokenType.IDENTIFIER:
+            self.advance()
+            expr = Variable(token)
+        elif ttype == TokenType.LEFT_PAREN:
+            self.advance()
+            expr = Grouping(self.expression())
             self.consume(TokenType.RIGHT_PAREN, 'Expect \')\' after expression.')
-            return Grouping(expr)
-        
-        raise ParseErr(self.peek(), 'Expect expression.')
-    
+        elif ttype in literal_values:
+            self.advance()
+            expr = Literal(literal_values[ttype])
+        else:
+            raise ParseErr(token, 'Expect expression.')
+        while self.match(TokenType.LEFT_PAREN):
+            expr = self.finish_call(expr)
+        return expr
+
+    def finish_call(self, callee: Expr) -> Expr:
+        arguments: list[Expr] = []
+        if not self.check(TokenType.RIGHT_PAREN):
+            arguments.append(self.expression())
+            while self.match(TokenType.COMMA):
+                if len(arguments) >= 255:
+                    error(token=self.peek(), msg='Can\'t have more than 255 arguments.')
+                arguments.append(self.expression())
+        paren: Token = self.consume(TokenType.RIGHT_PAREN, 'Expect \')\' after arguments.')
+        return Call(callee, paren, arguments)
+
     # Helper functions
     def match(self, *types: TokenType) -> bool:
         for ttype in types:
@@ -0,0 +1,249 @@
+from hashlib import sha1
+from math import inf, nan, isfinite, isnan
+from types import CodeType
+from expressions import *
+from statements import *
+from visitor import Visitor
+from token_cls import Token
+from token_type import TokenType
+from interpreter import Interpreter
+from error import error, RuntimeErr
+from output import active_output
+from numarray import arithmetic, negate_array
+from natives import natives, call_value
+
+code_cache: dict[str, CodeType] = {}
+
+def divide_err(left: object, right: object, token: Token, message: str) -> object:
+    if type(left) is float and type(right) is float:
+        raise RuntimeErr(token, 'Can\'t divide by zero.')
+    return arithmetic(left, right, token, message)
+
+class Transpiler(Visitor):
+    numeric_ops: dict[TokenType, str] = {
+        TokenType.GREATER: '>',
+        TokenType.GREATER_EQUAL: '>=',
+        TokenType.LESS: '<',
+        TokenType.LESS_EQUAL: '<=',
+        TokenType.MINUS: '-',
+        TokenType.STAR: '*'
+    }
+
+    bool_ops: set[TokenType] = {
+        TokenType.GREATER,
+        TokenType.GREATER_EQUAL,
+        TokenType.LESS,
+        TokenType.LESS_EQUAL,
+        TokenType.EQUAL_EQUAL,
+        TokenType.BANG_EQUAL
+    }
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.indent: int = 1
+        self.tokens: list[Token] = []
+        self.global_names: dict[str, str] = {}
+        self.blocks: list[int] = []
+        self.block_count: int = 0
+        self.depth: int = 0
+
+    def transpile(self, stmts: list[Stmt]) -> str:
+        for stmt in stmts:
+            if stmt is not None:
+                stmt.accept(self)
+        header: list[str] = ['def __lox_main__():']
+        if self.global_names:
+            header.append('    global ' + ', '.join(self.global_names.values()))
+        if not self.lines:
+            self.lines.append('    pass')
+        return '\n'.join(header + self.lines) + '\n'
+
+    def interpret(self, stmts: list[Stmt], dump: bool=False) -> None:
+        source: str = self.transpile(stmts)
+        if dump:
+            print(source)
+        try:
+            code: CodeType = self.compile(source)
+        except (SyntaxError, RecursionError, MemoryError):
+            Interpreter().interpret(stmts)
+            return None
+        namespace: dict[str, object] = self.namespace()
+        exec(code, namespace)
+        try:
+            namespace['__lox_main__']()
+        except RuntimeErr as err:
+            error(line=err.token.line, token=err.token, msg=err.message)
+            return None
+
+    # the helpers generated code calls, and the natives it reads as globals
+    def namespace(self) -> dict[str, object]:
+        namespace: dict[str, object] = {
+            '_k': self.tokens,
+            '_str': Interpreter.stringify,
+            '_write': active_output().write_line,
+            '_divide_err': divide_err,
+            '_arith': arithmetic,
+            '_negate': negate_array,
+            '_call': call_value,
+            '_inf': inf,
+            '_nan': nan
+        }
+        for name, python_name in self.global_names.items():
+            if name in natives:
+                namespace[python_name] = natives[name]
+        return namespace
+
+    @staticmethod
+    def compile(source: str) -> CodeType:
+        key: str = sha1(source.encode('utf-8')).hexdigest()
+        if key not in code_cache:
+            code_cache[key] = compile(source, '<lox>', 'exec')
+        return code_cache[key]
+
+    # statements
+    def visit_expression_stmt(self, stmt: Expression) -> None:
+        self.emit(stmt.expression.accept(self))
+
+    def visit_print_stmt(self, stmt: Print) -> None:
+        self.emit(f'_write(_str({stmt.expression.accept(self)}))')
+
+    def visit_var_stmt(self, stmt: Var) -> None:
+        value: str = stmt.initializer.accept(self) if stmt.initializer is not None else 'None'
+        if stmt.slot is None:
+            self.emit(f'{self.global_name(stmt.name.lexeme)} = {value}')
+        else:
+            self.emit(f'{self.local_name(0, stmt.slot)} = {value}')
+
+    def visit_block_stmt(self, stmt: Block) -> None:
+        if not stmt.slot_count:
+            for inner in stmt.statements:
+                if inner is not None:
+                    inner.accept(self)
+            return
+        self.block_count += 1
+        self.blocks.append(self.block_count)
+        for inner in stmt.statements:
+            if inner is not None:
+                inner.accept(self)
+        self.blocks.pop()
+
+    def visit_if_stmt(self, stmt: If) -> None:
+        self.emit(f'if {self.condition(stmt.condition)}:')
+        self.nested(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.emit('else:')
+            self.nested(stmt.else_branch)
+
+    def visit_while_stmt(self, stmt: While) -> None:
+        self.emit(f'while {self.condition(stmt.condition)}:')
+        self.nested(stmt.body)
+
+    # expressions
+    def visit_literal_expr(self, expr: Literal) -> str:
+        value: object = expr.value
+        if type(value) is float and not isfinite(value):
+            # repr gives the bare names inf and nan, which generated code reads from its namespace instead
+            return '_nan' if isnan(value) else '_inf' if value > 0 else '(-_inf)'
+        return repr(value)
+
+    def visit_grouping_expr(self, expr: Grouping) -> str:
+        return expr.expression.accept(self)
+
+    def visit_variable_expr(self, expr: Variable) -> str:
+        if expr.depth is None:
+            return self.global_name(expr.name.lexeme)
+        return self.local_name(expr.depth, expr.slot)
+
+    def visit_assign_expr(self, expr: Assign) -> str:
+        value: str = expr.value.accept(self)
+        if expr.depth is None:
+            return f'({self.global_name(expr.name.lexeme)} := {value})'
+        return f'({self.local_name(expr.depth, expr.slot)} := {value})'
+
+    def visit_call_expr(self, expr: Call) -> str:
+        callee: str = expr.callee.accept(self)
+        arguments: str = ', '.join(argument.accept(self) for argument in expr.arguments)
+        return f'_call({callee}, [{arguments}], {self.token_ref(expr.paren)})'
+
+    def visit_logical_expr(self, expr: Logical) -> str:
+        a: str = self.temp('a')
+        self.depth += 1
+        left: str = expr.left.accept(self)
+        right: str = expr.right.accept(self)
+        self.depth -= 1
+        if expr.op == TokenType.OR:
+            return f'({a} if ({a} := {left}) is not None and {a} is not False else {right})'
+        return f'({right} if ({a} := {left}) is not None and {a} is not False else {a})'
+
+    def visit_unary_expr(self, expr: Unary) -> str:
+        a: str = self.temp('a')
+        self.depth += 1
+        right: str = expr.right.accept(self)
+        self.depth -= 1
+        if expr.op == TokenType.MINUS:
+            token: str = self.token_ref(expr.operator)
+            return f'(-{a} if type({a} := {right}) is float else _negate({a}, {token}))'
+        return f'(({a} := {right}) is None or {a} is False)'
+
+    def visit_binary_expr(self, expr: Binary) -> str:
+        a: str = self.temp('a')
+        b: str = self.temp('b')
+        self.depth += 1
+        left: str = expr.left.accept(self)
+        right: str = expr.right.accept(self)
+        self.depth -= 1
+        op: TokenType = expr.op
+        if op == TokenType.EQUAL_EQUAL:
+            return f'({left} == {right})'
+        if op == TokenType.BANG_EQUAL:
+            return f'({left} != {right})'
+        token: str = self.token_ref(expr.operator)
+        operands: str = f'type({a} := {left}) is type({b} := {right})'
+        if op == TokenType.PLUS:
+            return (f'({a} + {b} if {operands} is float or type({a}) is str is type({b}) '
+                    f'else _arith({a}, {b}, {token}, \'Operands must be two numbers or two strings.\'))')
+        if op == TokenType.SLASH:
+            return (f'({a} / {b} if {operands} is float and {b} != 0.0 '
+                    f'else _divide_err({a}, {b}, {token}, \'Operand must be a number.\'))')
+        if op == TokenType.MODULO:
+            return (f'({a} % {b} if {operands} is float and {b} != 0.0 '
+                    f'else _divide_err({a}, {b}, {token}, \'Modulo operator must take two numbers as arguments\'))')
+        return (f'({a} {self.numeric_ops[op]} {b} if {operands} is float '
+                f'else _arith({a}, {b}, {token}, \'Operand must be a number.\'))')
+
+    # Helper functions
+    def emit(self, line: str) -> None:
+        self.lines.append('    ' * self.indent + line)
+
+    def nested(self, stmt: Stmt) -> None:
+        self.indent += 1
+        start: int = len(self.lines)
+        stmt.accept(self)
+        if len(self.lines) == start:
+            self.emit('pass')
+        self.indent -= 1
+
+    def condition(self, expr: Expr) -> str:
+        if isinstance(expr, Binary) and expr.op in self.bool_ops:
+            return expr.accept(self)
+        c: str = self.temp('c')
+        self.depth += 1
+        value: str = expr.accept(self)
+        self.depth -= 1
+        return f'({c} := {value}) is not None and {c} is not False'
+
+    def temp(self, prefix: str) -> str:
+        return f'_{prefix}{self.depth}'
+
+    def token_ref(self, token: Token) -> str:
+        self.tokens.append(token)
+        return f'_k[{len(self.tokens) - 1}]'
+
+    def global_name(self, name: str) -> str:
+        if name not in self.global_names:
+            suffix: str = name if name.isascii() else str(len(self.global_names))
+            self.global_names[name] = f'g_{suffix}'
+        return self.global_names[name]
+
+    def local_name(self, depth: int, slot: int) -> str:
+        return f'l{self.blocks[-1 - depth]}_{slot}'
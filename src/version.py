@@ -0,0 +1 @@
+version: str = '1.3.0'
@@ -0,0 +1,207 @@
+from chunk import Chunk, OpCode
+from token_cls import Token
+from interpreter import Interpreter
+from error import error, RuntimeErr
+from output import active_output
+from numarray import arithmetic, negate_array
+from natives import natives, call_value
+
+OP_CONSTANT: int = OpCode.CONSTANT.value
+OP_NIL: int = OpCode.NIL.value
+OP_TRUE: int = OpCode.TRUE.value
+OP_FALSE: int = OpCode.FALSE.value
+OP_POP: int = OpCode.POP.value
+OP_GET_LOCAL: int = OpCode.GET_LOCAL.value
+OP_SET_LOCAL: int = OpCode.SET_LOCAL.value
+OP_DEFINE_LOCAL: int = OpCode.DEFINE_LOCAL.value
+OP_GET_GLOBAL: int = OpCode.GET_GLOBAL.value
+OP_SET_GLOBAL: int = OpCode.SET_GLOBAL.value
+OP_DEFINE_GLOBAL: int = OpCode.DEFINE_GLOBAL.value
+OP_EQUAL: int = OpCode.EQUAL.value
+OP_NOT_EQUAL: int = OpCode.NOT_EQUAL.value
+OP_GREATER: int = OpCode.GREATER.value
+OP_GREATER_EQUAL: int = OpCode.GREATER_EQUAL.value
+OP_LESS: int = OpCode.LESS.value
+OP_LESS_EQUAL: int = OpCode.LESS_EQUAL.value
+OP_ADD: int = OpCode.ADD.value
+OP_SUBTRACT: int = OpCode.SUBTRACT.value
+OP_MULTIPLY: int = OpCode.MULTIPLY.value
+OP_DIVIDE: int = OpCode.DIVIDE.value
+OP_MODULO: int = OpCode.MODULO.value
+OP_NOT: int = OpCode.NOT.value
+OP_NEGATE: int = OpCode.NEGATE.value
+OP_PRINT: int = OpCode.PRINT.value
+OP_JUMP: int = OpCode.JUMP.value
+OP_JUMP_IF_FALSE: int = OpCode.JUMP_IF_FALSE.value
+OP_JUMP_IF_TRUE: int = OpCode.JUMP_IF_TRUE.value
+OP_POP_JUMP_IF_FALSE: int = OpCode.POP_JUMP_IF_FALSE.value
+OP_LOOP: int = OpCode.LOOP.value
+OP_RETURN: int = OpCode.RETURN.value
+OP_CALL: int = OpCode.CALL.value
+
+class VM:
+    def __init__(self) -> None:
+        self.globals: dict[str, object] = dict(natives)
+
+    def interpret(self, chunk: Chunk) -> None:
+        try:
+            self.run(chunk)
+        except RuntimeErr as err:
+            error(line=err.token.line, token=err.token, msg=err.message)
+            return None
+
+    def run(self, chunk: Chunk) -> None:
+        code: list[int] = chunk.code
+        constants: list[object] = chunk.constants
+        tokens: list[Token] = chunk.tokens
+        global_vars: dict[str, object] = self.globals
+        frame: list[object] = [None] * chunk.local_count
+        stack: list[object] = []
+        push = stack.append
+        pop = stack.pop
+        stringify = Interpreter.stringify
+        write_line = active_output().write_line
+        ip: int = 0
+        # ordered roughly by how often each instruction shows up in loops
+        while True:
+            op: int = code[ip]
+            ip += 1
+            if op == OP_GET_LOCAL:
+                push(frame[code[ip]])
+                ip += 1
+            elif op == OP_CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == OP_GET_GLOBAL:
+                name: str = constants[code[ip]]
+                if name in global_vars:
+                    push(global_vars[name])
+                else:
+                    error(line=tokens[ip].line, token=tokens[ip], msg=f'Undefined variable \'{name}\'.')
+                    push(None)
+                ip += 1
+            elif op == OP_POP_JUMP_IF_FALSE:
+                value: object = pop()
+                if value is None or value is False:
+                    ip += code[ip] + 1
+                else:
+                    ip += 1
+            elif op == OP_ADD:
+                right: object = pop()
+                left: object = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left + right
+                elif type(left) is str and type(right) is str:
+                    stack[-1] = left + right
+                else:
+                    stack[-1] = arithmetic(left, right, tokens[ip - 1], 'Operands must be two numbers or two strings.')
+            elif op == OP_SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    stack[-1] = arithmetic(left, right, tokens[ip - 1], 'Operand must be a number.')
+                else:
+                    stack[-1] = left - right
+            elif op == OP_MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    stack[-1] = arithmetic(left, right, tokens[ip - 1], 'Operand must be a number.')
+                else:
+                    stack[-1] = left * right
+            elif op == OP_DIVIDE:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    stack[-1] = arithmetic(left, right, tokens[ip - 1], 'Operand must be a number.')
+                elif right == 0.0:
+                    raise RuntimeErr(tokens[ip - 1], 'Can\'t divide by zero.')
+                else:
+                    stack[-1] = left / right
+            elif op == OP_MODULO:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    stack[-1] = arithmetic(left, right, tokens[ip - 1], 'Modulo operator must take two numbers as arguments')
+                elif right == 0.0:
+                    raise RuntimeErr(tokens[ip - 1], 'Can\'t divide by zero.')
+                else:
+                    stack[-1] = left % right
+            elif op == OP_LESS or op == OP_LESS_EQUAL or op == OP_GREATER or op == OP_GREATER_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    raise RuntimeErr(tokens[ip - 1], 'Operand must be a number.')
+                if op == OP_LESS:
+                    stack[-1] = left < right
+                elif op == OP_LESS_EQUAL:
+                    stack[-1] = left <= right
+                elif op == OP_GREATER:
+                    stack[-1] = left > right
+                else:
+                    stack[-1] = left >= right
+            elif op == OP_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+            elif op == OP_NOT_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] != right
+            elif op == OP_SET_LOCAL:
+                frame[code[ip]] = stack[-1]
+                ip += 1
+            elif op == OP_DEFINE_LOCAL:
+                frame[code[ip]] = pop()
+                ip += 1
+            elif op == OP_SET_GLOBAL:
+                name = constants[code[ip]]
+                if name in global_vars:
+                    global_vars[name] = stack[-1]
+                else:
+                    error(line=tokens[ip].line, token=tokens[ip], msg=f'Undefined variable \'{name}\'.')
+                ip += 1
+            elif op == OP_DEFINE_GLOBAL:
+                global_vars[constants[code[ip]]] = pop()
+                ip += 1
+            elif op == OP_POP:
+                pop()
+            elif op == OP_LOOP:
+                ip -= code[ip] - 1
+            elif op == OP_JUMP:
+                ip += code[ip] + 1
+            elif op == OP_JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += code[ip] + 1
+                else:
+                    ip += 1
+            elif op == OP_JUMP_IF_TRUE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip += 1
+                else:
+                    ip += code[ip] + 1
+            elif op == OP_PRINT:
+                write_line(stringify(pop()))
+            elif op == OP_NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == OP_NEGATE:
+                value = stack[-1]
+                if type(value) is not float:
+                    stack[-1] = negate_array(value, tokens[ip - 1])
+                else:
+                    stack[-1] = -value
+            elif op == OP_CALL:
+                count: int = code[ip]
+                arguments: list[object] = stack[len(stack) - count:]
+                del stack[len(stack) - count:]
+                stack[-1] = call_value(stack[-1], arguments, tokens[ip])
+                ip += 1
+            elif op == OP_NIL:
+                push(None)
+            elif op == OP_TRUE:
+                push(True)
+            elif op == OP_FALSE:
+                push(False)
+            elif op == OP_RETURN:
+                return None